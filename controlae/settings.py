@@ -42,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'controlae.urls'
@@ -67,10 +68,95 @@ WSGI_APPLICATION = 'controlae.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# PRAGMAs aplicados a cada nova conexão SQLite. WAL permite leitores em paralelo
+# ao escritor; busy_timeout faz a conexão esperar pelo lock em vez de falhar
+# com "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=134217728, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),
+    'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {nome}={valor}' for nome, valor in SQLITE_PRAGMAS.items()),
+            # Transações de escrita pegam o lock de escrita já no BEGIN, evitando
+            # o deadlock de upgrade de lock das transações DEFERRED.
+            'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+        },
+    }
+}
+
+# Réplica de leitura opcional para relatórios e dashboard, atualizada com
+# `manage.py sincronizar_replica --intervalo N`.
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+if DB_REPLICA_NAME:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_REPLICA_NAME,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(
+                [f'PRAGMA {nome}={valor}' for nome, valor in SQLITE_PRAGMAS.items()
+                 if nome not in ('journal_mode', 'synchronous')] + ['PRAGMA query_only=ON']
+            ),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Após uma escrita, as leituras do usuário ficam no primário por este tempo.
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=30, cast=int)
+
+HISTORICO_SALDO_MAX_PONTOS = config('HISTORICO_SALDO_MAX_PONTOS', default=366, cast=int)
+HISTORICO_SALDO_CACHE_TTL = config('HISTORICO_SALDO_CACHE_TTL', default=600, cast=int)
+HISTORICO_SALDO_MAX_DIAS = config('HISTORICO_SALDO_MAX_DIAS', default=3660, cast=int)
+PROJECAO_MAX_MESES = config('PROJECAO_MAX_MESES', default=24, cast=int)
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)
+
+# Anos fechados além do atual que continuam na tabela quente de transações.
+ARQUIVO_ANOS_QUENTES = config('ARQUIVO_ANOS_QUENTES', default=1, cast=int)
+ARQUIVO_LOTE = config('ARQUIVO_LOTE', default=2000, cast=int)
+
+EXPORTACAO_CHUNK_SIZE = config('EXPORTACAO_CHUNK_SIZE', default=2000, cast=int)
+EXPORTACAO_BUFFER_BYTES = config('EXPORTACAO_BUFFER_BYTES', default=65536, cast=int)
+
+IDEMPOTENCIA_TTL_HORAS = config('IDEMPOTENCIA_TTL_HORAS', default=24, cast=int)
+IDEMPOTENCIA_ESPERA_SEGUNDOS = config('IDEMPOTENCIA_ESPERA_SEGUNDOS', default=10.0, cast=float)
+IDEMPOTENCIA_ABANDONO_SEGUNDOS = config('IDEMPOTENCIA_ABANDONO_SEGUNDOS', default=120, cast=int)
+
+# Coalescência de dashboard/PDF idênticos em paralelo (vazio = só dentro do processo)
+COALESCENCIA_DIR = config('COALESCENCIA_DIR', default=str(BASE_DIR / 'coalescencia'))
+COALESCENCIA_ESPERA_SEGUNDOS = config('COALESCENCIA_ESPERA_SEGUNDOS', default=30.0, cast=float)
+
+# Sincronização incremental (/api/sync/)
+SYNC_LIMITE_PADRAO = config('SYNC_LIMITE_PADRAO', default=200, cast=int)
+SYNC_LIMITE_MAXIMO = config('SYNC_LIMITE_MAXIMO', default=1000, cast=int)
+SYNC_RETENCAO_EXCLUSOES_DIAS = config('SYNC_RETENCAO_EXCLUSOES_DIAS', default=90, cast=int)
+
+# Sugestão de categoria pela descrição e importação em lote
+SUGESTAO_CATEGORIA_MAX_USUARIOS = config('SUGESTAO_CATEGORIA_MAX_USUARIOS', default=1000, cast=int)
+SUGESTAO_CATEGORIA_TTL = config('SUGESTAO_CATEGORIA_TTL', default=300, cast=int)
+IMPORTACAO_MAX_LINHAS = config('IMPORTACAO_MAX_LINHAS', default=5000, cast=int)
+IMPORTACAO_CONFIANCA_MINIMA = config('IMPORTACAO_CONFIANCA_MINIMA', default=0.5, cast=float)
+
+# Decimais crus nas respostas (dashboard, relatórios): texto ("25.50") ou número
+JSON_DECIMAL_COMO_TEXTO = config('JSON_DECIMAL_COMO_TEXTO', default=False, cast=bool)
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='controlae'),
     }
 }
 
@@ -122,10 +208,37 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.JSONRendererDecimal',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.BaldeTokensThrottle',
+    ),
+}
+
+# Orçamentos dos baldes de tokens por escopo ("N/periodo": capacidade N,
+# recarga de N tokens por período). O custo de cada endpoint fica na view.
+THROTTLE_ORCAMENTOS = {
+    'usuario': config('THROTTLE_USUARIO', default='300/min'),
+    'anonimo': config('THROTTLE_ANONIMO', default='60/min'),
+    'relatorios': config('THROTTLE_RELATORIOS', default='60/min'),
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Captura de perfil sob demanda (staff): cabeçalho X-Profile: 1 ou ?_profile=1
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=True, cast=bool)
+PROFILER_DIR = config('PROFILER_DIR', default=str(BASE_DIR / 'perfis'))
+PROFILER_MAX_CAPTURAS = config('PROFILER_MAX_CAPTURAS', default=50, cast=int)
+
+# Tracing dos serviços (spans em JSON Lines, ver `manage.py traces_lentos`)
+TRACING_ENABLED = config('TRACING_ENABLED', default=False, cast=bool)
+TRACING_FILE = config('TRACING_FILE', default=str(BASE_DIR / 'traces.jsonl'))
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=1.0, cast=float)
+TRACING_BATCH_SIZE = config('TRACING_BATCH_SIZE', default=200, cast=int)
+TRACING_FLUSH_INTERVAL = config('TRACING_FLUSH_INTERVAL', default=5.0, cast=float)
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://localhost:5173",
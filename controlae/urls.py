@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from core.views import TransacaoViewSet, CategoriaViewSet, ContaViewSet, UserRegisterView, MetaFinanceiraViewSet, LembreteViewSet, NotificacaoViewSet
+from core.views import PlanoParcelamentoViewSet, TransacaoRecorrenteViewSet, OrcamentoViewSet
 from core.views import IncentivoConclusaoCreateView, IncentivoConclusaoLiberarView, IncentivoEnemCreateView
-from core.views import RelatorioFinanceiroPDFView, DashboardDataView
+from core.views import RelatorioFinanceiroPDFView, DashboardDataView, ExportacaoView, SincronizacaoView
+from core.views import PerfilCapturaListView, PerfilCapturaDownloadView, MetricasView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -18,6 +20,9 @@ router.register(r'contas', ContaViewSet, basename='conta')
 router.register(r'metas', MetaFinanceiraViewSet, basename='meta')
 router.register(r'lembretes', LembreteViewSet, basename='lembrete')
 router.register(r'notificacoes', NotificacaoViewSet, basename='notificacao')
+router.register(r'planos', PlanoParcelamentoViewSet, basename='plano')
+router.register(r'recorrentes', TransacaoRecorrenteViewSet, basename='recorrente')
+router.register(r'orcamentos', OrcamentoViewSet, basename='orcamento')
 
 
 urlpatterns = [
@@ -34,4 +39,9 @@ urlpatterns = [
     path('api/incentivos/enem/', IncentivoEnemCreateView.as_view(), name='incentivo_enem_create'),
     path('api/relatorio/pdf/', RelatorioFinanceiroPDFView.as_view(), name='relatorio_pdf'),
     path('api/dashboard/', DashboardDataView.as_view(), name='dashboard_data'),
+    path('api/sync/', SincronizacaoView.as_view(), name='sincronizacao'),
+    path('api/exportar/<str:recurso>/', ExportacaoView.as_view(), name='exportacao'),
+    path('api/admin/metricas/', MetricasView.as_view(), name='metricas'),
+    path('api/admin/perfis/', PerfilCapturaListView.as_view(), name='perfil_captura_list'),
+    path('api/admin/perfis/<str:captura_id>/', PerfilCapturaDownloadView.as_view(), name='perfil_captura_download'),
 ]
\ No newline at end of file
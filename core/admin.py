@@ -1,15 +1,101 @@
-from django.contrib import admin
-from .models import Categoria, Conta, Transacao 
-from django.contrib.auth.models import User  
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from .models import Categoria, Conta, Transacao, TransacaoArquivada
+from django.contrib.auth.models import User
 from.models import PerfilAluno
+from .busca import buscar_transacoes
+from .services import marcar_transacoes_pagas, recategorizar_transacoes
 admin.site.register(PerfilAluno)
 
+# Acima disso a paginação mostra "N+" páginas em vez de contar tudo.
+LIMITE_CONTAGEM = 10000
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator que não faz COUNT(*) da tabela inteira: sem filtros usa a
+    estimativa do banco, e com filtros conta no máximo ``LIMITE_CONTAGEM``.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimativa = _estimar_linhas(queryset)
+            if estimativa is not None:
+                return estimativa
+        return queryset[:LIMITE_CONTAGEM].count()
+
+
+def _estimar_linhas(queryset):
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'sqlite':
+        return None
+    # MAX(id) sai do fim da árvore sem varrer a tabela; só superestima pelo
+    # número de linhas excluídas.
+    with conexao.cursor() as cursor:
+        cursor.execute(f'SELECT MAX(id) FROM "{queryset.model._meta.db_table}"')
+        return cursor.fetchone()[0] or 0
+
+
+class FiltroPorId(admin.SimpleListFilter):
+    """
+    Filtro por chave estrangeira que não lista todas as opções. O valor vem
+    da URL (os links das colunas da listagem) e só o item escolhido aparece.
+    """
+    modelo = None
+
+    def lookups(self, request, model_admin):
+        valor = self.value()
+        if valor and valor.isdigit():
+            objetos = self.modelo.objects.filter(pk=valor)
+            if not request.user.is_superuser and self.modelo is not User:
+                objetos = objetos.filter(usuario=request.user)
+            objeto = objetos.first()
+            if objeto is not None:
+                return [(valor, str(objeto))]
+        return []
+
+    def queryset(self, request, queryset):
+        valor = self.value()
+        if valor and valor.isdigit():
+            return queryset.filter(**{f'{self.parameter_name}_id': valor})
+        return queryset
+
+
+class FiltroCategoria(FiltroPorId):
+    title = 'categoria'
+    parameter_name = 'categoria'
+    modelo = Categoria
+
+
+class FiltroConta(FiltroPorId):
+    title = 'conta'
+    parameter_name = 'conta'
+    modelo = Conta
+
+
+class FiltroUsuario(FiltroPorId):
+    title = 'usuário'
+    parameter_name = 'usuario'
+    modelo = User
+
+
+class TransacaoActionForm(ActionForm):
+    categoria_id = forms.IntegerField(required=False, label='ID da categoria')
+
+
 class UserOwnedModelAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.usuario = request.user
         super().save_model(request, obj, form, change)
-    
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         if request.user.is_superuser:
@@ -20,22 +106,93 @@ class UserOwnedModelAdmin(admin.ModelAdmin):
 class CategoriaAdmin(UserOwnedModelAdmin):
     list_display = ('nome', 'tipo_categoria', 'usuario')
     list_filter = ('tipo_categoria',)
+    search_fields = ('nome',)
 
 @admin.register(Conta)
 class ContaAdmin(UserOwnedModelAdmin):
     list_display = ('nome', 'saldo_inicial', 'usuario')
+    search_fields = ('nome',)
 
 @admin.register(Transacao)
 class TransacaoAdmin(UserOwnedModelAdmin):
-    list_display = ('descricao', 'valor', 'data', 'tipo', 'pago', 'categoria', 'conta', 'parcelas')
+    list_display = ('descricao', 'valor', 'data', 'tipo', 'pago', 'categoria_link', 'conta_link', 'parcelas')
     list_editable = ('pago',)
-    list_filter = ('tipo', 'pago', 'categoria', 'conta', 'data')
+    list_filter = ('tipo', 'pago', 'data', FiltroCategoria, FiltroConta, FiltroUsuario)
+    list_select_related = ('categoria', 'conta')
     search_fields = ('descricao',)
+    search_help_text = "Palavras da descrição (busca por prefixo, sem acentos)."
     ordering = ('-data',)
-    
+    autocomplete_fields = ('categoria', 'conta')
+    raw_id_fields = ('usuario',)
+    readonly_fields = ('plano', 'numero_parcela', 'recorrente')
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    action_form = TransacaoActionForm
+    actions = ('marcar_como_pagas', 'recategorizar')
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "categoria":
             kwargs["queryset"] = Categoria.objects.filter(usuario=request.user)
         if db_field.name == "conta":
             kwargs["queryset"] = Conta.objects.filter(usuario=request.user)
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
\ No newline at end of file
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return buscar_transacoes(queryset, search_term), False
+
+    @admin.display(description='categoria', ordering='categoria__nome')
+    def categoria_link(self, obj):
+        return format_html('<a href="?categoria={}">{}</a>', obj.categoria_id, obj.categoria.nome)
+
+    @admin.display(description='conta', ordering='conta__nome')
+    def conta_link(self, obj):
+        return format_html('<a href="?conta={}">{}</a>', obj.conta_id, obj.conta.nome)
+
+    @admin.action(description='Marcar selecionadas como pagas')
+    def marcar_como_pagas(self, request, queryset):
+        total = marcar_transacoes_pagas(queryset)
+        self.message_user(request, f"{total} transações marcadas como pagas.", messages.SUCCESS)
+
+    @admin.action(description='Mudar categoria (informe o ID da categoria)')
+    def recategorizar(self, request, queryset):
+        categoria_id = request.POST.get('categoria_id')
+        categoria = Categoria.objects.filter(pk=categoria_id).first() if (categoria_id or '').isdigit() else None
+        if categoria is None:
+            self.message_user(request, "Informe o ID de uma categoria existente.", messages.ERROR)
+            return
+        if not request.user.is_superuser and categoria.usuario_id != request.user.id:
+            self.message_user(request, "Categoria de outro usuário.", messages.ERROR)
+            return
+
+        total = recategorizar_transacoes(queryset, categoria)
+        ignoradas = queryset.exclude(usuario_id=categoria.usuario_id).count()
+        mensagem = f"{total} transações movidas para {categoria.nome}."
+        if ignoradas:
+            mensagem += f" {ignoradas} de outros usuários foram ignoradas."
+        self.message_user(request, mensagem, messages.SUCCESS)
+
+
+@admin.register(TransacaoArquivada)
+class TransacaoArquivadaAdmin(UserOwnedModelAdmin):
+    """
+    Transações dos anos arquivados, só para consulta: a busca da listagem de
+    transações não as alcança, e elas não mudam mais.
+    """
+    list_display = ('descricao', 'valor', 'data', 'tipo', 'pago', 'categoria', 'conta', 'arquivada_em')
+    list_filter = ('tipo', 'data', FiltroCategoria, FiltroConta, FiltroUsuario)
+    list_select_related = ('categoria', 'conta')
+    search_fields = ('descricao',)
+    ordering = ('-data',)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -6,4 +6,15 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        import core.signals
\ No newline at end of file
+        import core.signals
+        from django.core import checks
+        from django.db.models.signals import post_migrate, pre_migrate
+
+        from core.arquivo import instalar_visao_historico, remover_visao_historico
+        from core.routers import verificar_cache_compartilhado
+
+        checks.register(verificar_cache_compartilhado, checks.Tags.caches)
+
+        # A visão do histórico sai durante as migrações e volta no final.
+        pre_migrate.connect(remover_visao_historico, sender=self)
+        post_migrate.connect(instalar_visao_historico, sender=self)
\ No newline at end of file
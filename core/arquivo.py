@@ -0,0 +1,216 @@
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .campos import em_centavos
+from .gatilhos_saldo import gatilhos_saldo_ativos
+from .models import Conta, ResumoAnual, Transacao, TransacaoArquivada, TransacaoHistorico
+from .saldos_mensais import efeito_transacao
+from .signals import registrar_escrita_em_lote
+from .tracing import rastreado, anotar
+
+VISAO_HISTORICO = 'core_transacao_historico'
+
+# Colunas copiadas de core_transacao para o arquivo (e lidas pela visão).
+CAMPOS_ARQUIVADOS = (
+    'id', 'usuario_id', 'categoria_id', 'conta_id', 'tipo', 'descricao', 'valor', 'data',
+    'parcelas', 'vencimento', 'pago', 'plano_id', 'numero_parcela', 'recorrente_id', 'impressao',
+)
+
+_COLUNAS = ', '.join(CAMPOS_ARQUIVADOS)
+
+SQL_INSTALAR = [
+    f"""
+    CREATE VIEW IF NOT EXISTS {VISAO_HISTORICO} AS
+    SELECT {_COLUNAS}, 0 AS arquivada FROM core_transacao
+    UNION ALL
+    SELECT {_COLUNAS}, 1 AS arquivada FROM core_transacaoarquivada
+    """,
+]
+
+SQL_REMOVER = [f"DROP VIEW IF EXISTS {VISAO_HISTORICO}"]
+
+
+def remover_visao_historico(using, **kwargs):
+    """
+    ``pre_migrate``: no SQLite, reconstruir ``core_transacao`` (o que toda
+    alteração de coluna faz) falha com uma visão apontando para ela.
+    """
+    with connections[using].cursor() as cursor:
+        for sql in SQL_REMOVER:
+            cursor.execute(sql)
+
+
+def instalar_visao_historico(using, **kwargs):
+    """``post_migrate``: recria a visão, se o arquivo já existe nesse ponto das migrações."""
+    conexao = connections[using]
+    if TransacaoArquivada._meta.db_table not in conexao.introspection.table_names():
+        return
+    with conexao.cursor() as cursor:
+        for sql in SQL_INSTALAR:
+            cursor.execute(sql)
+
+
+def ano_de_corte(hoje=None):
+    """Anos antes deste estão fechados e podem ir para o arquivo."""
+    hoje = hoje or timezone.localdate()
+    return hoje.year - settings.ARQUIVO_ANOS_QUENTES
+
+
+def arquivado_ate(usuario_id):
+    """Primeiro dia depois do último ano arquivado do usuário (``None`` sem arquivo)."""
+    ano = ResumoAnual.objects.filter(usuario_id=usuario_id).aggregate(ano=Max('ano'))['ano']
+    return None if ano is None else date(ano + 1, 1, 1)
+
+
+def modelo_do_periodo(usuario_id, inicio=None):
+    """
+    Modelo para ler as transações do usuário a partir de ``inicio``:
+    ``Transacao`` quando o período não alcança anos arquivados, senão
+    ``TransacaoHistorico``, a visão com as duas tabelas.
+    """
+    limite = arquivado_ate(usuario_id)
+    if limite is None or (inicio is not None and inicio >= limite):
+        return Transacao
+    anotar(arquivo=True)
+    return TransacaoHistorico
+
+
+def somar_pagas(usuario, filtros, tipo, agrupar_por=None):
+    """
+    Soma das transações pagas de ``tipo`` no período de ``filtros``
+    (``usuario``, ``data__gte``, ``data__lte``): um ``Decimal`` ou, com
+    ``agrupar_por`` (como ``'categoria__nome'``), linhas ``{campo, total}``
+    da maior para a menor.
+
+    Sem data inicial, os anos arquivados vêm de ``ResumoAnual`` e só a
+    tabela quente é lida; outros períodos que alcançam o arquivo leem a visão.
+    """
+    inicio, fim = filtros.get('data__gte'), filtros.get('data__lte')
+    limite = arquivado_ate(usuario.pk)
+    resumos = None
+    if limite is None or (inicio is not None and inicio >= limite):
+        transacoes = Transacao.objects
+    elif inicio is None and (fim is None or fim >= limite):
+        transacoes = Transacao.objects
+        resumos = ResumoAnual.objects.filter(usuario=usuario)
+    else:
+        transacoes = TransacaoHistorico.objects
+
+    consulta = transacoes.filter(**filtros, tipo=tipo, pago=True)
+    coluna = 'entradas' if tipo == 'entrada' else 'saidas'
+    if agrupar_por is None:
+        total = consulta.aggregate(total=Sum('valor'))['total'] or Decimal('0')
+        if resumos is not None:
+            total += resumos.aggregate(total=Sum(coluna))['total'] or Decimal('0')
+        return total
+
+    totais = defaultdict(Decimal)
+    partes = [consulta.values(agrupar_por).annotate(total=Sum('valor')).order_by()]
+    if resumos is not None:
+        partes.append(resumos.values(agrupar_por).annotate(total=Sum(coluna)).order_by())
+    for parte in partes:
+        for linha in parte:
+            if linha['total']:
+                totais[linha[agrupar_por]] += linha['total']
+    return [
+        {agrupar_por: chave, 'total': total}
+        for chave, total in sorted(totais.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+@rastreado()
+def arquivar_transacoes(ano=None, usuario_id=None, lote=None, pausa=0.0):
+    """
+    Move as transações pagas dos anos antes de ``ano`` (padrão:
+    ``ano_de_corte()``) para ``TransacaoArquivada``, em lotes de ``lote``.
+    Cada lote tem sua própria transação curta, então o banco não fica
+    travado para escrita durante todo o arquivamento, e ``pausa`` (segundos)
+    dá espaço para outras escritas entre os lotes. Pode ser interrompido e
+    rodado de novo.
+
+    Pendentes continuam na tabela quente porque ainda podem mudar, assim
+    como as transações ligadas a lembretes, notificações ou incentivos.
+    Retorna quantas foram movidas.
+    """
+    ano = ano or ano_de_corte()
+    lote = lote or settings.ARQUIVO_LOTE
+    candidatas = Transacao.objects.filter(
+        data__lt=date(ano, 1, 1),
+        pago=True,
+        lembrete__isnull=True,
+        notificacao__isnull=True,
+        incentivo__isnull=True,
+    )
+    if usuario_id is not None:
+        candidatas = candidatas.filter(usuario_id=usuario_id)
+
+    total = 0
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            linhas = list(candidatas.filter(id__gt=ultimo_id).order_by('id').values(*CAMPOS_ARQUIVADOS)[:lote])
+            if not linhas:
+                break
+            _mover(linhas)
+        total += len(linhas)
+        ultimo_id = linhas[-1]['id']
+        if pausa:
+            time.sleep(pausa)
+    anotar(arquivadas=total)
+    return total
+
+
+def _mover(linhas):
+    TransacaoArquivada.objects.bulk_create([TransacaoArquivada(**linha) for linha in linhas])
+    _somar_resumos(linhas)
+
+    # Sem signals: arquivar não é excluir. Checkpoints mensais, totais dos
+    # orçamentos e o índice de categorias continuam contando essas transações.
+    movidas = Transacao.objects.filter(id__in=[linha['id'] for linha in linhas])
+    movidas._raw_delete(movidas.db)
+    if gatilhos_saldo_ativos():
+        _devolver_saldos(linhas)
+
+    for usuario_id in {linha['usuario_id'] for linha in linhas}:
+        registrar_escrita_em_lote(Transacao, usuario_id)
+
+
+def _somar_resumos(linhas):
+    por_chave = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0])
+    for linha in linhas:
+        totais = por_chave[(linha['usuario_id'], linha['conta_id'], linha['categoria_id'], linha['data'].year)]
+        totais[0 if linha['tipo'] == 'entrada' else 1] += linha['valor']
+        totais[2] += 1
+
+    for (usuario_id, conta_id, categoria_id, ano), (entradas, saidas, quantidade) in sorted(por_chave.items()):
+        resumo = ResumoAnual.objects.filter(conta_id=conta_id, categoria_id=categoria_id, ano=ano)
+        somados = resumo.update(
+            entradas=F('entradas') + em_centavos(entradas),
+            saidas=F('saidas') + em_centavos(saidas),
+            quantidade=F('quantidade') + quantidade,
+        )
+        if not somados:
+            ResumoAnual.objects.create(
+                usuario_id=usuario_id, conta_id=conta_id, categoria_id=categoria_id, ano=ano,
+                entradas=entradas, saidas=saidas, quantidade=quantidade,
+            )
+
+
+def _devolver_saldos(linhas):
+    """
+    O trigger de DELETE tirou as transações movidas do saldo das contas;
+    arquivar não muda o saldo, então o efeito volta.
+    """
+    por_conta = defaultdict(Decimal)
+    for linha in linhas:
+        por_conta[linha['conta_id']] += efeito_transacao(linha['tipo'], linha['valor'])
+    for conta_id, efeito in por_conta.items():
+        if efeito:
+            Conta.objects.filter(id=conta_id).update(saldo_atual=F('saldo_atual') + em_centavos(efeito))
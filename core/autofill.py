@@ -2,11 +2,51 @@ from .models import Transacao, Categoria, Conta
 from datetime import date
 from dateutil.relativedelta import relativedelta 
 
+VALOR_MATRICULA = 200.00
+VALOR_MENSAL = 200.00
+MESES_FREQUENCIA = 9
+MES_INICIO_PAGAMENTO = 3
+
+
+def cronograma_pede_meia(serie_aluno, hoje=None):
+    """
+    Parcelas do Pé-de-Meia do ano de ``hoje`` que ainda serão lançadas.
+
+    Cada item tem ``parcela`` ('matricula' ou 'frequencia'), ``data``,
+    ``valor``, ``descricao`` e ``pago``.
+    """
+    hoje = hoje or date.today()
+    ano_base = hoje.year
+    data_matricula = date(ano_base, MES_INICIO_PAGAMENTO, 30)
+
+    parcelas = [{
+        'parcela': 'matricula',
+        'data': data_matricula if data_matricula >= hoje else hoje,
+        'valor': VALOR_MATRICULA,
+        'descricao': f"Pé-de-Meia: Incentivo Matrícula - {serie_aluno}º Ano",
+        'pago': True,
+    }]
+
+    data_inicio_mensal = date(ano_base, MES_INICIO_PAGAMENTO, 1)
+
+    for i in range(MESES_FREQUENCIA):
+        data_recebimento = data_inicio_mensal + relativedelta(months=i)
+        
+        if data_recebimento.month >= hoje.month and data_recebimento.year == hoje.year:
+            
+            data_efetiva = data_recebimento.replace(day=28) 
+            parcelas.append({
+                'parcela': 'frequencia',
+                'data': data_efetiva,
+                'valor': VALOR_MENSAL,
+                'descricao': f"Pé-de-Meia: Frequência - {data_efetiva.strftime('%B/%Y')}",
+                'pago': False,
+            })
+
+    return parcelas
+
+
 def automatizar_recebimentos_pede_meia(user, serie_aluno):
-    
-    VALOR_MATRICULA = 200.00
-    VALOR_MENSAL = 200.00
-    MESES_FREQUENCIA = 9
 
     conta_padrao = Conta.objects.filter(usuario=user).first()
     if not conta_padrao:
@@ -18,40 +58,16 @@ def automatizar_recebimentos_pede_meia(user, serie_aluno):
         defaults={'tipo_categoria': 'entrada'} 
     )
 
-    hoje = date.today()
-    mes_inicio_pagamento = 3
-    ano_base = hoje.year
-    data_matricula = date(ano_base, mes_inicio_pagamento, 30)
-    
-    Transacao.objects.create(
-        usuario=user,
-        conta=conta_padrao,
-        categoria=categoria_recebimento,
-        tipo='entrada',
-        valor=VALOR_MATRICULA,
-        data=data_matricula if data_matricula >= hoje else hoje, 
-        descricao=f"Pé-de-Meia: Incentivo Matrícula - {serie_aluno}º Ano",
-        pago=True 
-    )
-
-    data_inicio_mensal = date(ano_base, mes_inicio_pagamento, 1)
-    
-    for i in range(MESES_FREQUENCIA):
-        data_recebimento = data_inicio_mensal + relativedelta(months=i)
-        
-        if data_recebimento.month >= hoje.month and data_recebimento.year == hoje.year:
-            
-            data_efetiva = data_recebimento.replace(day=28) 
-            
-            Transacao.objects.create(
-                usuario=user,
-                conta=conta_padrao,
-                categoria=categoria_recebimento,
-                tipo='entrada',
-                valor=VALOR_MENSAL,
-                data=data_efetiva,
-                descricao=f"Pé-de-Meia: Frequência - {data_efetiva.strftime('%B/%Y')}",
-                pago=False
-            )
+    for parcela in cronograma_pede_meia(serie_aluno):
+        Transacao.objects.create(
+            usuario=user,
+            conta=conta_padrao,
+            categoria=categoria_recebimento,
+            tipo='entrada',
+            valor=parcela['valor'],
+            data=parcela['data'],
+            descricao=parcela['descricao'],
+            pago=parcela['pago']
+        )
             
-    return True
\ No newline at end of file
+    return True
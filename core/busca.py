@@ -0,0 +1,88 @@
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+TABELA_FTS = 'core_transacao_fts'
+
+# Índice FTS5 de conteúdo externo: guarda só os termos, o texto continua em
+# core_transacao. Os triggers o mantêm em dia em qualquer escrita, inclusive
+# bulk_create e UPDATEs em lote.
+SQL_INSTALAR = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        descricao, content='core_transacao', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF descricao ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+]
+
+SQL_REMOVER = [
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_au",
+    f"DROP TABLE IF EXISTS {TABELA_FTS}",
+]
+
+
+def instalar_busca_textual(schema_editor):
+    """
+    Cria (ou recria depois de uma reconstrução da tabela pelo SQLite) o
+    índice de busca das descrições. Em outros bancos não faz nada.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_INSTALAR:
+        schema_editor.execute(sql)
+
+
+def remover_busca_textual(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_REMOVER:
+        schema_editor.execute(sql)
+
+
+def termo_fts(texto):
+    """
+    Converte o texto digitado em uma consulta FTS5: cada palavra vira um
+    prefixo entre aspas e todas precisam aparecer ("uber mar" casa com
+    "Uber março").
+    """
+    palavras = re.findall(r'\w+', texto or '')
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar_transacoes(queryset, texto):
+    """
+    Filtra ``queryset`` pelas transações cuja descrição contém todas as
+    palavras de ``texto``, pelo índice FTS5. Sem SQLite, usa ``icontains``.
+    """
+    if connections[queryset.db].vendor != 'sqlite':
+        for palavra in re.findall(r'\w+', texto or ''):
+            queryset = queryset.filter(descricao__icontains=palavra)
+        return queryset
+
+    consulta = termo_fts(texto)
+    if not consulta:
+        return queryset
+    return queryset.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s", [consulta]
+    ))
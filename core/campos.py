@@ -0,0 +1,53 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models
+from django.db.models import Value
+
+CENTAVO = Decimal('0.01')
+
+
+def para_centavos(valor):
+    """``Decimal('12.34')`` -> ``1234``, arredondando meio centavo para cima."""
+    return int(valor.quantize(CENTAVO, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def de_centavos(centavos):
+    return Decimal(int(round(centavos))).scaleb(-2)
+
+
+class CentavosField(models.DecimalField):
+    """
+    Dinheiro em centavos inteiros (``BIGINT``) no banco e ``Decimal`` com duas
+    casas no Python. ``SUM`` no banco é exato e não passa por ``REAL``;
+    serializers, formulários e validação continuam os de um ``DecimalField``.
+
+    Valores soltos em expressões (``F('saldo_atual') + delta``) precisam ir
+    pelo ``em_centavos()``: um ``Value(Decimal)`` sozinho vai em reais.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs['decimal_places'] = 2
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['decimal_places']
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BigIntegerField'
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else de_centavos(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return para_centavos(value)
+
+
+def em_centavos(valor):
+    """``Value`` de dinheiro para somar ou comparar com colunas ``CentavosField``."""
+    return Value(valor, output_field=CentavosField(max_digits=12))
@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Transacao, TermoCategoria
+
+TAMANHO_MINIMO_TERMO = 3
+TAMANHO_MAXIMO_TERMO = 40
+PALAVRAS_IGNORADAS = {'das', 'dos', 'para', 'com', 'pelo', 'pela', 'uma', 'por', 'sem', 'que'}
+LOTE_TERMOS = 500
+
+
+def termos(descricao):
+    """
+    Palavras da descrição que servem para sugerir categoria: sem acentos, em
+    minúsculas, sem números e sem palavras curtas ("Uber Março 2/3" vira
+    ``['uber', 'marco']``).
+    """
+    texto = unicodedata.normalize('NFKD', descricao or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    vistos = []
+    for palavra in re.findall(r'[^\W\d_]+', texto):
+        palavra = palavra[:TAMANHO_MAXIMO_TERMO]
+        if len(palavra) >= TAMANHO_MINIMO_TERMO and palavra not in PALAVRAS_IGNORADAS and palavra not in vistos:
+            vistos.append(palavra)
+    return vistos
+
+
+def contar_pares(pares):
+    """Soma ``(descricao, categoria_id, sinal)`` em ``{(termo, categoria_id): delta}``."""
+    deltas = Counter()
+    for descricao, categoria_id, sinal in pares:
+        if categoria_id is None:
+            continue
+        for termo in termos(descricao):
+            deltas[(termo, categoria_id)] += sinal
+    return {chave: delta for chave, delta in deltas.items() if delta}
+
+
+def contar_termos(transacoes):
+    """Contagem de ``(usuario_id, termo, categoria_id)`` nas transações do queryset."""
+    contagens = Counter()
+    linhas = transacoes.values_list('usuario_id', 'descricao', 'categoria_id').order_by()
+    for usuario_id, descricao, categoria_id in linhas.iterator(chunk_size=2000):
+        for termo in termos(descricao):
+            contagens[(usuario_id, termo, categoria_id)] += 1
+    return contagens
+
+
+class IndiceCategorias:
+    """
+    Índices ``termo -> {categoria_id: contagem}`` dos usuários usados mais
+    recentemente, em memória do processo. Guarda no máximo ``maximo``
+    usuários; os demais são lidos de ``TermoCategoria`` quando pedidos.
+
+    Escritas de outros processos não chegam aqui: cada índice é relido da
+    tabela depois de ``ttl`` segundos.
+    """
+
+    def __init__(self, maximo=None, ttl=None):
+        self._maximo = maximo
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._usuarios = OrderedDict()
+
+    @property
+    def maximo(self):
+        return self._maximo or settings.SUGESTAO_CATEGORIA_MAX_USUARIOS
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else settings.SUGESTAO_CATEGORIA_TTL
+
+    def obter(self, usuario_id):
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._usuarios.get(usuario_id)
+            if entrada is not None and agora - entrada[0] < self.ttl:
+                self._usuarios.move_to_end(usuario_id)
+                return entrada[1]
+
+        indice = defaultdict(dict)
+        linhas = TermoCategoria.objects.filter(usuario_id=usuario_id, contagem__gt=0).values_list(
+            'termo', 'categoria_id', 'contagem'
+        )
+        for termo, categoria_id, contagem in linhas:
+            indice[termo][categoria_id] = contagem
+        indice = dict(indice)
+
+        with self._lock:
+            self._usuarios[usuario_id] = (agora, indice)
+            self._usuarios.move_to_end(usuario_id)
+            while len(self._usuarios) > self.maximo:
+                self._usuarios.popitem(last=False)
+        return indice
+
+    def aplicar(self, usuario_id, deltas):
+        """Soma ``deltas`` ao índice do usuário, se ele estiver em memória."""
+        with self._lock:
+            entrada = self._usuarios.get(usuario_id)
+            if entrada is None:
+                return
+            indice = entrada[1]
+            for (termo, categoria_id), delta in deltas.items():
+                contagens = indice.setdefault(termo, {})
+                contagem = contagens.get(categoria_id, 0) + delta
+                if contagem > 0:
+                    contagens[categoria_id] = contagem
+                else:
+                    contagens.pop(categoria_id, None)
+                    if not contagens:
+                        del indice[termo]
+
+    def limpar(self):
+        with self._lock:
+            self._usuarios.clear()
+
+    def __contains__(self, usuario_id):
+        return usuario_id in self._usuarios
+
+    def __len__(self):
+        return len(self._usuarios)
+
+
+indice = IndiceCategorias()
+
+
+def _persistir(usuario_id, deltas):
+    termos_alterados = sorted({termo for termo, _ in deltas})
+    existentes = {}
+    for inicio in range(0, len(termos_alterados), LOTE_TERMOS):
+        for linha in TermoCategoria.objects.filter(
+            usuario_id=usuario_id, termo__in=termos_alterados[inicio:inicio + LOTE_TERMOS]
+        ):
+            existentes[(linha.termo, linha.categoria_id)] = linha
+
+    alterados = []
+    novos = []
+    for (termo, categoria_id), delta in deltas.items():
+        linha = existentes.get((termo, categoria_id))
+        if linha is not None:
+            linha.contagem = max(0, linha.contagem + delta)
+            alterados.append(linha)
+        elif delta > 0:
+            novos.append(TermoCategoria(
+                usuario_id=usuario_id, termo=termo, categoria_id=categoria_id, contagem=delta
+            ))
+    TermoCategoria.objects.bulk_update(alterados, ['contagem'], batch_size=LOTE_TERMOS)
+    TermoCategoria.objects.bulk_create(novos, batch_size=LOTE_TERMOS)
+
+
+def atualizar_indice(usuario_id, pares):
+    """
+    Registra ``(descricao, categoria_id, sinal)`` de transações criadas
+    (``sinal=1``) ou removidas/alteradas (``sinal=-1``) na tabela e, depois
+    do commit, no índice em memória.
+    """
+    deltas = contar_pares(pares)
+    if usuario_id is None or not deltas:
+        return
+    with transaction.atomic():
+        _persistir(usuario_id, deltas)
+        transaction.on_commit(lambda: indice.aplicar(usuario_id, deltas))
+
+
+def sugerir_categorias(usuario_id, descricao, limite=3, categorias=None):
+    """
+    Categorias mais usadas pelo usuário para as palavras de ``descricao``,
+    como ``[(categoria_id, confianca)]`` da mais provável para a menos.
+
+    Cada palavra conhecida vota nas categorias em que apareceu, na
+    proporção das vezes; a confiança é a fração dos votos. Palavras nunca
+    vistas não contam. ``categorias``, se dado, restringe o ranking a esses
+    ids antes de aplicar ``limite``.
+    """
+    chaves = termos(descricao)
+    if not chaves:
+        return []
+    indice_usuario = indice.obter(usuario_id)
+
+    votos = defaultdict(float)
+    conhecidos = 0
+    for termo in chaves:
+        contagens = indice_usuario.get(termo)
+        if not contagens:
+            continue
+        total = sum(contagens.values())
+        conhecidos += 1
+        for categoria_id, contagem in contagens.items():
+            votos[categoria_id] += contagem / total
+    if not conhecidos:
+        return []
+
+    if categorias is not None:
+        votos = {categoria_id: voto for categoria_id, voto in votos.items() if categoria_id in categorias}
+    ranking = sorted(votos.items(), key=lambda item: (-item[1], item[0]))[:limite]
+    return [(categoria_id, round(voto / conhecidos, 2)) for categoria_id, voto in ranking]
+
+
+def reconstruir_indice_categorias():
+    """Recalcula ``TermoCategoria`` de todos os usuários a partir das transações."""
+    contagens = contar_termos(Transacao.objects.all())
+    with transaction.atomic():
+        TermoCategoria.objects.all().delete()
+        TermoCategoria.objects.bulk_create(
+            [
+                TermoCategoria(usuario_id=usuario_id, termo=termo, categoria_id=categoria_id, contagem=contagem)
+                for (usuario_id, termo, categoria_id), contagem in contagens.items()
+            ],
+            batch_size=1000,
+        )
+        transaction.on_commit(indice.limpar)
+    return len(contagens)
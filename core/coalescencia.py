@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .metricas import incrementar
+from .versoes import chave_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: só coalesce dentro do processo.
+    fcntl = None
+
+
+class _Voo:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+_voos = {}
+_trava_voos = threading.Lock()
+
+
+def chave_coalescencia(endpoint, usuario, escopos, *parametros):
+    """Chave de (usuário, endpoint, parâmetros, estado dos dados do usuário)."""
+    return chave_cache(f'coalescencia:{endpoint}', usuario.pk, escopos, timezone.localdate(), *parametros)
+
+
+def executar_uma_vez(chave, calcular, endpoint=''):
+    """
+    Executa ``calcular()`` uma única vez para requisições simultâneas com a
+    mesma ``chave`` e entrega o mesmo resultado a todas.
+
+    Dentro do processo, as threads que chegam depois esperam a primeira.
+    Entre processos, quem chega depois espera uma trava de arquivo e lê o
+    resultado gravado por quem estava calculando.
+    """
+    with _trava_voos:
+        voo = _voos.get(chave)
+        lider = voo is None
+        if lider:
+            voo = _voos[chave] = _Voo()
+
+    if not lider:
+        if not voo.evento.wait(settings.COALESCENCIA_ESPERA_SEGUNDOS):
+            return calcular()
+        if voo.erro is not None:
+            raise voo.erro
+        incrementar('coalescencia_economizadas', endpoint=endpoint, origem='processo')
+        return voo.resultado
+
+    try:
+        voo.resultado = _calcular_entre_processos(chave, calcular, endpoint)
+        return voo.resultado
+    except Exception as e:
+        voo.erro = e
+        raise
+    finally:
+        with _trava_voos:
+            _voos.pop(chave, None)
+        voo.evento.set()
+
+
+def _caminhos(chave):
+    diretorio = Path(settings.COALESCENCIA_DIR)
+    resumo = hashlib.sha256(chave.encode('utf-8')).hexdigest()
+    # Uma trava por chave: cálculos de chaves diferentes não esperam um pelo outro.
+    return diretorio, diretorio / f'{resumo}.lock', diretorio / f'{resumo}.resultado'
+
+
+def _travar(arquivo, limite):
+    intervalo = 0.02
+    while True:
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(intervalo)
+            intervalo = min(intervalo * 2, 0.2)
+
+
+def _calcular_entre_processos(chave, calcular, endpoint):
+    if fcntl is None or not settings.COALESCENCIA_DIR:
+        return calcular()
+
+    diretorio, caminho_trava, caminho_resultado = _caminhos(chave)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    inicio = time.time()
+
+    with open(caminho_trava, 'a+b') as trava:
+        if not _travar(trava, time.monotonic() + settings.COALESCENCIA_ESPERA_SEGUNDOS):
+            return calcular()
+        try:
+            # Marca o uso da trava para ``limpar_arquivos``.
+            os.utime(caminho_trava)
+            # Gravado depois que chegamos: outro processo calculou enquanto esperávamos.
+            try:
+                if caminho_resultado.stat().st_mtime >= inicio:
+                    with open(caminho_resultado, 'rb') as arquivo:
+                        resultado = pickle.load(arquivo)
+                    incrementar('coalescencia_economizadas', endpoint=endpoint, origem='arquivo')
+                    return resultado
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+
+            resultado = calcular()
+            temporario = caminho_resultado.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temporario, 'wb') as arquivo:
+                pickle.dump(resultado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, caminho_resultado)
+            return resultado
+        finally:
+            fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+
+def limpar_arquivos(idade_segundos=3600):
+    """
+    Remove travas e resultados de ``COALESCENCIA_DIR`` sem uso há
+    ``idade_segundos``. Fica fora das requisições (``manage.py
+    limpar_coalescencia``) para não varrer o diretório a cada cálculo.
+
+    Uma trava só sai se ninguém a segura. Se outro processo já a tinha
+    aberto, ele e o próximo podem calcular ao mesmo tempo uma vez, o que
+    só desperdiça o cálculo: resultados são gravados com ``os.replace``.
+    """
+    diretorio = Path(settings.COALESCENCIA_DIR) if settings.COALESCENCIA_DIR else None
+    if diretorio is None or not diretorio.is_dir():
+        return 0
+
+    limite = time.time() - max(idade_segundos, settings.COALESCENCIA_ESPERA_SEGUNDOS)
+    removidos = 0
+    for caminho in diretorio.iterdir():
+        try:
+            if caminho.stat().st_mtime >= limite:
+                continue
+            if caminho.suffix == '.lock' and fcntl is not None:
+                with open(caminho, 'a+b') as trava:
+                    try:
+                        fcntl.flock(trava.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    caminho.unlink()
+            else:
+                caminho.unlink()
+            removidos += 1
+        except FileNotFoundError:
+            pass
+    return removidos
@@ -0,0 +1,69 @@
+from collections import Counter
+
+from django.db.models import Count, Max, Min
+
+from .models import Transacao
+
+LOTE_SONDAGEM = 500
+
+
+def contagem_existente(impressoes):
+    """
+    Quantas transações já gravadas têm cada impressão, com uma consulta
+    agrupada pelo índice de ``impressao`` a cada ``LOTE_SONDAGEM`` impressões
+    distintas (e não uma por linha).
+    """
+    distintas = sorted(set(impressoes))
+    existentes = Counter()
+    for inicio in range(0, len(distintas), LOTE_SONDAGEM):
+        existentes.update(dict(
+            Transacao.objects.filter(impressao__in=distintas[inicio:inicio + LOTE_SONDAGEM])
+            .values('impressao')
+            .annotate(quantidade=Count('id'))
+            .values_list('impressao', 'quantidade')
+            .order_by()
+        ))
+    return existentes
+
+
+def indices_duplicados(impressoes):
+    """
+    Posições de ``impressoes`` que repetem transações já gravadas.
+
+    Se já existem ``n`` transações com uma impressão, só as ``n`` primeiras
+    ocorrências contam como repetidas: reimportar um extrato com dois lanches
+    iguais no mesmo dia não lança nenhum, e um terceiro lanche novo entra.
+    """
+    restantes = contagem_existente(impressoes)
+    duplicados = []
+    for posicao, impressao in enumerate(impressoes):
+        if restantes[impressao] > 0:
+            restantes[impressao] -= 1
+            duplicados.append(posicao)
+    return duplicados
+
+
+def grupos_duplicados(usuario_id=None, minimo=2):
+    """
+    Grupos de transações com a mesma impressão, em uma única consulta
+    agrupada: ``impressao``, ``quantidade``, ``primeira``/``ultima`` (ids) e
+    os dados comuns do grupo. Maiores grupos primeiro.
+    """
+    transacoes = Transacao.objects.filter(impressao__isnull=False)
+    if usuario_id is not None:
+        transacoes = transacoes.filter(usuario_id=usuario_id)
+    return (
+        transacoes.values('impressao')
+        .annotate(
+            quantidade=Count('id'),
+            primeira=Min('id'),
+            ultima=Max('id'),
+            usuario_id=Min('usuario_id'),
+            conta_id=Min('conta_id'),
+            data=Min('data'),
+            valor=Min('valor'),
+            descricao=Min('descricao'),
+        )
+        .filter(quantidade__gte=minimo)
+        .order_by('-quantidade', 'data')
+    )
@@ -0,0 +1,138 @@
+import csv
+import json
+import zlib
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+
+from .models import Transacao, Conta, Categoria, MetaFinanceira
+from .routers import ler_da_replica
+from .arquivo import modelo_do_periodo
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# recurso -> (modelo, campos exportados, campo de data, campo de conta)
+RECURSOS = {
+    'transacoes': (
+        Transacao,
+        ('id', 'data', 'tipo', 'descricao', 'valor', 'pago', 'vencimento',
+         'conta_id', 'conta__nome', 'categoria_id', 'categoria__nome'),
+        'data',
+        'conta_id',
+    ),
+    'contas': (
+        Conta,
+        ('id', 'nome', 'saldo_inicial', 'saldo_atual'),
+        None,
+        'id',
+    ),
+    'categorias': (
+        Categoria,
+        ('id', 'nome', 'tipo_categoria'),
+        None,
+        None,
+    ),
+    'metas': (
+        MetaFinanceira,
+        ('id', 'nome', 'valor_alvo', 'data_alvo', 'ativa', 'conta_vinculada_id'),
+        'data_alvo',
+        'conta_vinculada_id',
+    ),
+}
+
+
+class ExportacaoInvalidaError(Exception):
+    pass
+
+
+class _Eco:
+    """Arquivo falso para o ``csv.writer``: devolve a linha em vez de guardar."""
+
+    def write(self, valor):
+        return valor
+
+
+def _json_padrao(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def consulta_exportacao(usuario, recurso, from_date=None, to_date=None, conta_id=None):
+    """Queryset ``values_list`` do recurso já filtrado, e os nomes das colunas."""
+    if recurso not in RECURSOS:
+        raise ExportacaoInvalidaError(f"Recurso deve ser um de: {', '.join(RECURSOS)}.")
+
+    modelo, campos, campo_data, campo_conta = RECURSOS[recurso]
+    if modelo is Transacao:
+        modelo = modelo_do_periodo(usuario.pk, from_date)
+    filtros = {'usuario': usuario}
+    if from_date or to_date:
+        if campo_data is None:
+            raise ExportacaoInvalidaError(f"'{recurso}' não aceita filtro de data.")
+        if from_date:
+            filtros[f'{campo_data}__gte'] = from_date
+        if to_date:
+            filtros[f'{campo_data}__lte'] = to_date
+    if conta_id is not None:
+        if campo_conta is None:
+            raise ExportacaoInvalidaError(f"'{recurso}' não aceita filtro de conta.")
+        filtros[campo_conta] = conta_id
+
+    with ler_da_replica(usuario) as banco:
+        queryset = modelo.objects.using(banco).filter(**filtros).order_by('id').values_list(*campos)
+    return queryset, campos
+
+
+def _linhas(queryset, campos, formato):
+    chunk_size = settings.EXPORTACAO_CHUNK_SIZE
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(campos)
+        for linha in queryset.iterator(chunk_size=chunk_size):
+            yield escritor.writerow(linha)
+    else:
+        for linha in queryset.iterator(chunk_size=chunk_size):
+            yield json.dumps(dict(zip(campos, linha)), default=_json_padrao, ensure_ascii=False) + '\n'
+
+
+def gerar_exportacao(queryset, campos, formato='csv', comprimir=False):
+    """
+    Gera o arquivo em blocos de bytes de ~``EXPORTACAO_BUFFER_BYTES``.
+
+    As linhas vêm do banco em lotes com ``iterator``; nada além do bloco
+    atual fica em memória, com ou sem compressão gzip.
+    """
+    if formato not in FORMATOS:
+        raise ExportacaoInvalidaError(f"Formato deve ser um de: {', '.join(FORMATOS)}.")
+
+    limite = settings.EXPORTACAO_BUFFER_BYTES
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+    buffer = []
+    tamanho = 0
+
+    def descarregar():
+        dados = ''.join(buffer).encode('utf-8')
+        buffer.clear()
+        return compressor.compress(dados) if compressor else dados
+
+    for texto in _linhas(queryset, campos, formato):
+        buffer.append(texto)
+        tamanho += len(texto)
+        if tamanho >= limite:
+            tamanho = 0
+            bloco = descarregar()
+            if bloco:
+                yield bloco
+
+    bloco = descarregar()
+    if compressor:
+        bloco += compressor.flush()
+    if bloco:
+        yield bloco
@@ -0,0 +1,108 @@
+from django.db import connections, router
+
+from .models import Transacao
+
+GATILHOS = ('core_transacao_saldo_ai', 'core_transacao_saldo_au', 'core_transacao_saldo_ad')
+
+
+def _efeito(linha):
+    """
+    Mesma regra de ``efeito_no_saldo``: parcelas pendentes não contam. Os
+    valores estão em centavos, então a soma é inteira e exata.
+    """
+    return (
+        f"(CASE WHEN {linha}.plano_id IS NOT NULL AND NOT {linha}.pago THEN 0 "
+        f"WHEN {linha}.tipo = 'saida' THEN -{linha}.valor ELSE {linha}.valor END)"
+    )
+
+
+def _somar(conta_id, efeito):
+    # A conta também recebe um seq novo, como no save() de um Sincronizavel.
+    return f"""
+        UPDATE core_sequenciausuario SET valor = valor + 1
+        WHERE usuario_id = (SELECT usuario_id FROM core_conta WHERE id = {conta_id}) AND {efeito} <> 0;
+        UPDATE core_conta SET
+            saldo_atual = saldo_atual + {efeito},
+            seq = COALESCE(
+                (SELECT valor FROM core_sequenciausuario WHERE usuario_id = core_conta.usuario_id), seq
+            )
+        WHERE id = {conta_id} AND {efeito} <> 0;
+    """
+
+
+SQL_INSTALAR = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ai AFTER INSERT ON core_transacao
+    WHEN {_efeito('new')} <> 0
+    BEGIN
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ad AFTER DELETE ON core_transacao
+    WHEN {_efeito('old')} <> 0
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_au
+    AFTER UPDATE OF conta_id, tipo, valor, pago, plano_id ON core_transacao
+    WHEN {_efeito('old')} <> {_efeito('new')}
+        OR (old.conta_id IS NOT new.conta_id AND {_efeito('new')} <> 0)
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+]
+
+SQL_REMOVER = [f"DROP TRIGGER IF EXISTS {nome}" for nome in GATILHOS]
+
+
+def instalar_gatilhos_saldo(schema_editor):
+    """
+    Cria (ou recria depois de uma reconstrução da tabela pelo SQLite) os
+    triggers que mantêm ``Conta.saldo_atual`` a cada INSERT, UPDATE e DELETE
+    em ``core_transacao``, inclusive ``bulk_create`` e UPDATEs em lote. Em
+    outros bancos não faz nada e o saldo continua com os signals.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_INSTALAR:
+        schema_editor.execute(sql)
+    esquecer_deteccao(schema_editor.connection)
+
+
+def remover_gatilhos_saldo(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_REMOVER:
+        schema_editor.execute(sql)
+    esquecer_deteccao(schema_editor.connection)
+
+
+def esquecer_deteccao(conexao):
+    conexao.gatilhos_saldo_detectados = None
+
+
+def gatilhos_saldo_ativos(using=None):
+    """
+    Se o banco mantém o saldo pelos triggers. Nesse caso, signals e
+    gravações em lote não devem somar os efeitos no saldo de novo.
+    Consultado uma vez por conexão.
+    """
+    conexao = connections[using or router.db_for_write(Transacao)]
+    if conexao.vendor != 'sqlite':
+        return False
+    conexao.ensure_connection()
+    detectados = getattr(conexao, 'gatilhos_saldo_detectados', None)
+    if detectados is None or detectados[0] is not conexao.connection:
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                GATILHOS,
+            )
+            detectados = (conexao.connection, cursor.fetchone()[0] == len(GATILHOS))
+        conexao.gatilhos_saldo_detectados = detectados
+    return detectados[1]
@@ -0,0 +1,140 @@
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ChaveIdempotencia
+
+CABECALHO = 'Idempotency-Key'
+TAMANHO_MAXIMO_CHAVE = 255
+
+
+def hash_requisicao(request):
+    corpo = json.dumps(request.data, sort_keys=True, default=str)
+    conteudo = f"{request.method}\n{request.path}\n{corpo}"
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def _reservar(usuario, chave, hash_atual):
+    """Cria o registro em processamento; retorna None se a chave já existe."""
+    try:
+        with transaction.atomic():
+            return ChaveIdempotencia.objects.create(
+                usuario=usuario,
+                chave=chave,
+                hash_requisicao=hash_atual,
+                expira_em=timezone.now() + timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS),
+            )
+    except IntegrityError:
+        return None
+
+
+def _replay(registro):
+    response = Response(registro.resposta, status=registro.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _aguardar_ou_reservar(usuario, chave, hash_atual):
+    """
+    Retorna ``(registro_reservado, resposta)``: ou esta requisição ficou com a
+    chave, ou já existe uma resposta (gravada ou de erro) para devolver.
+    """
+    limite = time.monotonic() + settings.IDEMPOTENCIA_ESPERA_SEGUNDOS
+    intervalo = 0.05
+    while True:
+        registro = _reservar(usuario, chave, hash_atual)
+        if registro is not None:
+            return registro, None
+
+        existente = ChaveIdempotencia.objects.filter(usuario=usuario, chave=chave).first()
+        if existente is None:
+            # A primeira requisição falhou e liberou a chave.
+            continue
+
+        agora = timezone.now()
+        abandonada = (
+            not existente.concluida
+            and existente.criada_em < agora - timedelta(seconds=settings.IDEMPOTENCIA_ABANDONO_SEGUNDOS)
+        )
+        if existente.expira_em <= agora or abandonada:
+            ChaveIdempotencia.objects.filter(pk=existente.pk, criada_em=existente.criada_em).delete()
+            continue
+
+        if existente.hash_requisicao != hash_atual:
+            return None, Response(
+                {"detail": f"{CABECALHO} já usada com outra requisição."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if existente.concluida:
+            return None, _replay(existente)
+
+        if time.monotonic() >= limite:
+            return None, Response(
+                {"detail": "Requisição com a mesma chave ainda em processamento."},
+                status=status.HTTP_409_CONFLICT
+            )
+        time.sleep(intervalo)
+        intervalo = min(intervalo * 2, 0.5)
+
+
+def idempotente(view_func):
+    """
+    Torna um método POST de view idempotente pelo cabeçalho ``Idempotency-Key``.
+
+    A primeira requisição com a chave executa a view e grava a resposta;
+    repetições com o mesmo corpo recebem a resposta gravada, e repetições
+    concorrentes esperam a primeira terminar. Respostas 5xx não são gravadas,
+    então o cliente pode tentar de novo com a mesma chave.
+    """
+    @functools.wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        chave = request.headers.get(CABECALHO)
+        if not chave:
+            return view_func(self, request, *args, **kwargs)
+        if len(chave) > TAMANHO_MAXIMO_CHAVE:
+            return Response(
+                {"detail": f"{CABECALHO} deve ter no máximo {TAMANHO_MAXIMO_CHAVE} caracteres."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        registro, resposta = _aguardar_ou_reservar(request.user, chave, hash_requisicao(request))
+        if resposta is not None:
+            return resposta
+
+        try:
+            response = view_func(self, request, *args, **kwargs)
+        except BaseException:
+            registro.delete()
+            raise
+
+        if response.status_code >= 500:
+            registro.delete()
+        else:
+            registro.status_code = response.status_code
+            registro.resposta = response.data
+            registro.concluida = True
+            registro.save(update_fields=['status_code', 'resposta', 'concluida'])
+        return response
+
+    return wrapper
+
+
+def purgar_chaves_expiradas(lote=1000):
+    """Remove chaves expiradas em lotes curtos para não segurar o lock de escrita."""
+    removidas = 0
+    while True:
+        ids = list(
+            ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now())
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return removidas
+        removidas += ChaveIdempotencia.objects.filter(id__in=ids).delete()[0]
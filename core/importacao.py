@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .campos import em_centavos
+from .models import Transacao, Categoria, Conta, SequenciaUsuario, impressao_transacao
+from .saldos_mensais import efeito_transacao, aplicar_movimentos_mensais
+from .orcamentos import aplicar_gastos, movimentos_de_gasto
+from .categorizacao import atualizar_indice, sugerir_categorias
+from .duplicatas import indices_duplicados
+from .signals import registrar_escrita_em_lote
+from .gatilhos_saldo import gatilhos_saldo_ativos
+from .tracing import rastreado, anotar
+
+MAX_LINHAS_NA_MENSAGEM = 20
+
+
+class ImportacaoInvalidaError(Exception):
+    pass
+
+
+def _numeros(indices):
+    numeros = ', '.join(str(i + 1) for i in indices[:MAX_LINHAS_NA_MENSAGEM])
+    if len(indices) > MAX_LINHAS_NA_MENSAGEM:
+        numeros += '...'
+    return numeros
+
+
+def categorizar_linhas(usuario, linhas, confianca_minima=None, posicoes=None):
+    """
+    Preenche ``categoria_id`` das linhas sem categoria com a sugestão do
+    índice do usuário, quando a categoria sugerida é do mesmo tipo da linha
+    e tem pelo menos ``confianca_minima``. Retorna quantas foram preenchidas.
+
+    ``posicoes`` dá a posição original de cada linha nas mensagens de erro.
+    """
+    posicoes = posicoes or range(len(linhas))
+    if confianca_minima is None:
+        confianca_minima = settings.IMPORTACAO_CONFIANCA_MINIMA
+    tipos = dict(Categoria.objects.filter(usuario=usuario).values_list('id', 'tipo_categoria'))
+
+    invalidas = [
+        posicoes[i] for i, linha in enumerate(linhas)
+        if linha.get('categoria_id') is not None and linha['categoria_id'] not in tipos
+    ]
+    if invalidas:
+        raise ImportacaoInvalidaError(f"Categoria inválida nas linhas {_numeros(invalidas)}.")
+
+    sugestoes = {}
+    preenchidas = 0
+    for linha in linhas:
+        if linha.get('categoria_id') is not None:
+            continue
+        chave = (linha['descricao'], linha['tipo'])
+        if chave not in sugestoes:
+            sugestoes[chave] = next(
+                (
+                    categoria_id
+                    for categoria_id, confianca in sugerir_categorias(usuario.id, linha['descricao'])
+                    if confianca >= confianca_minima and tipos.get(categoria_id) == linha['tipo']
+                ),
+                None,
+            )
+        linha['categoria_id'] = sugestoes[chave]
+        preenchidas += linha['categoria_id'] is not None
+    return preenchidas
+
+
+@rastreado()
+@transaction.atomic
+def importar_transacoes(usuario, conta: Conta, linhas, duplicadas='ignorar'):
+    """
+    Lança as ``linhas`` (dicts com ``data``, ``descricao``, ``valor``,
+    ``tipo``, ``pago`` e ``categoria_id`` opcional) na ``conta`` com um
+    único ``bulk_create``. Linhas sem categoria recebem a sugerida pelas
+    descrições anteriores do usuário; se alguma ficar sem, nada é importado.
+
+    Linhas iguais a transações já lançadas (extrato importado de novo) são
+    achadas por uma sondagem no índice de impressões e, conforme
+    ``duplicadas``, puladas (``'ignorar'``), recusadas (``'rejeitar'``) ou
+    lançadas mesmo assim (``'importar'``).
+
+    Saldo, checkpoints mensais, totais dos orçamentos e índice de categorias
+    são atualizados em lote, como fariam os signals linha a linha.
+    Retorna ``(transacoes, quantas_foram_categorizadas_automaticamente,
+    posicoes_das_linhas_ignoradas)``.
+    """
+    if conta.usuario_id != usuario.id:
+        raise ImportacaoInvalidaError("Conta não pertence ao usuário.")
+    if not linhas:
+        raise ImportacaoInvalidaError("Nenhuma transação para importar.")
+    if len(linhas) > settings.IMPORTACAO_MAX_LINHAS:
+        raise ImportacaoInvalidaError(f"Importe no máximo {settings.IMPORTACAO_MAX_LINHAS} transações por vez.")
+
+    posicoes = list(range(len(linhas)))
+    ignoradas = []
+    if duplicadas != 'importar':
+        repetidas = indices_duplicados([
+            impressao_transacao(usuario.id, conta.id, linha['data'], linha['valor'], linha['descricao'])
+            for linha in linhas
+        ])
+        if repetidas and duplicadas == 'rejeitar':
+            raise ImportacaoInvalidaError(f"Linhas {_numeros(repetidas)} já foram lançadas.")
+        ignoradas = repetidas
+        puladas = set(repetidas)
+        posicoes = [i for i in posicoes if i not in puladas]
+        linhas = [linhas[i] for i in posicoes]
+        if not linhas:
+            return [], 0, ignoradas
+
+    automaticas = categorizar_linhas(usuario, linhas, posicoes=posicoes)
+    sem_categoria = [posicoes[i] for i, linha in enumerate(linhas) if linha['categoria_id'] is None]
+    if sem_categoria:
+        raise ImportacaoInvalidaError(
+            f"Não foi possível sugerir a categoria das linhas {_numeros(sem_categoria)}; informe-a."
+        )
+    anotar(linhas=len(linhas), automaticas=automaticas, ignoradas=len(ignoradas))
+
+    # Um seq para cada transação e um para a conta (com os triggers de
+    # saldo, o banco atualiza saldo e seq da conta).
+    gatilhos = gatilhos_saldo_ativos()
+    extra = 0 if gatilhos else 1
+    ultimo_seq = SequenciaUsuario.reservar(usuario.id, len(linhas) + extra)
+    primeiro_seq = ultimo_seq - len(linhas) - extra + 1
+    transacoes = []
+    movimentos = []
+    gastos = []
+    delta = Decimal('0.00')
+    for indice, linha in enumerate(linhas):
+        valor = Decimal(linha['valor'])
+        pago = linha.get('pago', True)
+        transacoes.append(Transacao(
+            usuario=usuario,
+            conta=conta,
+            categoria_id=linha['categoria_id'],
+            tipo=linha['tipo'],
+            descricao=linha['descricao'],
+            valor=valor,
+            data=linha['data'],
+            pago=pago,
+            seq=primeiro_seq + indice,
+        ))
+        efeito = efeito_transacao(linha['tipo'], valor)
+        movimentos.append((linha['data'], efeito, pago))
+        gastos += movimentos_de_gasto(linha['tipo'], linha['categoria_id'], linha['data'], valor)
+        delta += efeito
+
+    Transacao.objects.bulk_create(transacoes, batch_size=500)
+    if not gatilhos:
+        Conta.objects.filter(pk=conta.pk).update(saldo_atual=F('saldo_atual') + em_centavos(delta), seq=ultimo_seq)
+    aplicar_movimentos_mensais(conta.id, movimentos)
+    aplicar_gastos(gastos)
+    atualizar_indice(usuario.id, [(t.descricao, t.categoria_id, 1) for t in transacoes])
+    registrar_escrita_em_lote(Transacao, usuario.id)
+    return transacoes, automaticas, ignoradas
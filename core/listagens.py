@@ -0,0 +1,242 @@
+import functools
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Campos lidos do jeito que vêm do banco; o valor do values_list() já é a
+# representação do serializer.
+CAMPOS_DIRETOS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _decimal_como_texto(valor):
+    return '' if valor is None else f'{valor:f}'
+
+
+def _data_iso(valor):
+    return None if valor is None else valor.isoformat()
+
+
+def _conversor(campo):
+    """Função aplicada ao valor do banco, ou ``None`` quando ele já serve como está."""
+    if isinstance(campo, serializers.DecimalField):
+        if campo.normalize_output or campo.localize:
+            return campo.to_representation
+        # O conversor do Django já devolve o Decimal com as casas do campo.
+        texto = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        return _decimal_como_texto if texto else None
+    if isinstance(campo, serializers.DateTimeField):
+        return campo.to_representation
+    if isinstance(campo, serializers.DateField):
+        formato = getattr(campo, 'format', api_settings.DATE_FORMAT)
+        return _data_iso if formato == ISO_8601 else campo.to_representation
+    if isinstance(campo, CAMPOS_DIRETOS):
+        return None
+    raise TypeError(f"Campo {campo.field_name} ({type(campo).__name__}) não tem leitura rápida.")
+
+
+class LeitorLinhas:
+    """
+    Monta as linhas de uma listagem direto das tuplas de ``values_list()``,
+    sem instanciar um serializer por linha. Os caminhos e conversores de
+    cada coluna são resolvidos uma vez, na criação.
+    """
+
+    def __init__(self, nomes, caminhos, conversores):
+        self.nomes = tuple(nomes)
+        self.caminhos = tuple(caminhos)
+        self.conversores = tuple((i, c) for i, c in enumerate(conversores) if c is not None)
+
+    @classmethod
+    def do_serializer(cls, serializer_class, campos=None):
+        """
+        Mesmas chaves e valores que ``serializer_class(many=True).data``
+        produziria; com ``campos``, só essas colunas são lidas.
+        """
+        nomes, caminhos, conversores = [], [], []
+        for nome, campo in serializer_class().fields.items():
+            if campo.write_only or (campos is not None and nome not in campos):
+                continue
+            if campo.source == '*':
+                raise TypeError(f"Campo {nome} ({type(campo).__name__}) não tem leitura rápida.")
+            nomes.append(nome)
+            caminhos.append('__'.join(campo.source_attrs))
+            conversores.append(_conversor(campo))
+        return cls(nomes, caminhos, conversores)
+
+    def linhas(self, queryset):
+        nomes = self.nomes
+        conversores = self.conversores
+        for valores in queryset.values_list(*self.caminhos).iterator(chunk_size=2000):
+            if conversores:
+                valores = list(valores)
+                for i, converter in conversores:
+                    valores[i] = converter(valores[i])
+            yield dict(zip(nomes, valores))
+
+
+@functools.lru_cache(maxsize=256)
+def leitor_do_serializer(serializer_class, campos=None):
+    return LeitorLinhas.do_serializer(serializer_class, campos)
+
+
+@functools.lru_cache(maxsize=None)
+def campos_legiveis(serializer_class):
+    return tuple(nome for nome, campo in serializer_class().fields.items() if not campo.write_only)
+
+
+def _caminho_prefetch(lookup):
+    return lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+
+
+def projetar_consulta(queryset, serializer, nomes):
+    """
+    Restringe ``.only()``, ``select_related`` e ``prefetch_related`` às colunas
+    e relações que os campos ``nomes`` do serializer leem. Se algum deles não
+    corresponde a colunas (``SerializerMethodField``, propriedades), a
+    consulta volta sem mudanças.
+    """
+    modelo = queryset.model
+    colunas = {modelo._meta.pk.name}
+    relacoes, prefetches = set(), set()
+    for nome in nomes:
+        atributos = serializer.fields[nome].source_attrs
+        if not atributos:
+            return queryset
+        if atributos[0] in queryset.query.annotations:
+            continue
+        atual, caminho = modelo, []
+        for posicao, atributo in enumerate(atributos):
+            try:
+                campo = atual._meta.get_field(atributo)
+            except FieldDoesNotExist:
+                return queryset
+            caminho.append(atributo)
+            if campo.one_to_many or campo.many_to_many:
+                if posicao:
+                    return queryset
+                prefetches.add(atributo)
+                break
+            colunas.add('__'.join(caminho))
+            if not campo.is_relation or posicao == len(atributos) - 1:
+                break
+            relacoes.add('__'.join(caminho))
+            atual = campo.related_model
+
+    lookups = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if _caminho_prefetch(lookup).split('__')[0] in prefetches
+    ]
+    return (
+        queryset.select_related(None).select_related(*relacoes)
+        .prefetch_related(None).prefetch_related(*lookups)
+        .only(*colunas)
+    )
+
+
+class CamposEsparsosMixin:
+    """
+    ``?fields=id,valor,data`` nas leituras (``list`` e ``retrieve``): a
+    resposta só traz esses campos e, na listagem, a consulta só busca as
+    colunas e relações que eles usam. Campos desconhecidos dão 400.
+    """
+    # Desligado por quem monta as linhas sem a consulta do list() padrão.
+    projetar_consulta = True
+
+    def campos_selecionados(self):
+        if not hasattr(self, '_campos_selecionados'):
+            self._campos_selecionados = self._ler_campos()
+        return self._campos_selecionados
+
+    def _ler_campos(self):
+        parametro = self.request.query_params.get('fields') if self.action in ('list', 'retrieve') else None
+        pedidos = {nome.strip() for nome in (parametro or '').split(',') if nome.strip()}
+        if not pedidos:
+            return None
+        disponiveis = campos_legiveis(self.get_serializer_class())
+        desconhecidos = pedidos.difference(disponiveis)
+        if desconhecidos:
+            raise ParseError(
+                f"Campos desconhecidos em 'fields': {', '.join(sorted(desconhecidos))}. "
+                f"Disponíveis: {', '.join(disponiveis)}."
+            )
+        return tuple(nome for nome in disponiveis if nome in pedidos)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_selecionados()
+        if campos is not None:
+            alvo = getattr(serializer, 'child', serializer)
+            for nome in set(alvo.fields).difference(campos):
+                alvo.fields.pop(nome)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.campos_selecionados()
+        if campos is None or self.action != 'list' or not self.projetar_consulta:
+            return queryset
+        return projetar_consulta(queryset, self.get_serializer(), campos)
+
+
+class ListagemRapidaMixin(CamposEsparsosMixin):
+    """
+    ``list()`` sem serializer por linha: as linhas saem de ``values_list()``
+    com as mesmas chaves e valores do ``serializer_class``. Com paginação
+    configurada, usa o ``list()`` normal.
+
+    Com ``?formato=compacto``, os campos lidos de uma relação listada em
+    ``referencias_compactas`` (como ``categoria_nome``) saem uma vez só, num
+    dicionário por id, e as linhas ficam só com o id.
+    """
+    projetar_consulta = False
+    # Chave das linhas no formato compacto.
+    chave_compacta = 'itens'
+    # Campo de relação -> chave do dicionário no formato compacto.
+    referencias_compactas = {}
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer_class = self.get_serializer_class()
+        campos = self.campos_selecionados()
+        if request.query_params.get('formato') == 'compacto' and self.referencias_compactas:
+            return Response(self.listagem_compacta(queryset, serializer_class, campos))
+        return Response(list(leitor_do_serializer(serializer_class, campos).linhas(queryset)))
+
+    def listagem_compacta(self, queryset, serializer_class, campos):
+        campos_serializer = serializer_class().fields
+        movidos = {relacao: {} for relacao in self.referencias_compactas}
+        nas_linhas = []
+        for nome in campos or campos_legiveis(serializer_class):
+            atributos = campos_serializer[nome].source_attrs
+            if len(atributos) == 2 and atributos[0] in movidos:
+                movidos[atributos[0]][atributos[1]] = nome
+            else:
+                nas_linhas.append(nome)
+        # O id da relação precisa ir na linha para achar o dicionário.
+        nas_linhas.extend(relacao for relacao, lidos in movidos.items() if lidos and relacao not in nas_linhas)
+
+        linhas = list(leitor_do_serializer(serializer_class, tuple(nas_linhas)).linhas(queryset))
+        resposta = {self.chave_compacta: linhas}
+        for relacao, lidos in movidos.items():
+            if not lidos:
+                continue
+            ids = {linha[relacao] for linha in linhas if linha[relacao] is not None}
+            modelo = queryset.model._meta.get_field(relacao).related_model
+            resposta[self.referencias_compactas[relacao]] = {
+                pk: dict(zip(lidos, valores))
+                for pk, *valores in modelo.objects.filter(pk__in=ids).values_list('pk', *lidos)
+            }
+        return resposta
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.arquivo import ano_de_corte, arquivar_transacoes
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as transações pagas dos anos fechados para o arquivo "
+        "(TransacaoArquivada), somando os totais em ResumoAnual."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int,
+                            help="Arquiva o que for anterior a 1º de janeiro deste ano. "
+                                 "Padrão: o ano atual menos ARQUIVO_ANOS_QUENTES.")
+        parser.add_argument('--usuario', type=int, help="Id do usuário. Padrão: todos.")
+        parser.add_argument('--lote', type=int, help="Transações por lote. Padrão: ARQUIVO_LOTE.")
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help="Segundos de espera entre os lotes.")
+
+    def handle(self, *args, **options):
+        ano = options['ano'] or ano_de_corte()
+        total = arquivar_transacoes(
+            ano=ano, usuario_id=options['usuario'], lote=options['lote'], pausa=options['pausa'],
+        )
+        self.stdout.write(f"{total} transações anteriores a {ano} arquivadas.")
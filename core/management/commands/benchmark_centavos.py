@@ -0,0 +1,113 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Context, Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.campos import CENTAVO, de_centavos
+from core.models import Categoria, Conta, Transacao
+
+LOTE_INSERCAO = 10000
+PARA_DECIMAL = Context(prec=15).create_decimal_from_float
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara somas por conta, tipo e mês sobre os valores em centavos (BIGINT) "
+        "com as mesmas somas sobre uma cópia em reais (REAL, como o DecimalField "
+        "ficava no SQLite), em tempo e exatidão. Os dados são descartados no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=500_000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                usuario, esperado = self._popular(options['linhas'])
+                self._comparar(usuario, esperado, options['repeticoes'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _popular(self, total):
+        usuario = User.objects.create_user(username=f'benchmark_centavos_{time.time_ns()}')
+        contas = [Conta.objects.create(usuario=usuario, nome=f'Conta {i}') for i in range(5)]
+        categoria = Categoria.objects.create(usuario=usuario, nome='Benchmark', tipo_categoria='saida')
+
+        rng = random.Random(0)
+        esperado = defaultdict(Decimal)
+        inicio = time.perf_counter()
+        for inicio_lote in range(0, total, LOTE_INSERCAO):
+            lote = [
+                Transacao(
+                    usuario=usuario,
+                    conta=rng.choice(contas),
+                    categoria=categoria,
+                    tipo=rng.choice(('entrada', 'saida')),
+                    descricao=f'Transação {n}',
+                    valor=Decimal(rng.randint(1, 5_000_000)) / 100,
+                    data=date(2020, 1, 1) + timedelta(days=rng.randint(0, 1825)),
+                )
+                for n in range(inicio_lote, min(inicio_lote + LOTE_INSERCAO, total))
+            ]
+            for t in lote:
+                esperado[(t.conta_id, t.tipo, t.data.replace(day=1))] += t.valor
+            Transacao.objects.bulk_create(lote)
+        self.stdout.write(f"{total} transações criadas em {time.perf_counter() - inicio:.1f}s.")
+        return usuario, esperado
+
+    def _medir(self, cenario, tabela, para_decimal, esperado, repeticoes):
+        somando, lendo = [], []
+        with connection.cursor() as cursor:
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                cursor.execute(
+                    f"SELECT conta_id, tipo, substr(data, 1, 7) || '-01', SUM(valor) FROM {tabela} GROUP BY 1, 2, 3"
+                )
+                somas = {
+                    (conta_id, tipo, date.fromisoformat(mes)): para_decimal(total)
+                    for conta_id, tipo, mes, total in cursor.fetchall()
+                }
+                somando.append(time.perf_counter() - inicio)
+
+                # Leitura linha a linha, como numa listagem ou exportação.
+                inicio = time.perf_counter()
+                cursor.execute(f"SELECT valor FROM {tabela}")
+                for (valor,) in cursor.fetchall():
+                    para_decimal(valor)
+                lendo.append(time.perf_counter() - inicio)
+
+        erros = [abs(somas.get(chave, Decimal('0')) - valor) for chave, valor in esperado.items()]
+        self.stdout.write(
+            f"{cenario:>9}: somas em {min(somando) * 1000:.1f} ms, leitura em {min(lendo) * 1000:.1f} ms "
+            f"(melhor de {repeticoes}); {sum(1 for erro in erros if erro)}/{len(esperado)} somas "
+            f"divergentes, maior erro {max(erros, default=0)}"
+        )
+
+    def _comparar(self, usuario, esperado, repeticoes):
+        # Cópias com só as linhas do usuário: uma em centavos, como a coluna é
+        # agora, e outra em REAL, como o DecimalField ficava no SQLite. O total
+        # em REAL volta para Decimal como o conversor do Django fazia (15
+        # dígitos e depois duas casas).
+        with connection.cursor() as cursor:
+            for tabela, valor in (('benchmark_centavos', 'valor'), ('benchmark_reais', 'CAST(valor AS REAL) / 100')):
+                cursor.execute(
+                    f"CREATE TEMP TABLE {tabela} AS SELECT conta_id, tipo, data, {valor} AS valor "
+                    "FROM core_transacao WHERE usuario_id = %s",
+                    [usuario.id],
+                )
+        self._medir('centavos', 'benchmark_centavos', de_centavos, esperado, repeticoes)
+        self._medir('reais', 'benchmark_reais', lambda total: PARA_DECIMAL(total).quantize(CENTAVO), esperado, repeticoes)
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE benchmark_centavos")
+            cursor.execute("DROP TABLE benchmark_reais")
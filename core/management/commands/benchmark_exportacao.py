@@ -0,0 +1,91 @@
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.exportacao import consulta_exportacao, gerar_exportacao
+from core.models import Categoria, Conta, Transacao
+
+LOTE_INSERCAO = 10000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo e pico de memória da exportação de transações em streaming. "
+        "Os dados são criados dentro de uma transação e descartados no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1_000_000)
+        parser.add_argument(
+            '--cenarios', nargs='+', default=['csv', 'jsonl', 'csv+gzip'],
+            help="Combinações formato[+gzip] a medir."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                usuario = self._popular(options['linhas'])
+                for cenario in options['cenarios']:
+                    self._medir(usuario, cenario)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _popular(self, total):
+        usuario = User.objects.create_user(username=f'benchmark_exportacao_{time.time_ns()}')
+        contas = [Conta.objects.create(usuario=usuario, nome=f'Conta {i}') for i in range(5)]
+        categoria = Categoria.objects.create(usuario=usuario, nome='Benchmark', tipo_categoria='saida')
+
+        rng = random.Random(0)
+        inicio_dados = date(2015, 1, 1)
+        inicio = time.perf_counter()
+        for inicio_lote in range(0, total, LOTE_INSERCAO):
+            # bulk_create não dispara signals; no SQLite os triggers mantêm os saldos.
+            Transacao.objects.bulk_create([
+                Transacao(
+                    usuario=usuario,
+                    conta=rng.choice(contas),
+                    categoria=categoria,
+                    tipo=rng.choice(('entrada', 'saida')),
+                    descricao=f'Transação {n}',
+                    valor=Decimal(rng.randint(1, 50000)) / 100,
+                    data=inicio_dados + timedelta(days=rng.randint(0, 3650)),
+                    pago=rng.random() < 0.9,
+                )
+                for n in range(inicio_lote, min(inicio_lote + LOTE_INSERCAO, total))
+            ])
+        self.stdout.write(f"{total} transações criadas em {time.perf_counter() - inicio:.1f}s.")
+        return usuario
+
+    def _medir(self, usuario, cenario):
+        formato, _, compressao = cenario.partition('+')
+        queryset, campos = consulta_exportacao(usuario, 'transacoes')
+
+        comprimir = compressao == 'gzip'
+
+        inicio = time.perf_counter()
+        total_bytes = sum(len(bloco) for bloco in gerar_exportacao(queryset, campos, formato, comprimir))
+        duracao = time.perf_counter() - inicio
+
+        # Passagem separada: o tracemalloc deixa a exportação bem mais lenta.
+        tracemalloc.start()
+        for _ in gerar_exportacao(queryset, campos, formato, comprimir):
+            pass
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        linhas = queryset.count()
+        self.stdout.write(
+            f"{cenario:>10}: {duracao:6.1f}s  {linhas / duracao:9.0f} linhas/s  "
+            f"{total_bytes / 2 ** 20:8.1f} MiB gerados  pico {pico / 2 ** 20:6.1f} MiB"
+        )
@@ -0,0 +1,104 @@
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from core.campos import em_centavos
+from core.gatilhos_saldo import SQL_REMOVER, esquecer_deteccao
+from core.models import Categoria, Conta, Transacao
+from core.saldos_mensais import efeito_no_saldo
+
+LOTE_INSERCAO = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão de inserção de transações com o saldo mantido pelos triggers, "
+        "pelo Python (bulk_create + UPDATE por conta) e pelos signals (create() por linha). "
+        "Tudo roda dentro de uma transação descartada no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100_000)
+        parser.add_argument(
+            '--linhas-signals', type=int, default=5_000,
+            help="Linhas do cenário com create() por linha, bem mais lento."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write("Os triggers de saldo só existem no SQLite.")
+            return
+        try:
+            with transaction.atomic():
+                self._medir('gatilhos', options['linhas'], self._bulk)
+                # DROP TRIGGER dentro da transação: desfeito pelo rollback.
+                with connection.cursor() as cursor:
+                    for sql in SQL_REMOVER:
+                        cursor.execute(sql)
+                esquecer_deteccao(connection)
+                self._medir('python', options['linhas'], self._bulk_com_deltas)
+                self._medir('signals', options['linhas_signals'], self._por_linha)
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            esquecer_deteccao(connection)
+
+    def _medir(self, cenario, total, inserir):
+        usuario = User.objects.create_user(username=f'benchmark_saldo_{cenario}_{time.time_ns()}')
+        contas = [Conta.objects.create(usuario=usuario, nome=f'Conta {i}') for i in range(5)]
+        categoria = Categoria.objects.create(usuario=usuario, nome='Benchmark', tipo_categoria='saida')
+        linhas = [
+            Transacao(
+                usuario=usuario,
+                conta=contas[n % len(contas)],
+                categoria=categoria,
+                tipo='saida' if n % 3 else 'entrada',
+                descricao=f'Transação {n}',
+                valor=Decimal(n % 50000 + 1) / 100,
+                data=date(2025, 1, 1),
+            )
+            for n in range(total)
+        ]
+
+        inicio = time.perf_counter()
+        inserir(linhas)
+        duracao = time.perf_counter() - inicio
+
+        esperado = defaultdict(Decimal)
+        for linha in linhas:
+            esperado[linha.conta_id] += efeito_no_saldo(linha.tipo, linha.valor, linha.pago, False)
+        consistente = all(
+            conta.saldo_atual == esperado[conta.id]
+            for conta in Conta.objects.filter(usuario=usuario)
+        )
+        self.stdout.write(
+            f"{cenario:>9}: {total} linhas em {duracao:.2f}s "
+            f"({total / duracao if duracao else 0:,.0f} linhas/s), saldo {'ok' if consistente else 'DIVERGENTE'}"
+        )
+
+    def _bulk(self, linhas):
+        Transacao.objects.bulk_create(linhas, batch_size=LOTE_INSERCAO)
+
+    def _bulk_com_deltas(self, linhas):
+        # O que importação e recorrências fazem sem os triggers.
+        Transacao.objects.bulk_create(linhas, batch_size=LOTE_INSERCAO)
+        deltas = defaultdict(Decimal)
+        for linha in linhas:
+            deltas[linha.conta_id] += efeito_no_saldo(linha.tipo, linha.valor, linha.pago, False)
+        for conta_id, delta in deltas.items():
+            Conta.objects.filter(id=conta_id).update(saldo_atual=F('saldo_atual') + em_centavos(delta))
+
+    def _por_linha(self, linhas):
+        for linha in linhas:
+            linha.save()
@@ -0,0 +1,83 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.listagens import leitor_do_serializer
+from core.models import Categoria, Conta, Transacao
+from core.renderers import JSONRendererDecimal
+from core.serializers import TransacaoSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a listagem de transações via TransacaoSerializer(many=True) com a "
+        "leitura direta de values_list(). Os dados são descartados no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=10_000)
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                usuario = self._popular(options['linhas'])
+                queryset = Transacao.objects.filter(usuario=usuario).order_by('-data', '-id')
+                leitor = leitor_do_serializer(TransacaoSerializer)
+                self._medir('serializer', options['repeticoes'], lambda: JSONRenderer().render(
+                    TransacaoSerializer(queryset.select_related('categoria', 'conta'), many=True).data
+                ))
+                self._medir('leitor', options['repeticoes'], lambda: JSONRendererDecimal().render(
+                    list(leitor.linhas(queryset))
+                ))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _popular(self, total):
+        usuario = User.objects.create_user(username=f'benchmark_serializacao_{time.time_ns()}')
+        contas = [Conta.objects.create(usuario=usuario, nome=f'Conta {i}') for i in range(3)]
+        categorias = [
+            Categoria.objects.create(usuario=usuario, nome=f'Categoria {i}', tipo_categoria='saida')
+            for i in range(5)
+        ]
+
+        rng = random.Random(0)
+        inicio_dados = date(2020, 1, 1)
+        # bulk_create não dispara signals, então saldos não são tocados.
+        Transacao.objects.bulk_create([
+            Transacao(
+                usuario=usuario,
+                conta=rng.choice(contas),
+                categoria=rng.choice(categorias),
+                tipo=rng.choice(('entrada', 'saida')),
+                descricao=f'Transação {n}',
+                valor=Decimal(rng.randint(1, 50000)) / 100,
+                data=inicio_dados + timedelta(days=rng.randint(0, 1500)),
+                pago=rng.random() < 0.9,
+            )
+            for n in range(total)
+        ], batch_size=2000)
+        self.stdout.write(f"{total} transações criadas.")
+        return usuario
+
+    def _medir(self, nome, repeticoes, gerar):
+        duracoes = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            tamanho = len(gerar())
+            duracoes.append(time.perf_counter() - inicio)
+        self.stdout.write(
+            f"{nome:>10}: melhor {min(duracoes) * 1000:8.1f} ms  "
+            f"{tamanho / 2 ** 10:8.1f} KiB"
+        )
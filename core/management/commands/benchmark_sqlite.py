@@ -0,0 +1,139 @@
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+NUM_CONTAS = 50
+
+
+def _preparar_banco(caminho, linhas_iniciais, pragmas):
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    if pragmas:
+        conn.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+    conn.executescript("""
+        CREATE TABLE conta (id INTEGER PRIMARY KEY, saldo_atual REAL NOT NULL);
+        CREATE TABLE transacao (
+            id INTEGER PRIMARY KEY,
+            conta_id INTEGER NOT NULL REFERENCES conta(id),
+            valor REAL NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX transacao_conta_data ON transacao (conta_id, data);
+    """)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO conta (id, saldo_atual) VALUES (?, 0)",
+                     [(i,) for i in range(1, NUM_CONTAS + 1)])
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO transacao (conta_id, valor, data) VALUES (?, ?, ?)",
+        [(rng.randint(1, NUM_CONTAS), rng.randint(1, 50000) / 100, f"2024-{rng.randint(1, 12):02d}-01")
+         for _ in range(linhas_iniciais)]
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def _trabalhador(argumentos):
+    caminho, pragmas, modo_transacao, timeout, operacoes, proporcao_escrita, semente = argumentos
+    conn = sqlite3.connect(caminho, timeout=timeout, isolation_level=None)
+    for nome, valor in (pragmas or {}).items():
+        conn.execute(f"PRAGMA {nome}={valor}")
+
+    rng = random.Random(semente)
+    resultado = {'leituras': 0, 'escritas': 0, 'falhas': 0, 'esperas': []}
+
+    for _ in range(operacoes):
+        conta_id = rng.randint(1, NUM_CONTAS)
+        try:
+            if rng.random() >= proporcao_escrita:
+                conn.execute("SELECT COUNT(*), SUM(valor) FROM transacao WHERE conta_id = ?",
+                             (conta_id,)).fetchone()
+                resultado['leituras'] += 1
+                continue
+
+            # Mesmo formato das escritas do app: lê o saldo e grava transação + saldo.
+            valor = rng.randint(1, 10000) / 100
+            inicio = time.perf_counter()
+            conn.execute(f"BEGIN {modo_transacao}")
+            espera = time.perf_counter() - inicio
+            saldo = conn.execute("SELECT saldo_atual FROM conta WHERE id = ?", (conta_id,)).fetchone()[0]
+            inicio = time.perf_counter()
+            conn.execute("INSERT INTO transacao (conta_id, valor, data) VALUES (?, ?, '2025-01-01')",
+                         (conta_id, valor))
+            espera += time.perf_counter() - inicio
+            conn.execute("UPDATE conta SET saldo_atual = ? WHERE id = ?", (saldo + valor, conta_id))
+            conn.execute("COMMIT")
+            resultado['escritas'] += 1
+            resultado['esperas'].append(espera)
+        except sqlite3.OperationalError:
+            resultado['falhas'] += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+    conn.close()
+    return resultado
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark multi-processo de leituras e escritas concorrentes no SQLite, "
+        "comparando a configuração padrão com SQLITE_PRAGMAS + BEGIN IMMEDIATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=8)
+        parser.add_argument('--operacoes', type=int, default=400, help="Operações por processo.")
+        parser.add_argument('--escritas', type=float, default=0.3, help="Proporção de escritas (0 a 1).")
+        parser.add_argument('--linhas-iniciais', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        transaction_mode = settings.DATABASES['default']['OPTIONS'].get('transaction_mode') or 'DEFERRED'
+        cenarios = [
+            # Comportamento anterior: sem PRAGMAs, transações DEFERRED e o timeout
+            # padrão do módulo sqlite3.
+            ('padrao', None, 'DEFERRED', 5.0),
+            ('ajustado', settings.SQLITE_PRAGMAS, transaction_mode,
+             settings.SQLITE_PRAGMAS['busy_timeout'] / 1000),
+        ]
+
+        self.stdout.write(
+            f"{options['processos']} processos x {options['operacoes']} operações, "
+            f"{options['escritas']:.0%} escritas\n"
+        )
+        self.stdout.write(
+            f"{'cenário':<10} {'ops/s':>10} {'escritas':>9} {'falhas':>7} "
+            f"{'espera total (s)':>17} {'espera p95 (ms)':>16}"
+        )
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            for nome, pragmas, modo, timeout in cenarios:
+                caminho = str(Path(diretorio) / f"{nome}.sqlite3")
+                _preparar_banco(caminho, options['linhas_iniciais'], pragmas)
+                self._executar(nome, caminho, pragmas, modo, timeout, options)
+
+    def _executar(self, nome, caminho, pragmas, modo, timeout, options):
+        tarefas = [
+            (caminho, pragmas, modo, timeout, options['operacoes'], options['escritas'], semente)
+            for semente in range(options['processos'])
+        ]
+        contexto = multiprocessing.get_context('spawn')
+        with contexto.Pool(options['processos']) as pool:
+            inicio = time.perf_counter()
+            resultados = pool.map(_trabalhador, tarefas)
+            duracao = time.perf_counter() - inicio
+
+        concluidas = sum(r['leituras'] + r['escritas'] for r in resultados)
+        escritas = sum(r['escritas'] for r in resultados)
+        falhas = sum(r['falhas'] for r in resultados)
+        esperas = sorted(e for r in resultados for e in r['esperas'])
+        p95 = esperas[int(len(esperas) * 0.95) - 1] * 1000 if esperas else 0
+
+        self.stdout.write(
+            f"{nome:<10} {concluidas / duracao:>10.1f} {escritas:>9} {falhas:>7} "
+            f"{sum(esperas):>17.3f} {p95:>16.2f}"
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.duplicatas import grupos_duplicados
+
+
+class Command(BaseCommand):
+    help = "Lista os grupos de transações repetidas (mesmo usuário, conta, data, valor e descrição)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', type=int, default=None, help="Restringe a um usuário.")
+        parser.add_argument('--limite', type=int, default=50, help="Quantidade de grupos exibidos.")
+
+    def handle(self, *args, **options):
+        grupos = list(grupos_duplicados(options['usuario'])[:options['limite']])
+        if not grupos:
+            self.stdout.write("Nenhuma duplicata encontrada.")
+            return
+
+        for grupo in grupos:
+            excesso = grupo['valor'] * (grupo['quantidade'] - 1)
+            self.stdout.write(
+                f"usuario={grupo['usuario_id']} conta={grupo['conta_id']} {grupo['data']} "
+                f"R$ {grupo['valor']:.2f} \"{grupo['descricao']}\": {grupo['quantidade']}x "
+                f"(ids {grupo['primeira']}..{grupo['ultima']}, R$ {excesso:.2f} a mais)"
+            )
+        self.stdout.write(f"{len(grupos)} grupos de duplicatas.")
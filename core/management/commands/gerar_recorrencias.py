@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.recorrencias import gerar_recorrencias
+
+
+class Command(BaseCommand):
+    help = (
+        "Lança as ocorrências vencidas das transações recorrentes de todos os usuários. "
+        "Pode rodar quantas vezes quiser: ocorrências já lançadas não se repetem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ate', default=None,
+                            help="Lança ocorrências até esta data (AAAA-MM-DD; padrão: hoje).")
+        parser.add_argument('--lote', type=int, default=500,
+                            help="Quantos modelos processar por transação.")
+
+    def handle(self, *args, **options):
+        ate = None
+        if options['ate']:
+            ate = parse_date(options['ate'])
+            if ate is None:
+                raise CommandError("Data inválida em --ate; use AAAA-MM-DD.")
+        total = gerar_recorrencias(ate, options['lote'])
+        self.stdout.write(f"{total} transações recorrentes lançadas.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.throttling import limpar_baldes
+
+
+class Command(BaseCommand):
+    help = "Remove baldes de throttling sem uso (um balde ausente equivale a um balde cheio)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idade', type=int, default=86400,
+                            help="Idade mínima, em segundos, desde o último uso.")
+
+    def handle(self, *args, **options):
+        total = limpar_baldes(options['idade'])
+        self.stdout.write(f"{total} baldes removidos.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.coalescencia import limpar_arquivos
+
+
+class Command(BaseCommand):
+    help = "Remove travas e resultados antigos do diretório de coalescência (COALESCENCIA_DIR)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idade', type=int, default=3600,
+                            help="Idade mínima, em segundos, desde o último uso.")
+
+    def handle(self, *args, **options):
+        total = limpar_arquivos(options['idade'])
+        self.stdout.write(f"{total} arquivos removidos.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotencia import purgar_chaves_expiradas
+
+
+class Command(BaseCommand):
+    help = "Remove em lotes as chaves de idempotência expiradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000,
+                            help="Quantidade de chaves removidas por DELETE.")
+
+    def handle(self, *args, **options):
+        total = purgar_chaves_expiradas(options['lote'])
+        self.stdout.write(f"{total} chaves expiradas removidas.")
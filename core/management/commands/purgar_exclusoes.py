@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.sincronizacao import purgar_exclusoes
+
+
+class Command(BaseCommand):
+    help = "Remove em lotes os registros de exclusão mais antigos que a retenção da sincronização."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help="Retenção em dias (padrão: SYNC_RETENCAO_EXCLUSOES_DIAS).")
+        parser.add_argument('--lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = purgar_exclusoes(options['dias'], options['lote'])
+        self.stdout.write(f"{total} exclusões removidas.")
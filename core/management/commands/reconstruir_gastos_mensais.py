@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.orcamentos import reconstruir_gastos_mensais
+
+
+class Command(BaseCommand):
+    help = "Recalcula os totais mensais de gastos por categoria usados pelos orçamentos."
+
+    def handle(self, *args, **options):
+        total = reconstruir_gastos_mensais()
+        self.stdout.write(f"{total} totais mensais recalculados.")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.categorizacao import reconstruir_indice_categorias
+
+
+class Command(BaseCommand):
+    help = "Recalcula o índice de termos por categoria usado nas sugestões de categoria."
+
+    def handle(self, *args, **options):
+        total = reconstruir_indice_categorias()
+        self.stdout.write(f"{total} pares termo/categoria recalculados.")
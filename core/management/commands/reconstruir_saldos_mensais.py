@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.saldos_mensais import reconstruir_saldos_mensais
+
+
+class Command(BaseCommand):
+    help = "Recalcula os checkpoints de SaldoMensal a partir das transações."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conta', type=int, action='append', dest='contas',
+                            help="Id da conta (pode ser repetido). Padrão: todas.")
+
+    def handle(self, *args, **options):
+        total = reconstruir_saldos_mensais(options['contas'])
+        self.stdout.write(f"{total} checkpoints recalculados.")
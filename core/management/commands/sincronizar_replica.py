@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import atualizar_replica, replica_disponivel
+
+
+class Command(BaseCommand):
+    help = "Atualiza a réplica de leitura copiando o banco primário com a API de backup do SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=float, default=None,
+            help="Repete a cópia a cada N segundos em vez de executar uma vez."
+        )
+
+    def handle(self, *args, **options):
+        if not replica_disponivel():
+            raise CommandError("Réplica não configurada (defina DB_REPLICA_NAME).")
+
+        while True:
+            inicio = time.perf_counter()
+            atualizar_replica()
+            self.stdout.write(f"Réplica atualizada em {time.perf_counter() - inicio:.3f}s.")
+
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,85 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Resume os traces mais lentos gravados pelo exportador JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--arquivo', default=None, help="Arquivo JSONL (padrão: TRACING_FILE).")
+        parser.add_argument('--limite', type=int, default=10, help="Quantidade de traces exibidos.")
+        parser.add_argument('--nome', default=None, help="Filtra pelo nome do span raiz.")
+        parser.add_argument('--detalhes', action='store_true', help="Exibe a árvore de spans de cada trace.")
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo'] or settings.TRACING_FILE
+        try:
+            spans_por_trace = self._carregar(caminho)
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo de traces não encontrado: {caminho}")
+
+        raizes = []
+        for trace_id, spans in spans_por_trace.items():
+            raiz = next((s for s in spans if s['pai_id'] is None), None)
+            if raiz is None or (options['nome'] and raiz['nome'] != options['nome']):
+                continue
+            raizes.append(raiz)
+
+        raizes.sort(key=lambda s: s['duracao_ms'] or 0, reverse=True)
+
+        if not raizes:
+            self.stdout.write("Nenhum trace encontrado.")
+            return
+
+        for raiz in raizes[:options['limite']]:
+            spans = spans_por_trace[raiz['trace_id']]
+            self._resumir(raiz, spans)
+            if options['detalhes']:
+                self._imprimir_arvore(raiz, spans)
+
+    def _carregar(self, caminho):
+        spans_por_trace = defaultdict(list)
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    span = json.loads(linha)
+                except ValueError:
+                    continue
+                spans_por_trace[span['trace_id']].append(span)
+        return spans_por_trace
+
+    def _resumir(self, raiz, spans):
+        sql = [s for s in spans if s['nome'] == 'sql']
+        tempo_sql = sum(s['duracao_ms'] or 0 for s in sql)
+        tempo_pdf = sum(s['duracao_ms'] or 0 for s in spans if s['nome'] == 'reportlab.build')
+        atributos = raiz.get('atributos', {})
+
+        self.stdout.write(
+            f"{raiz['duracao_ms']:>10.2f} ms  {raiz['nome']:<45} "
+            f"usuario={atributos.get('usuario_id')}  inicio={raiz['inicio']}"
+        )
+        self.stdout.write(
+            f"{'':>14}sql: {len(sql)} consultas / {tempo_sql:.2f} ms"
+            + (f"  reportlab: {tempo_pdf:.2f} ms" if tempo_pdf else "")
+            + (f"  erro: {atributos['erro']}" if 'erro' in atributos else "")
+        )
+
+    def _imprimir_arvore(self, raiz, spans):
+        filhos = defaultdict(list)
+        for span in spans:
+            filhos[span['pai_id']].append(span)
+
+        def imprimir(span, nivel):
+            atributos = {k: v for k, v in span.get('atributos', {}).items() if k != 'sql'}
+            descricao = span['atributos'].get('sql', '')[:80] if span['nome'] == 'sql' else atributos
+            self.stdout.write(f"{'':>14}{'  ' * nivel}- {span['nome']} {span['duracao_ms']:.2f} ms {descricao}")
+            for filho in sorted(filhos[span['span_id']], key=lambda s: s['inicio']):
+                imprimir(filho, nivel + 1)
+
+        imprimir(raiz, 0)
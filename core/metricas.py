@@ -0,0 +1,47 @@
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger('core.metricas')
+
+_PREFIXO = 'metricas'
+_CHAVE_INDICE = f'{_PREFIXO}:indice'
+
+
+def _chave(nome, rotulos):
+    partes = [f'{k}={rotulos[k]}' for k in sorted(rotulos)]
+    return ':'.join([_PREFIXO, nome, *partes])
+
+
+def incrementar(nome, valor=1, **rotulos):
+    """
+    Soma ``valor`` ao contador ``nome`` (com rótulos opcionais).
+
+    Os contadores ficam no cache padrão, então são compartilhados entre os
+    processos quando o cache também é.
+    """
+    chave = _chave(nome, rotulos)
+    if cache.add(chave, valor, timeout=None):
+        indice = cache.get(_CHAVE_INDICE) or {}
+        indice[chave] = {'nome': nome, 'rotulos': rotulos}
+        cache.set(_CHAVE_INDICE, indice, timeout=None)
+    else:
+        try:
+            cache.incr(chave, valor)
+        except ValueError:
+            cache.set(chave, valor, timeout=None)
+    logger.info("%s +%s %s", nome, valor, rotulos)
+
+
+def ler(nome, **rotulos):
+    return cache.get(_chave(nome, rotulos), 0)
+
+
+def listar():
+    """Todos os contadores conhecidos, ordenados por nome."""
+    indice = cache.get(_CHAVE_INDICE) or {}
+    valores = cache.get_many(list(indice))
+    return sorted(
+        ({**info, 'valor': valores.get(chave, 0)} for chave, info in indice.items()),
+        key=lambda metrica: (metrica['nome'], sorted(metrica['rotulos'].items())),
+    )
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:52
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher_saldos_mensais(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    SaldoMensal = apps.get_model('core', 'SaldoMensal')
+
+    movimentos = (
+        Transacao.objects.annotate(mes=TruncMonth('data'))
+        .values('conta_id', 'mes', 'tipo', 'pago')
+        .annotate(total=Sum('valor'))
+        .order_by('conta_id', 'mes')
+    )
+
+    por_mes = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    for linha in movimentos:
+        efeito = linha['total'] if linha['tipo'] == 'entrada' else -linha['total']
+        por_mes[(linha['conta_id'], linha['mes'])][0 if linha['pago'] else 1] += efeito
+
+    checkpoints = []
+    acumulado = {}
+    for (conta_id, mes), (pago, pendente) in sorted(por_mes.items()):
+        total_pago, total_pendente = acumulado.get(conta_id, (Decimal('0'), Decimal('0')))
+        total_pago += pago
+        total_pendente += pendente
+        acumulado[conta_id] = (total_pago, total_pendente)
+        checkpoints.append(SaldoMensal(
+            conta_id=conta_id,
+            mes=mes,
+            total_pago=total_pago,
+            total_pendente=total_pendente,
+            saldo_fechamento=total_pago + total_pendente,
+        ))
+
+    SaldoMensal.objects.bulk_create(checkpoints, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_incentivo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês.')),
+                ('saldo_fechamento', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_pago', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_pendente', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'verbose_name': 'Saldo Mensal',
+                'verbose_name_plural': 'Saldos Mensais',
+                'ordering': ['conta', 'mes'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['conta', 'data'], name='transacao_conta_data_idx'),
+        ),
+        migrations.AddField(
+            model_name='saldomensal',
+            name='conta',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_mensais', to='core.conta'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='saldomensal',
+            unique_together={('conta', 'mes')},
+        ),
+        migrations.RunPython(preencher_saldos_mensais, migrations.RunPython.noop),
+    ]
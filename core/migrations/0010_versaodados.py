@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_saldomensal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoDados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('escopo', models.CharField(choices=[('transacoes', 'Transações'), ('contas', 'Contas'), ('metas', 'Metas'), ('incentivos', 'Incentivos')], max_length=20)),
+                ('token', models.CharField(max_length=32)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Versão de Dados',
+                'verbose_name_plural': 'Versões de Dados',
+                'unique_together': {('usuario', 'escopo')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_versaodados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=255)),
+                ('hash_requisicao', models.CharField(max_length=64)),
+                ('concluida', models.BooleanField(default=False)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('resposta', models.JSONField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('expira_em', models.DateTimeField()),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+                'indexes': [models.Index(fields=['expira_em'], name='idempotencia_expira_idx')],
+                'unique_together': {('usuario', 'chave')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_chaveidempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BaldeThrottle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=200, unique=True)),
+                ('tokens', models.FloatField()),
+                ('atualizado_em', models.FloatField(help_text='Timestamp Unix da última recarga.')),
+            ],
+            options={
+                'verbose_name': 'Balde de Throttling',
+                'verbose_name_plural': 'Baldes de Throttling',
+            },
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:19
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+MODELOS_SINCRONIZAVEIS = ['Categoria', 'Conta', 'Transacao', 'MetaFinanceira', 'Lembrete', 'Notificacao']
+
+
+def numerar_registros_existentes(apps, schema_editor):
+    SequenciaUsuario = apps.get_model('core', 'SequenciaUsuario')
+    proximo = defaultdict(int)
+
+    for nome in MODELOS_SINCRONIZAVEIS:
+        Modelo = apps.get_model('core', nome)
+        lote = []
+        for objeto in Modelo.objects.only('id', 'usuario_id').order_by('id').iterator(chunk_size=2000):
+            proximo[objeto.usuario_id] += 1
+            objeto.seq = proximo[objeto.usuario_id]
+            lote.append(objeto)
+            if len(lote) >= 2000:
+                Modelo.objects.bulk_update(lote, ['seq'])
+                lote = []
+        Modelo.objects.bulk_update(lote, ['seq'])
+
+    SequenciaUsuario.objects.bulk_create(
+        [SequenciaUsuario(usuario_id=usuario_id, valor=valor) for usuario_id, valor in proximo.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0012_baldethrottle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('seq', models.BigIntegerField()),
+                ('excluida_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Exclusão',
+                'verbose_name_plural': 'Exclusões',
+            },
+        ),
+        migrations.CreateModel(
+            name='SequenciaUsuario',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('valor', models.BigIntegerField(default=0)),
+                ('horizonte_exclusoes', models.BigIntegerField(default=0, help_text='Exclusões com seq até este valor já foram purgadas.')),
+            ],
+            options={
+                'verbose_name': 'Sequência do Usuário',
+                'verbose_name_plural': 'Sequências dos Usuários',
+            },
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='conta',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lembrete',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='metafinanceira',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['usuario', 'seq'], name='categoria_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conta',
+            index=models.Index(fields=['usuario', 'seq'], name='conta_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lembrete',
+            index=models.Index(fields=['usuario', 'seq'], name='lembrete_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='metafinanceira',
+            index=models.Index(fields=['usuario', 'seq'], name='meta_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario', 'seq'], name='notificacao_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['usuario', 'seq'], name='transacao_usuario_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='exclusao',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='exclusao',
+            index=models.Index(fields=['usuario', 'seq'], name='exclusao_usuario_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exclusao',
+            index=models.Index(fields=['excluida_em'], name='exclusao_excluida_em_idx'),
+        ),
+        migrations.RunPython(numerar_registros_existentes, migrations.RunPython.noop),
+    ]
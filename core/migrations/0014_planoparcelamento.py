@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_sincronizacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='numero_parcela',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PlanoParcelamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída')], max_length=10)),
+                ('descricao', models.CharField(max_length=110)),
+                ('valor_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('numero_parcelas', models.PositiveSmallIntegerField()),
+                ('primeiro_vencimento', models.DateField()),
+                ('cancelado', models.BooleanField(default=False)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.categoria')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.conta')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Plano de Parcelamento',
+                'verbose_name_plural': 'Planos de Parcelamento',
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='plano',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='parcelas_geradas', to='core.planoparcelamento'),
+        ),
+    ]
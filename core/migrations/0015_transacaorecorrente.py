@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_planoparcelamento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransacaoRecorrente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída')], max_length=10)),
+                ('descricao', models.CharField(max_length=120)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('pago', models.BooleanField(default=True)),
+                ('recorrencia', models.CharField(choices=[('diaria', 'Diária'), ('semanal', 'Semanal'), ('mensal', 'Mensal'), ('anual', 'Anual')], default='mensal', max_length=10)),
+                ('data_inicio', models.DateField()),
+                ('data_fim', models.DateField(blank=True, null=True)),
+                ('ocorrencias_geradas', models.PositiveIntegerField(default=0)),
+                ('proxima_execucao', models.DateField()),
+                ('ativa', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.categoria')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.conta')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transação Recorrente',
+                'verbose_name_plural': 'Transações Recorrentes',
+            },
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='recorrente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transacoes_geradas', to='core.transacaorecorrente'),
+        ),
+        migrations.AddConstraint(
+            model_name='transacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('recorrente__isnull', False)), fields=('recorrente', 'data'), name='transacao_recorrente_data_unica'),
+        ),
+        migrations.AddIndex(
+            model_name='transacaorecorrente',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['proxima_execucao'], name='recorrente_proxima_idx'),
+        ),
+    ]
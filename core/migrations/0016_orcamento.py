@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher_gastos_mensais(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    GastoMensalCategoria = apps.get_model('core', 'GastoMensalCategoria')
+
+    gastos = (
+        Transacao.objects.filter(tipo='saida')
+        .annotate(mes=TruncMonth('data'))
+        .values('categoria_id', 'mes')
+        .annotate(total=Sum('valor'))
+        .order_by()
+    )
+    GastoMensalCategoria.objects.bulk_create(
+        [GastoMensalCategoria(**linha) for linha in gastos], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_transacaorecorrente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GastoMensalCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês.')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gastos_mensais', to='core.categoria')),
+            ],
+            options={
+                'verbose_name': 'Gasto Mensal por Categoria',
+                'verbose_name_plural': 'Gastos Mensais por Categoria',
+                'unique_together': {('categoria', 'mes')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Orcamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês.')),
+                ('limite', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('estourado', models.BooleanField(default=False)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orcamentos', to='core.categoria')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Orçamento',
+                'verbose_name_plural': 'Orçamentos',
+                'ordering': ['-mes', 'categoria__nome'],
+                'unique_together': {('categoria', 'mes')},
+            },
+        ),
+        migrations.RunPython(preencher_gastos_mensais, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+# SQL copiado de core/busca.py como era nesta migração: mudanças futuras no
+# módulo não podem alterar o que ela faz.
+TABELA_FTS = 'core_transacao_fts'
+
+# Índice FTS5 de conteúdo externo: guarda só os termos, o texto continua em
+# core_transacao. Os triggers o mantêm em dia em qualquer escrita, inclusive
+# bulk_create e UPDATEs em lote.
+SQL_INSTALAR = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        descricao, content='core_transacao', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF descricao ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+]
+
+SQL_REMOVER = [
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABELA_FTS}_au",
+    f"DROP TABLE IF EXISTS {TABELA_FTS}",
+]
+
+
+def instalar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_INSTALAR:
+        schema_editor.execute(sql)
+
+
+def remover(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_REMOVER:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_orcamento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'id'], name='transacao_data_id_idx'),
+        ),
+        migrations.RunPython(instalar, remover),
+    ]
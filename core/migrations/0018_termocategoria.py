@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:43
+
+import re
+import unicodedata
+from collections import Counter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Regras de core/categorizacao.py como eram nesta migração: mudanças futuras
+# no módulo não podem alterar o que ela preenche.
+TAMANHO_MINIMO_TERMO = 3
+TAMANHO_MAXIMO_TERMO = 40
+PALAVRAS_IGNORADAS = {'das', 'dos', 'para', 'com', 'pelo', 'pela', 'uma', 'por', 'sem', 'que'}
+
+
+def termos(descricao):
+    texto = unicodedata.normalize('NFKD', descricao or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    vistos = []
+    for palavra in re.findall(r'[^\W\d_]+', texto):
+        palavra = palavra[:TAMANHO_MAXIMO_TERMO]
+        if len(palavra) >= TAMANHO_MINIMO_TERMO and palavra not in PALAVRAS_IGNORADAS and palavra not in vistos:
+            vistos.append(palavra)
+    return vistos
+
+
+def contar_termos(transacoes):
+    contagens = Counter()
+    linhas = transacoes.values_list('usuario_id', 'descricao', 'categoria_id').order_by()
+    for usuario_id, descricao, categoria_id in linhas.iterator(chunk_size=2000):
+        for termo in termos(descricao):
+            contagens[(usuario_id, termo, categoria_id)] += 1
+    return contagens
+
+
+def preencher_termos(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    TermoCategoria = apps.get_model('core', 'TermoCategoria')
+
+    contagens = contar_termos(Transacao.objects.all())
+    TermoCategoria.objects.bulk_create(
+        [
+            TermoCategoria(usuario_id=usuario_id, termo=termo, categoria_id=categoria_id, contagem=contagem)
+            for (usuario_id, termo, categoria_id), contagem in contagens.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_transacao_busca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermoCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=40)),
+                ('contagem', models.PositiveIntegerField(default=0)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos', to='core.categoria')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Termo por Categoria',
+                'verbose_name_plural': 'Termos por Categoria',
+                'unique_together': {('usuario', 'termo', 'categoria')},
+            },
+        ),
+        migrations.RunPython(preencher_termos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:46
+
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Regra de core/models.py como era nesta migração: mudanças futuras no
+# módulo não podem alterar as impressões que ela preenche.
+def normalizar_descricao(descricao):
+    texto = unicodedata.normalize('NFKD', descricao or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'\w+', texto))
+
+
+def impressao_transacao(usuario_id, conta_id, data, valor, descricao):
+    valor = Decimal(str(valor)).quantize(Decimal('0.01'))
+    chave = f"{usuario_id}|{conta_id}|{data}|{valor}|{normalizar_descricao(descricao)}"
+    return hashlib.blake2b(chave.encode(), digest_size=16).hexdigest()
+
+
+def preencher_impressoes(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Transacao.objects.filter(id__gt=ultimo_id).order_by('id')
+            .only('id', 'usuario_id', 'conta_id', 'data', 'valor', 'descricao')[:2000]
+        )
+        if not lote:
+            return
+        for transacao in lote:
+            transacao.impressao = impressao_transacao(
+                transacao.usuario_id, transacao.conta_id, transacao.data, transacao.valor, transacao.descricao
+            )
+        Transacao.objects.bulk_update(lote, ['impressao'], batch_size=500)
+        ultimo_id = lote[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_termocategoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='impressao',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(preencher_impressoes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['impressao'], name='transacao_impressao_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:10
+
+from django.db import migrations
+
+# SQL copiado de core/gatilhos_saldo.py como era nesta migração, ainda com
+# valores em reais: mudanças futuras no módulo não podem alterar o que ela faz.
+GATILHOS = ('core_transacao_saldo_ai', 'core_transacao_saldo_au', 'core_transacao_saldo_ad')
+
+
+def _efeito(linha):
+    return (
+        f"(CASE WHEN {linha}.plano_id IS NOT NULL AND NOT {linha}.pago THEN 0 "
+        f"WHEN {linha}.tipo = 'saida' THEN -{linha}.valor ELSE {linha}.valor END)"
+    )
+
+
+def _somar(conta_id, efeito):
+    return f"""
+        UPDATE core_sequenciausuario SET valor = valor + 1
+        WHERE usuario_id = (SELECT usuario_id FROM core_conta WHERE id = {conta_id}) AND {efeito} <> 0;
+        UPDATE core_conta SET
+            saldo_atual = ROUND(saldo_atual + {efeito}, 2),
+            seq = COALESCE(
+                (SELECT valor FROM core_sequenciausuario WHERE usuario_id = core_conta.usuario_id), seq
+            )
+        WHERE id = {conta_id} AND {efeito} <> 0;
+    """
+
+
+SQL_INSTALAR = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ai AFTER INSERT ON core_transacao
+    WHEN {_efeito('new')} <> 0
+    BEGIN
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ad AFTER DELETE ON core_transacao
+    WHEN {_efeito('old')} <> 0
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_au
+    AFTER UPDATE OF conta_id, tipo, valor, pago, plano_id ON core_transacao
+    WHEN {_efeito('old')} <> {_efeito('new')}
+        OR (old.conta_id IS NOT new.conta_id AND {_efeito('new')} <> 0)
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+]
+
+SQL_REMOVER = [f"DROP TRIGGER IF EXISTS {nome}" for nome in GATILHOS]
+
+
+def _executar(schema_editor, comandos):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in comandos:
+        schema_editor.execute(sql)
+    # A conexão pode ter guardado se os triggers existiam; força nova consulta.
+    schema_editor.connection.gatilhos_saldo_detectados = None
+
+
+def instalar(apps, schema_editor):
+    _executar(schema_editor, SQL_INSTALAR)
+
+
+def remover(apps, schema_editor):
+    _executar(schema_editor, SQL_REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_transacao_impressao'),
+    ]
+
+    operations = [
+        migrations.RunPython(instalar, remover),
+    ]
@@ -0,0 +1,229 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:02
+
+from django.db import migrations
+
+import core.campos
+
+LOTE = 5000
+
+# SQL copiado de core/busca.py e core/gatilhos_saldo.py como era nesta
+# migração, já em centavos: mudanças futuras nos módulos não podem alterar o
+# que ela faz.
+TABELA_FTS = 'core_transacao_fts'
+
+SQL_INSTALAR_BUSCA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        descricao, content='core_transacao', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF descricao ON core_transacao BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END
+    """,
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+]
+
+GATILHOS_SALDO = ('core_transacao_saldo_ai', 'core_transacao_saldo_au', 'core_transacao_saldo_ad')
+
+
+def _efeito(linha):
+    return (
+        f"(CASE WHEN {linha}.plano_id IS NOT NULL AND NOT {linha}.pago THEN 0 "
+        f"WHEN {linha}.tipo = 'saida' THEN -{linha}.valor ELSE {linha}.valor END)"
+    )
+
+
+def _somar(conta_id, efeito):
+    return f"""
+        UPDATE core_sequenciausuario SET valor = valor + 1
+        WHERE usuario_id = (SELECT usuario_id FROM core_conta WHERE id = {conta_id}) AND {efeito} <> 0;
+        UPDATE core_conta SET
+            saldo_atual = saldo_atual + {efeito},
+            seq = COALESCE(
+                (SELECT valor FROM core_sequenciausuario WHERE usuario_id = core_conta.usuario_id), seq
+            )
+        WHERE id = {conta_id} AND {efeito} <> 0;
+    """
+
+
+SQL_INSTALAR_SALDO = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ai AFTER INSERT ON core_transacao
+    WHEN {_efeito('new')} <> 0
+    BEGIN
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_ad AFTER DELETE ON core_transacao
+    WHEN {_efeito('old')} <> 0
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_transacao_saldo_au
+    AFTER UPDATE OF conta_id, tipo, valor, pago, plano_id ON core_transacao
+    WHEN {_efeito('old')} <> {_efeito('new')}
+        OR (old.conta_id IS NOT new.conta_id AND {_efeito('new')} <> 0)
+    BEGIN
+        {_somar('old.conta_id', '-' + _efeito('old'))}
+        {_somar('new.conta_id', _efeito('new'))}
+    END
+    """,
+]
+
+SQL_REMOVER_SALDO = [f"DROP TRIGGER IF EXISTS {nome}" for nome in GATILHOS_SALDO]
+
+# (modelo, campos) com dinheiro, que passam de reais para centavos.
+CAMPOS = [
+    ('transacao', ['valor']),
+    ('conta', ['saldo_inicial', 'saldo_atual']),
+    ('saldomensal', ['saldo_fechamento', 'total_pago', 'total_pendente']),
+    ('gastomensalcategoria', ['total']),
+    ('orcamento', ['limite']),
+    ('planoparcelamento', ['valor_total']),
+    ('transacaorecorrente', ['valor']),
+    ('metafinanceira', ['valor_alvo']),
+    ('incentivo', ['valor']),
+]
+
+
+def _reescalar(apps, schema_editor, expressao):
+    """
+    Aplica ``expressao`` (com ``{coluna}``) a cada coluna de dinheiro, em
+    UPDATEs por faixa de ids para não reescrever uma tabela grande inteira
+    num comando só.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        for nome_modelo, campos in CAMPOS:
+            opts = apps.get_model('core', nome_modelo)._meta
+            colunas = [opts.get_field(campo).column for campo in campos]
+            tabela = schema_editor.quote_name(opts.db_table)
+            atribuicoes = ', '.join(
+                f"{schema_editor.quote_name(coluna)} = {expressao.format(coluna=schema_editor.quote_name(coluna))}"
+                for coluna in colunas
+            )
+            cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabela}")
+            menor, maior = cursor.fetchone()
+            if menor is None:
+                continue
+            for inicio in range(menor, maior + 1, LOTE):
+                cursor.execute(
+                    f"UPDATE {tabela} SET {atribuicoes} WHERE id >= %s AND id < %s",
+                    [inicio, inicio + LOTE],
+                )
+
+
+def para_centavos(apps, schema_editor):
+    _reescalar(apps, schema_editor, "CAST(ROUND({coluna} * 100) AS INTEGER)")
+
+
+def para_reais(apps, schema_editor):
+    _reescalar(apps, schema_editor, "{coluna} / 100.0")
+
+
+def _executar(schema_editor, comandos):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in comandos:
+        schema_editor.execute(sql)
+    # A conexão pode ter guardado se os triggers existiam; força nova consulta.
+    schema_editor.connection.gatilhos_saldo_detectados = None
+
+
+def instalar_gatilhos(apps, schema_editor):
+    # Alterar a coluna reconstrói core_transacao no SQLite, o que apaga os triggers.
+    _executar(schema_editor, SQL_INSTALAR_BUSCA + SQL_INSTALAR_SALDO)
+
+
+def remover_gatilhos(apps, schema_editor):
+    # Sem os triggers de saldo, reescalar os valores não mexe nos saldos.
+    _executar(schema_editor, SQL_REMOVER_SALDO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_gatilhos_saldo'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_gatilhos, instalar_gatilhos),
+        migrations.AlterField(
+            model_name='transacao',
+            name='valor',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='conta',
+            name='saldo_atual',
+            field=core.campos.CentavosField(default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='conta',
+            name='saldo_inicial',
+            field=core.campos.CentavosField(default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='gastomensalcategoria',
+            name='total',
+            field=core.campos.CentavosField(default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='incentivo',
+            name='valor',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='metafinanceira',
+            name='valor_alvo',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='orcamento',
+            name='limite',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='planoparcelamento',
+            name='valor_total',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='saldomensal',
+            name='saldo_fechamento',
+            field=core.campos.CentavosField(default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='saldomensal',
+            name='total_pago',
+            field=core.campos.CentavosField(default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='saldomensal',
+            name='total_pendente',
+            field=core.campos.CentavosField(default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='transacaorecorrente',
+            name='valor',
+            field=core.campos.CentavosField(max_digits=10),
+        ),
+        migrations.RunPython(para_centavos, para_reais),
+        migrations.RunPython(instalar_gatilhos, remover_gatilhos),
+    ]
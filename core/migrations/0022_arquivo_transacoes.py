@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:31
+
+import core.campos
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_valores_em_centavos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoAnual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('entradas', core.campos.CentavosField(default=0, max_digits=14)),
+                ('saidas', core.campos.CentavosField(default=0, max_digits=14)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_anuais', to='core.categoria')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_anuais', to='core.conta')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo Anual',
+                'verbose_name_plural': 'Resumos Anuais',
+                'indexes': [models.Index(fields=['usuario', 'ano'], name='resumo_usuario_ano_idx')],
+                'unique_together': {('conta', 'categoria', 'ano')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TransacaoArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída')], max_length=10)),
+                ('descricao', models.CharField(max_length=120)),
+                ('valor', core.campos.CentavosField(max_digits=10)),
+                ('data', models.DateField()),
+                ('parcelas', models.IntegerField(default=1)),
+                ('vencimento', models.DateField(blank=True, null=True)),
+                ('pago', models.BooleanField(default=False)),
+                ('plano_id', models.BigIntegerField(blank=True, null=True)),
+                ('numero_parcela', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('recorrente_id', models.BigIntegerField(blank=True, null=True)),
+                ('impressao', models.CharField(blank=True, editable=False, max_length=32, null=True)),
+                ('arquivada_em', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.categoria')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.conta')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transação Arquivada',
+                'verbose_name_plural': 'Transações Arquivadas',
+                'indexes': [models.Index(fields=['usuario', 'data'], name='arquivada_usuario_data_idx'), models.Index(fields=['conta', 'data'], name='arquivada_conta_data_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransacaoHistorico',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída')], max_length=10)),
+                ('descricao', models.CharField(max_length=120)),
+                ('valor', core.campos.CentavosField(max_digits=10)),
+                ('data', models.DateField()),
+                ('parcelas', models.IntegerField()),
+                ('vencimento', models.DateField(null=True)),
+                ('pago', models.BooleanField()),
+                ('plano_id', models.BigIntegerField(null=True)),
+                ('numero_parcela', models.PositiveSmallIntegerField(null=True)),
+                ('recorrente_id', models.BigIntegerField(null=True)),
+                ('impressao', models.CharField(max_length=32, null=True)),
+                ('arquivada', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'core_transacao_historico',
+                'ordering': ['-data'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,10 +1,64 @@
-from django.db import models
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User 
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from .campos import CentavosField
+
+
+class SequenciaUsuario(models.Model):
+    """
+    Contador de alterações de um usuário, usado como cursor da sincronização.
+
+    Toda escrita em um modelo ``Sincronizavel`` (e toda exclusão) recebe o
+    próximo valor, então os registros do usuário ficam em ordem total.
+    """
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    valor = models.BigIntegerField(default=0)
+    horizonte_exclusoes = models.BigIntegerField(
+        default=0,
+        help_text="Exclusões com seq até este valor já foram purgadas."
+    )
+
+    class Meta:
+        verbose_name = "Sequência do Usuário"
+        verbose_name_plural = "Sequências dos Usuários"
+
+    @classmethod
+    def reservar(cls, usuario_id, quantidade=1):
+        """Reserva ``quantidade`` valores seguidos e retorna o último."""
+        with transaction.atomic():
+            if not cls.objects.filter(usuario_id=usuario_id).update(valor=F('valor') + quantidade):
+                cls.objects.get_or_create(usuario_id=usuario_id)
+                cls.objects.filter(usuario_id=usuario_id).update(valor=F('valor') + quantidade)
+            return cls.objects.filter(usuario_id=usuario_id).values_list('valor', flat=True).get()
+
 
-class Categoria(models.Model):
+class Sincronizavel(models.Model):
+    """Modelo com ``seq`` renovado a cada ``save()``, para a sincronização incremental."""
+    seq = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'seq'}
+        # Seq e registro no mesmo commit: um leitor nunca vê um seq maior
+        # antes de um menor que ainda vai ser gravado.
+        with transaction.atomic():
+            self.seq = SequenciaUsuario.reservar(self.usuario_id)
+            super().save(*args, **kwargs)
+
+
+class Categoria(Sincronizavel):
     nome = models.CharField(max_length=60)
     
     TIPO_CHOICES = [
@@ -22,12 +76,15 @@ class Categoria(models.Model):
         verbose_name_plural = "Categorias"
         unique_together = ('nome', 'usuario')
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='categoria_usuario_seq_idx'),
+        ]
 
-class Conta(models.Model):
+class Conta(Sincronizavel):
     nome = models.CharField(max_length=60)
-    saldo_inicial = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    saldo_inicial = CentavosField(max_digits=10, default=0)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
-    saldo_atual = models.DecimalField(max_digits=12,decimal_places=2, default=0)
+    saldo_atual = CentavosField(max_digits=12, default=0)
     
     def __str__(self):
         return self.nome
@@ -36,9 +93,39 @@ class Conta(models.Model):
         verbose_name_plural = "Contas"
         unique_together = ('nome', 'usuario')
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='conta_usuario_seq_idx'),
+        ]
+
+
+def normalizar_descricao(descricao):
+    """Descrição sem acentos, em minúsculas e só com letras e números ("Uber  *Trip" -> "uber trip")."""
+    texto = unicodedata.normalize('NFKD', descricao or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'\w+', texto))
+
 
+def impressao_transacao(usuario_id, conta_id, data, valor, descricao):
+    """
+    Impressão digital de uma transação: mesmo usuário, conta, data, valor e
+    descrição normalizada dão a mesma impressão. Usada para achar duplicatas
+    por um índice, sem comparar linha a linha.
+    """
+    valor = Decimal(str(valor)).quantize(Decimal('0.01'))
+    chave = f"{usuario_id}|{conta_id}|{data}|{valor}|{normalizar_descricao(descricao)}"
+    return hashlib.blake2b(chave.encode(), digest_size=16).hexdigest()
 
-class Transacao(models.Model):
+
+class TransacaoQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.impressao = obj.calcular_impressao()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class Transacao(Sincronizavel):
     TIPO_CHOICES = [
         ('entrada', 'Entrada'),
         ('saida', 'Saída'),
@@ -49,11 +136,29 @@ class Transacao(models.Model):
     conta = models.ForeignKey(Conta, on_delete=models.PROTECT)    
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
     descricao = models.CharField(max_length=120)
-    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    valor = CentavosField(max_digits=10)
     data = models.DateField()
     parcelas = models.IntegerField(default=1)
     vencimento = models.DateField(null=True, blank=True) 
     pago = models.BooleanField(default=False) 
+    plano = models.ForeignKey(
+        'PlanoParcelamento',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='parcelas_geradas',
+    )
+    numero_parcela = models.PositiveSmallIntegerField(null=True, blank=True)
+    recorrente = models.ForeignKey(
+        'TransacaoRecorrente',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='transacoes_geradas',
+    )
+    impressao = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
+    objects = TransacaoQuerySet.as_manager()
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -61,10 +166,23 @@ class Transacao(models.Model):
         self._original_tipo = self.tipo
         self._original_conta_id = self.conta_id
         self._original_pago = self.pago
+        self._original_data = self.data
+        self._original_categoria_id = self.categoria_id
+        self._original_descricao = self.descricao
 
     def __str__(self):
         return f"{self.tipo.upper()} - {self.descricao} - R$ {self.valor}"
-    
+
+    def calcular_impressao(self):
+        return impressao_transacao(self.usuario_id, self.conta_id, self.data, self.valor, self.descricao)
+
+    def save(self, *args, **kwargs):
+        self.impressao = self.calcular_impressao()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'impressao'}
+        super().save(*args, **kwargs)
+
     def clean(self):
         if self.valor <= 0:
             raise ValidationError("Valor da transação deve ser positivo")
@@ -72,6 +190,135 @@ class Transacao(models.Model):
     class Meta:
         ordering = ['-data'] 
         verbose_name_plural = "Transações"
+        indexes = [
+            models.Index(fields=['conta', 'data'], name='transacao_conta_data_idx'),
+            models.Index(fields=['usuario', 'seq'], name='transacao_usuario_seq_idx'),
+            # Listagem do admin, ordenada por data sem filtro.
+            models.Index(fields=['data', 'id'], name='transacao_data_id_idx'),
+            models.Index(fields=['impressao'], name='transacao_impressao_idx'),
+        ]
+        constraints = [
+            # Uma ocorrência por data: rodar o agendador de novo não duplica lançamentos.
+            models.UniqueConstraint(
+                fields=['recorrente', 'data'],
+                condition=models.Q(recorrente__isnull=False),
+                name='transacao_recorrente_data_unica',
+            ),
+        ]
+
+
+class TransacaoArquivada(models.Model):
+    """
+    Transação de um ano fechado, movida de ``Transacao`` por
+    ``core.arquivo.arquivar_transacoes``. Mantém o id original e não muda mais;
+    plano e recorrência ficam só como ids para não prender a exclusão deles.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='+')
+    conta = models.ForeignKey(Conta, on_delete=models.PROTECT, related_name='+')
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    descricao = models.CharField(max_length=120)
+    valor = CentavosField(max_digits=10)
+    data = models.DateField()
+    parcelas = models.IntegerField(default=1)
+    vencimento = models.DateField(null=True, blank=True)
+    pago = models.BooleanField(default=False)
+    plano_id = models.BigIntegerField(null=True, blank=True)
+    numero_parcela = models.PositiveSmallIntegerField(null=True, blank=True)
+    recorrente_id = models.BigIntegerField(null=True, blank=True)
+    impressao = models.CharField(max_length=32, null=True, blank=True, editable=False)
+    arquivada_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tipo.upper()} - {self.descricao} - R$ {self.valor} (arquivada)"
+
+    class Meta:
+        verbose_name = "Transação Arquivada"
+        verbose_name_plural = "Transações Arquivadas"
+        indexes = [
+            models.Index(fields=['usuario', 'data'], name='arquivada_usuario_data_idx'),
+            models.Index(fields=['conta', 'data'], name='arquivada_conta_data_idx'),
+        ]
+
+
+class TransacaoHistorico(models.Model):
+    """
+    Visão (``core_transacao_historico``) com ``Transacao`` e
+    ``TransacaoArquivada`` juntas, para leituras de períodos que alcançam anos
+    arquivados. Só leitura; criada pela migração (ver ``core.arquivo``).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    categoria = models.ForeignKey(Categoria, on_delete=models.DO_NOTHING, related_name='+')
+    conta = models.ForeignKey(Conta, on_delete=models.DO_NOTHING, related_name='+')
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    descricao = models.CharField(max_length=120)
+    valor = CentavosField(max_digits=10)
+    data = models.DateField()
+    parcelas = models.IntegerField()
+    vencimento = models.DateField(null=True)
+    pago = models.BooleanField()
+    plano_id = models.BigIntegerField(null=True)
+    numero_parcela = models.PositiveSmallIntegerField(null=True)
+    recorrente_id = models.BigIntegerField(null=True)
+    impressao = models.CharField(max_length=32, null=True)
+    arquivada = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'core_transacao_historico'
+        ordering = ['-data']
+
+
+class PlanoParcelamento(models.Model):
+    """
+    Compra ou recebimento dividido em parcelas mensais.
+
+    Cada parcela é uma ``Transacao`` filha com ``vencimento`` próprio; só as
+    parcelas pagas afetam o saldo da conta.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    conta = models.ForeignKey(Conta, on_delete=models.PROTECT)
+    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT)
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    descricao = models.CharField(max_length=110)
+    valor_total = CentavosField(max_digits=10)
+    numero_parcelas = models.PositiveSmallIntegerField()
+    primeiro_vencimento = models.DateField()
+    cancelado = models.BooleanField(default=False)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.descricao} em {self.numero_parcelas}x de R$ {self.valor_total}"
+
+    class Meta:
+        verbose_name = "Plano de Parcelamento"
+        verbose_name_plural = "Planos de Parcelamento"
+        ordering = ['-criado_em']
+
+
+class SaldoMensal(models.Model):
+    """
+    Checkpoint do movimento acumulado de uma conta até o fim de um mês.
+
+    Os valores não incluem o ``saldo_inicial`` da conta, então editar a conta
+    não invalida os checkpoints.
+    """
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, related_name='saldos_mensais')
+    mes = models.DateField(help_text="Primeiro dia do mês.")
+    saldo_fechamento = CentavosField(max_digits=12, default=0)
+    total_pago = CentavosField(max_digits=12, default=0)
+    total_pendente = CentavosField(max_digits=12, default=0)
+
+    def __str__(self):
+        return f"{self.conta} - {self.mes:%m/%Y}: R$ {self.saldo_fechamento}"
+
+    class Meta:
+        verbose_name = "Saldo Mensal"
+        verbose_name_plural = "Saldos Mensais"
+        unique_together = ('conta', 'mes')
+        ordering = ['conta', 'mes']
 
 class PerfilAluno(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -95,10 +342,10 @@ class PerfilAluno(models.Model):
     def __str__(self):
         return f"Perfil de {self.usuario.username} - {self.get_serie_em_display()}"
     
-class MetaFinanceira(models.Model):
+class MetaFinanceira(Sincronizavel):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     nome = models.CharField(max_length=100) 
-    valor_alvo = models.DecimalField(max_digits=10, decimal_places=2) 
+    valor_alvo = CentavosField(max_digits=10) 
     conta_vinculada = models.OneToOneField(
         Conta, 
         on_delete=models.PROTECT, 
@@ -121,8 +368,11 @@ class MetaFinanceira(models.Model):
         verbose_name = "Meta Financeira"
         verbose_name_plural = "Metas Financeiras"
         ordering = ['data_alvo']
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='meta_usuario_seq_idx'),
+        ]
 
-class Lembrete(models.Model):
+class Lembrete(Sincronizavel):
     RECOR_CHOICES = [
         ('nenhuma', 'Nenhuma'),
         ('diaria', 'Diária'),
@@ -145,7 +395,49 @@ class Lembrete(models.Model):
     def __str__(self):
         return f"{self.titulo} ({self.usuario.username})"
 
-class Notificacao(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='lembrete_usuario_seq_idx'),
+        ]
+
+class TransacaoRecorrente(models.Model):
+    """
+    Modelo de lançamento fixo (passe, recarga de celular) que o comando
+    ``gerar_recorrencias`` transforma em transações na data de cada ocorrência.
+    """
+    RECOR_CHOICES = [escolha for escolha in Lembrete.RECOR_CHOICES if escolha[0] != 'nenhuma']
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    conta = models.ForeignKey(Conta, on_delete=models.PROTECT)
+    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT)
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    descricao = models.CharField(max_length=120)
+    valor = CentavosField(max_digits=10)
+    pago = models.BooleanField(default=True)
+    recorrencia = models.CharField(max_length=10, choices=RECOR_CHOICES, default='mensal')
+    data_inicio = models.DateField()
+    data_fim = models.DateField(null=True, blank=True)
+    ocorrencias_geradas = models.PositiveIntegerField(default=0)
+    proxima_execucao = models.DateField()
+    ativa = models.BooleanField(default=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.descricao} ({self.get_recorrencia_display()}) - R$ {self.valor}"
+
+    class Meta:
+        verbose_name = "Transação Recorrente"
+        verbose_name_plural = "Transações Recorrentes"
+        indexes = [
+            models.Index(
+                fields=['proxima_execucao'],
+                condition=models.Q(ativa=True),
+                name='recorrente_proxima_idx',
+            ),
+        ]
+
+
+class Notificacao(Sincronizavel):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     texto = models.CharField(max_length=300)
     transacao = models.ForeignKey('Transacao', null=True, blank=True, on_delete=models.SET_NULL)
@@ -155,6 +447,9 @@ class Notificacao(models.Model):
 
     class Meta:
         ordering = ['-criada_em']
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='notificacao_usuario_seq_idx'),
+        ]
 
 
 class Incentivo(models.Model):
@@ -166,7 +461,7 @@ class Incentivo(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     ano = models.IntegerField(null=True, blank=True)
-    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    valor = CentavosField(max_digits=10)
     conta = models.ForeignKey(Conta, null=True, blank=True, on_delete=models.SET_NULL)
     transacao = models.ForeignKey(Transacao, null=True, blank=True, on_delete=models.SET_NULL)
     liberado = models.BooleanField(default=False)
@@ -178,4 +473,178 @@ class Incentivo(models.Model):
         ordering = ['-criado_em']
 
     def __str__(self):
-        return f"Incentivo {self.get_tipo_display()} - {self.usuario.username} - R$ {self.valor}"
\ No newline at end of file
+        return f"Incentivo {self.get_tipo_display()} - {self.usuario.username} - R$ {self.valor}"
+
+
+class GastoMensalCategoria(models.Model):
+    """
+    Total das saídas de uma categoria em um mês (pagas ou não), mantido pelos
+    signals de ``Transacao`` para que a checagem de orçamento leia uma linha.
+    """
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='gastos_mensais')
+    mes = models.DateField(help_text="Primeiro dia do mês.")
+    total = CentavosField(max_digits=12, default=0)
+
+    def __str__(self):
+        return f"{self.categoria} - {self.mes:%m/%Y}: R$ {self.total}"
+
+    class Meta:
+        verbose_name = "Gasto Mensal por Categoria"
+        verbose_name_plural = "Gastos Mensais por Categoria"
+        unique_together = ('categoria', 'mes')
+
+
+class ResumoAnual(models.Model):
+    """
+    Totais pagos de um ano arquivado por (conta, categoria): o que fica no
+    lugar das transações movidas para ``TransacaoArquivada``. Somados ao que
+    está em ``Transacao``, dão os totais de todo o histórico sem ler o arquivo.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, related_name='resumos_anuais')
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='resumos_anuais')
+    ano = models.PositiveSmallIntegerField()
+    entradas = CentavosField(max_digits=14, default=0)
+    saidas = CentavosField(max_digits=14, default=0)
+    quantidade = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.conta} / {self.categoria} - {self.ano}"
+
+    class Meta:
+        verbose_name = "Resumo Anual"
+        verbose_name_plural = "Resumos Anuais"
+        unique_together = ('conta', 'categoria', 'ano')
+        indexes = [
+            models.Index(fields=['usuario', 'ano'], name='resumo_usuario_ano_idx'),
+        ]
+
+
+class Orcamento(models.Model):
+    """Limite de gastos de uma categoria em um mês."""
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='orcamentos')
+    mes = models.DateField(help_text="Primeiro dia do mês.")
+    limite = CentavosField(max_digits=10)
+    # Já avisado neste estouro; volta a falso se o gasto cair abaixo do limite.
+    estourado = models.BooleanField(default=False)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.categoria.nome} - {self.mes:%m/%Y}: R$ {self.limite}"
+
+    class Meta:
+        verbose_name = "Orçamento"
+        verbose_name_plural = "Orçamentos"
+        unique_together = ('categoria', 'mes')
+        ordering = ['-mes', 'categoria__nome']
+
+
+class TermoCategoria(models.Model):
+    """
+    Quantas transações do usuário com ``termo`` na descrição estão em
+    ``categoria``. Mantido pelos signals de ``Transacao``; é a base das
+    sugestões de categoria (ver ``core.categorizacao``).
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    termo = models.CharField(max_length=40)
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='termos')
+    contagem = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.termo} -> {self.categoria_id} ({self.contagem})"
+
+    class Meta:
+        verbose_name = "Termo por Categoria"
+        verbose_name_plural = "Termos por Categoria"
+        unique_together = ('usuario', 'termo', 'categoria')
+
+
+class VersaoDados(models.Model):
+    """
+    Token que muda a cada escrita em um escopo de dados do usuário.
+
+    Usado como parte das chaves de cache: resultados calculados com um token
+    antigo simplesmente deixam de ser lidos.
+    """
+    ESCOPO_CHOICES = [
+        ('transacoes', 'Transações'),
+        ('contas', 'Contas'),
+        ('metas', 'Metas'),
+        ('incentivos', 'Incentivos'),
+    ]
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    escopo = models.CharField(max_length=20, choices=ESCOPO_CHOICES)
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        verbose_name = "Versão de Dados"
+        verbose_name_plural = "Versões de Dados"
+        unique_together = ('usuario', 'escopo')
+
+
+class ChaveIdempotencia(models.Model):
+    """
+    Resposta gravada de uma requisição enviada com ``Idempotency-Key``.
+
+    Repetições com a mesma chave devolvem a resposta gravada em vez de
+    executar a operação de novo.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    chave = models.CharField(max_length=255)
+    hash_requisicao = models.CharField(max_length=64)
+    concluida = models.BooleanField(default=False)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    resposta = models.JSONField(null=True, blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    expira_em = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.chave} ({self.usuario_id})"
+
+    class Meta:
+        verbose_name = "Chave de Idempotência"
+        verbose_name_plural = "Chaves de Idempotência"
+        unique_together = ('usuario', 'chave')
+        indexes = [
+            models.Index(fields=['expira_em'], name='idempotencia_expira_idx'),
+        ]
+
+
+class BaldeThrottle(models.Model):
+    """
+    Balde de tokens de um escopo de throttling (por usuário ou IP).
+
+    Fica no banco para ser compartilhado por todos os processos do servidor.
+    """
+    chave = models.CharField(max_length=200, unique=True)
+    tokens = models.FloatField()
+    atualizado_em = models.FloatField(help_text="Timestamp Unix da última recarga.")
+
+    def __str__(self):
+        return f"{self.chave}: {self.tokens:.1f}"
+
+    class Meta:
+        verbose_name = "Balde de Throttling"
+        verbose_name_plural = "Baldes de Throttling"
+
+
+class Exclusao(models.Model):
+    """Registro (tombstone) de um objeto sincronizável excluído."""
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    modelo = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    seq = models.BigIntegerField()
+    excluida_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} (seq {self.seq})"
+
+    class Meta:
+        verbose_name = "Exclusão"
+        verbose_name_plural = "Exclusões"
+        indexes = [
+            models.Index(fields=['usuario', 'seq'], name='exclusao_usuario_seq_idx'),
+            models.Index(fields=['excluida_em'], name='exclusao_excluida_em_idx'),
+        ]
@@ -0,0 +1,110 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .campos import CentavosField, em_centavos
+from .models import Transacao, TransacaoHistorico, GastoMensalCategoria, Orcamento, Notificacao
+from .saldos_mensais import inicio_do_mes
+
+
+def movimentos_de_gasto(tipo, categoria_id, data, valor, sinal=1):
+    """Movimento de gasto de uma transação (saídas contam, entradas não)."""
+    if tipo != 'saida':
+        return []
+    return [(categoria_id, data, sinal * Decimal(valor))]
+
+
+def aplicar_gastos(movimentos):
+    """
+    Soma os ``(categoria_id, data, valor)`` aos totais mensais das categorias
+    e reavalia o orçamento de cada (categoria, mês) que mudou.
+    """
+    por_chave = defaultdict(Decimal)
+    for categoria_id, data, valor in movimentos:
+        if valor and categoria_id is not None and data is not None:
+            por_chave[(categoria_id, inicio_do_mes(data))] += valor
+
+    with transaction.atomic():
+        for (categoria_id, mes), valor in sorted(por_chave.items()):
+            if not valor:
+                continue
+            gasto = GastoMensalCategoria.objects.filter(categoria_id=categoria_id, mes=mes)
+            if not gasto.update(total=F('total') + em_centavos(valor)):
+                _, criado = GastoMensalCategoria.objects.get_or_create(
+                    categoria_id=categoria_id, mes=mes, defaults={'total': valor}
+                )
+                if not criado:
+                    gasto.update(total=F('total') + em_centavos(valor))
+            _avaliar_orcamento(categoria_id, mes, aumentou=valor > 0)
+
+
+def _gasto_do_mes():
+    return Coalesce(
+        Subquery(
+            GastoMensalCategoria.objects.filter(categoria_id=OuterRef('categoria_id'), mes=OuterRef('mes'))
+            .values('total')[:1]
+        ),
+        em_centavos(Decimal('0')),
+        output_field=CentavosField(max_digits=12),
+    )
+
+
+def _avaliar_orcamento(categoria_id, mes, aumentou):
+    """
+    Marca o orçamento como estourado (e avisa uma única vez) ou desmarca
+    quando o gasto volta ao limite. O UPDATE condicional garante um aviso só,
+    mesmo com gravações simultâneas.
+    """
+    orcamento = Orcamento.objects.filter(categoria_id=categoria_id, mes=mes)
+    if aumentou:
+        if not orcamento.filter(estourado=False).alias(gasto=_gasto_do_mes()).filter(
+            gasto__gt=F('limite')
+        ).update(estourado=True):
+            return
+        estouro = orcamento.annotate(gasto=_gasto_do_mes()).select_related('categoria').get()
+        Notificacao.objects.create(
+            usuario_id=estouro.usuario_id,
+            texto=(
+                f"Orçamento de {estouro.categoria.nome} em {mes:%m/%Y} estourado: "
+                f"R$ {estouro.gasto:.2f} de R$ {estouro.limite:.2f}."
+            ),
+            link=f"/api/orcamentos/{estouro.id}/",
+        )
+    else:
+        orcamento.filter(estourado=True).alias(gasto=_gasto_do_mes()).filter(
+            gasto__lte=F('limite')
+        ).update(estourado=False)
+
+
+def reavaliar_orcamento(orcamento: Orcamento):
+    """Depois de criar ou mudar o limite: avisa se já está estourado."""
+    _avaliar_orcamento(orcamento.categoria_id, orcamento.mes, aumentou=True)
+    _avaliar_orcamento(orcamento.categoria_id, orcamento.mes, aumentou=False)
+
+
+def orcamentos_com_gasto(usuario, mes=None):
+    """Orçamentos do usuário anotados com ``gasto``, em uma consulta."""
+    orcamentos = Orcamento.objects.filter(usuario=usuario).select_related('categoria')
+    if mes is not None:
+        orcamentos = orcamentos.filter(mes=inicio_do_mes(mes))
+    return orcamentos.annotate(gasto=_gasto_do_mes())
+
+
+def reconstruir_gastos_mensais():
+    """Recalcula todos os totais mensais por categoria a partir das transações, arquivadas ou não."""
+    gastos = (
+        TransacaoHistorico.objects.filter(tipo='saida')
+        .annotate(mes=TruncMonth('data'))
+        .values('categoria_id', 'mes')
+        .annotate(total=Sum('valor'))
+        .order_by()
+    )
+    with transaction.atomic():
+        GastoMensalCategoria.objects.all().delete()
+        GastoMensalCategoria.objects.bulk_create(
+            [GastoMensalCategoria(**linha) for linha in gastos], batch_size=1000
+        )
+    return len(gastos)
@@ -0,0 +1,256 @@
+from collections import defaultdict
+from decimal import Decimal, ROUND_DOWN
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Cast, Concat
+
+from .models import (
+    Transacao, PlanoParcelamento, Lembrete, Notificacao, Incentivo,
+    SequenciaUsuario, Exclusao, impressao_transacao,
+)
+from .saldos_mensais import efeito_transacao, aplicar_movimentos_mensais
+from .orcamentos import aplicar_gastos, movimentos_de_gasto
+from .signals import registrar_escrita_em_lote
+from .categorizacao import atualizar_indice
+from .tracing import rastreado
+
+CENTAVO = Decimal('0.01')
+
+
+class ParcelamentoInvalidoError(Exception):
+    pass
+
+
+def dividir_valor(valor_total, numero_parcelas):
+    """Divide em parcelas iguais; os centavos que sobram vão para a primeira."""
+    valor_total = Decimal(valor_total).quantize(CENTAVO)
+    parcela = (valor_total / numero_parcelas).quantize(CENTAVO, rounding=ROUND_DOWN)
+    primeira = valor_total - parcela * (numero_parcelas - 1)
+    return [primeira] + [parcela] * (numero_parcelas - 1)
+
+
+def _descricao_parcela(descricao, numero, total):
+    return f"{descricao} ({numero}/{total})"
+
+
+def _reservar_faixa(usuario_id, quantidade):
+    """Primeiro valor de ``quantidade`` seqs seguidos reservados para o usuário."""
+    return SequenciaUsuario.reservar(usuario_id, quantidade) - quantidade + 1
+
+
+def _validar_dono(usuario_id, conta=None, categoria=None):
+    for objeto in (conta, categoria):
+        if objeto is not None and objeto.usuario_id != usuario_id:
+            raise ParcelamentoInvalidoError(f"{type(objeto).__name__} não pertence ao usuário.")
+
+
+@rastreado()
+@transaction.atomic
+def criar_plano_parcelado(usuario, conta, categoria, tipo, descricao, valor_total,
+                          numero_parcelas, primeiro_vencimento, permitir_duplicada=False):
+    """
+    Cria o plano e as ``numero_parcelas`` transações filhas, uma por mês a
+    partir de ``primeiro_vencimento``, com um único ``bulk_create``.
+
+    As parcelas nascem pendentes: entram em ``total_pendente`` dos
+    checkpoints mensais, e só afetam o saldo da conta quando forem pagas.
+    Se alguma parcela repetir uma transação já lançada (o mesmo plano
+    enviado duas vezes), nada é criado, a menos que ``permitir_duplicada``.
+    """
+    valor_total = Decimal(str(valor_total))
+    if valor_total <= 0:
+        raise ParcelamentoInvalidoError("O valor deve ser positivo.")
+    if numero_parcelas < 2:
+        raise ParcelamentoInvalidoError("Um parcelamento precisa de pelo menos 2 parcelas.")
+    if valor_total < CENTAVO * numero_parcelas:
+        raise ParcelamentoInvalidoError("Valor insuficiente para o número de parcelas.")
+    _validar_dono(usuario.id, conta, categoria)
+
+    valores = dividir_valor(valor_total, numero_parcelas)
+    vencimentos = [primeiro_vencimento + relativedelta(months=i) for i in range(numero_parcelas)]
+    if not permitir_duplicada and Transacao.objects.filter(impressao__in=[
+        impressao_transacao(usuario.id, conta.id, vencimento, valor,
+                            _descricao_parcela(descricao, i + 1, numero_parcelas))
+        for i, (vencimento, valor) in enumerate(zip(vencimentos, valores))
+    ]).exists():
+        raise ParcelamentoInvalidoError("Este parcelamento já foi lançado.")
+
+    plano = PlanoParcelamento.objects.create(
+        usuario=usuario,
+        conta=conta,
+        categoria=categoria,
+        tipo=tipo,
+        descricao=descricao,
+        valor_total=valor_total,
+        numero_parcelas=numero_parcelas,
+        primeiro_vencimento=primeiro_vencimento,
+    )
+
+    primeiro_seq = _reservar_faixa(usuario.id, numero_parcelas)
+    parcelas = []
+    for indice, (vencimento, valor) in enumerate(zip(vencimentos, valores)):
+        parcelas.append(Transacao(
+            usuario=usuario,
+            conta=conta,
+            categoria=categoria,
+            tipo=tipo,
+            descricao=_descricao_parcela(descricao, indice + 1, numero_parcelas),
+            valor=valor,
+            data=vencimento,
+            vencimento=vencimento,
+            parcelas=numero_parcelas,
+            pago=False,
+            plano=plano,
+            numero_parcela=indice + 1,
+            seq=primeiro_seq + indice,
+        ))
+    Transacao.objects.bulk_create(parcelas)
+
+    aplicar_movimentos_mensais(
+        conta.id, [(p.data, efeito_transacao(tipo, p.valor), False) for p in parcelas]
+    )
+    aplicar_gastos([
+        movimento for p in parcelas for movimento in movimentos_de_gasto(tipo, categoria.id, p.data, p.valor)
+    ])
+    atualizar_indice(usuario.id, [(p.descricao, categoria.id, 1) for p in parcelas])
+    registrar_escrita_em_lote(Transacao, usuario.id)
+    return plano
+
+
+def _mover_gastos(linhas, sinal, categoria_id=None):
+    aplicar_gastos([
+        movimento
+        for linha in linhas
+        for movimento in movimentos_de_gasto(
+            linha['tipo'], categoria_id or linha['categoria_id'], linha['data'], linha['valor'], sinal
+        )
+    ])
+
+
+def _mover_pendentes(linhas, sinal, conta_id=None):
+    """Aplica (ou desfaz, com ``sinal=-1``) parcelas pendentes nos checkpoints, por conta."""
+    por_conta = defaultdict(list)
+    for linha in linhas:
+        efeito = sinal * efeito_transacao(linha['tipo'], linha['valor'])
+        por_conta[conta_id or linha['conta_id']].append((linha['data'], efeito, False))
+    for destino, movimentos in por_conta.items():
+        aplicar_movimentos_mensais(destino, movimentos)
+
+
+@rastreado()
+@transaction.atomic
+def atualizar_plano(plano: PlanoParcelamento, descricao=None, categoria=None, conta=None):
+    """
+    Altera descrição, categoria e/ou conta do plano e das parcelas ainda
+    pendentes com um único UPDATE. Parcelas já pagas ficam como estão.
+    """
+    if plano.cancelado:
+        raise ParcelamentoInvalidoError("O plano está cancelado.")
+    _validar_dono(plano.usuario_id, conta, categoria)
+
+    pendentes = plano.parcelas_geradas.filter(pago=False)
+    linhas = list(pendentes.values(
+        'id', 'conta_id', 'categoria_id', 'data', 'tipo', 'valor', 'descricao', 'numero_parcela'
+    ))
+    campos = {}
+    if descricao is not None:
+        plano.descricao = descricao
+        campos['descricao'] = Concat(
+            Value(f"{descricao} ("),
+            Cast('numero_parcela', CharField()),
+            Value(f"/{plano.numero_parcelas})"),
+            output_field=CharField(),
+        )
+    if categoria is not None:
+        if categoria.id != plano.categoria_id:
+            _mover_gastos(linhas, -1)
+            _mover_gastos(linhas, 1, categoria_id=categoria.id)
+        plano.categoria = categoria
+        campos['categoria'] = categoria
+    if conta is not None and conta.id != plano.conta_id:
+        _mover_pendentes(linhas, -1)
+        _mover_pendentes(linhas, 1, conta_id=conta.id)
+        plano.conta = conta
+        campos['conta'] = conta
+
+    if not campos:
+        return plano
+
+    if linhas and ('descricao' in campos or 'conta' in campos):
+        campos['impressao'] = Case(*[
+            When(id=linha['id'], then=Value(impressao_transacao(
+                plano.usuario_id, plano.conta_id, linha['data'], linha['valor'],
+                _descricao_parcela(plano.descricao, linha['numero_parcela'], plano.numero_parcelas),
+            )))
+            for linha in linhas
+        ], default=F('impressao'), output_field=CharField())
+
+    # numero_parcela é único dentro do plano, então cada parcela ganha um seq próprio.
+    primeiro_seq = _reservar_faixa(plano.usuario_id, plano.numero_parcelas)
+    pendentes.update(**campos, seq=Value(primeiro_seq - 1) + F('numero_parcela'))
+    if descricao is not None or categoria is not None:
+        atualizar_indice(plano.usuario_id, [
+            par
+            for linha in linhas
+            for par in (
+                (linha['descricao'], linha['categoria_id'], -1),
+                (_descricao_parcela(plano.descricao, linha['numero_parcela'], plano.numero_parcelas),
+                 plano.categoria_id, 1),
+            )
+        ])
+    plano.save()
+    registrar_escrita_em_lote(Transacao, plano.usuario_id)
+    return plano
+
+
+def _desvincular(modelo, transacao_ids, usuario_id):
+    """SET_NULL em lote nas referências às parcelas removidas."""
+    ids = list(modelo.objects.filter(transacao_id__in=transacao_ids).values_list('id', flat=True))
+    if not ids:
+        return
+    campos = {'transacao': None}
+    if modelo in (Lembrete, Notificacao):
+        primeiro_seq = _reservar_faixa(usuario_id, len(ids))
+        campos['seq'] = Case(*[When(id=id_, then=Value(primeiro_seq + i)) for i, id_ in enumerate(ids)])
+    modelo.objects.filter(id__in=ids).update(**campos)
+    registrar_escrita_em_lote(modelo, usuario_id)
+
+
+@rastreado()
+@transaction.atomic
+def cancelar_plano(plano: PlanoParcelamento):
+    """
+    Cancela o plano: remove as parcelas pendentes com um único DELETE e
+    desfaz o efeito delas nos checkpoints mensais. Parcelas pagas continuam
+    registradas. Retorna quantas parcelas foram removidas.
+    """
+    if plano.cancelado:
+        raise ParcelamentoInvalidoError("O plano já está cancelado.")
+
+    pendentes = plano.parcelas_geradas.filter(pago=False)
+    linhas = list(pendentes.values('id', 'conta_id', 'categoria_id', 'data', 'tipo', 'valor', 'descricao'))
+    ids = [linha['id'] for linha in linhas]
+
+    if ids:
+        _mover_pendentes(linhas, -1)
+        _mover_gastos(linhas, -1)
+        atualizar_indice(plano.usuario_id, [(linha['descricao'], linha['categoria_id'], -1) for linha in linhas])
+        for modelo in (Lembrete, Notificacao, Incentivo):
+            _desvincular(modelo, ids, plano.usuario_id)
+
+        primeiro_seq = _reservar_faixa(plano.usuario_id, len(ids))
+        Exclusao.objects.bulk_create([
+            Exclusao(usuario_id=plano.usuario_id, modelo='transacao', objeto_id=id_, seq=primeiro_seq + i)
+            for i, id_ in enumerate(ids)
+        ])
+        # Sem signals: parcelas pendentes não afetam o saldo da conta e os
+        # checkpoints e exclusões já foram tratados acima.
+        removidas = Transacao.objects.filter(id__in=ids)
+        removidas._raw_delete(removidas.db)
+        registrar_escrita_em_lote(Transacao, plano.usuario_id)
+
+    plano.cancelado = True
+    plano.save(update_fields=['cancelado'])
+    return len(ids)
@@ -0,0 +1,184 @@
+import cProfile
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .metricas import incrementar
+
+CABECALHO_PERFIL = 'HTTP_X_PROFILE'
+PARAMETRO_PERFIL = '_profile'
+_ID_CAPTURA_RE = re.compile(r'^[0-9]+-[0-9a-f]{8}$')
+
+# A partir do Python 3.12 só um cProfile pode estar ativo por interpretador;
+# uma segunda captura simultânea falharia com ValueError.
+_trava_captura = threading.Lock()
+
+
+class CapturaNaoEncontradaError(Exception):
+    pass
+
+
+def _diretorio_capturas():
+    return Path(settings.PROFILER_DIR)
+
+
+def _solicitou_perfil(request):
+    if request.META.get(CABECALHO_PERFIL) == '1':
+        return True
+    query_string = request.META.get('QUERY_STRING', '')
+    return PARAMETRO_PERFIL in query_string and request.GET.get(PARAMETRO_PERFIL) == '1'
+
+
+def _usuario_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+
+    # A autenticação JWT só acontece dentro da view do DRF; aqui validamos o token
+    # manualmente, e apenas para requisições que pediram a captura.
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        resultado = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return resultado[0] if resultado else None
+
+
+class ProfilerMiddleware:
+    """
+    Executa a requisição sob cProfile quando um usuário staff envia o cabeçalho
+    ``X-Profile: 1`` ou o parâmetro ``?_profile=1``.
+
+    Requisições sem a marcação seguem direto para ``get_response``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILER_ENABLED or not _solicitou_perfil(request):
+            return self.get_response(request)
+
+        user = _usuario_staff(request)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+
+        if not _trava_captura.acquire(blocking=False):
+            # Outra captura em andamento: atende sem perfil em vez de falhar.
+            incrementar('perfis_ignorados')
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = 'ocupado'
+            return response
+        try:
+            return self._capturar(request, user)
+        finally:
+            _trava_captura.release()
+
+    def _capturar(self, request, user):
+        consultas = []
+
+        def registrar_sql(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas.append({
+                    'banco': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'duracao_ms': round((time.perf_counter() - inicio) * 1000, 3),
+                })
+
+        profiler = cProfile.Profile()
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexao in connections.all():
+                stack.enter_context(conexao.execute_wrapper(registrar_sql))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        captura_id = salvar_captura(profiler, {
+            'metodo': request.method,
+            'caminho': request.get_full_path(),
+            'usuario': user.username,
+            'status': response.status_code,
+            'duracao_ms': round(duracao_ms, 3),
+            'consultas': consultas,
+        })
+        response['X-Profile-Id'] = captura_id
+        return response
+
+
+def salvar_captura(profiler, metadados):
+    """Grava o perfil e o trace SQL, descartando as capturas mais antigas."""
+    diretorio = _diretorio_capturas()
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    captura_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(str(diretorio / f"{captura_id}.prof"))
+
+    consultas = metadados.get('consultas', [])
+    metadados = {
+        'id': captura_id,
+        'criada_em': timezone.now().isoformat(),
+        'total_consultas': len(consultas),
+        'tempo_sql_ms': round(sum(c['duracao_ms'] for c in consultas), 3),
+        **metadados,
+    }
+    (diretorio / f"{captura_id}.json").write_text(
+        json.dumps(metadados, ensure_ascii=False), encoding='utf-8'
+    )
+
+    _podar_capturas(diretorio)
+    return captura_id
+
+
+def _podar_capturas(diretorio):
+    # Os ids começam com o timestamp em nanossegundos, então a ordem
+    # lexicográfica dos nomes é a ordem de criação.
+    capturas = sorted(diretorio.glob('*.json'))
+    excedentes = len(capturas) - settings.PROFILER_MAX_CAPTURAS
+    for arquivo in capturas[:max(excedentes, 0)]:
+        arquivo.unlink(missing_ok=True)
+        arquivo.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def listar_capturas():
+    """Retorna os metadados das capturas, da mais recente para a mais antiga."""
+    diretorio = _diretorio_capturas()
+    if not diretorio.exists():
+        return []
+
+    capturas = []
+    for arquivo in sorted(diretorio.glob('*.json'), reverse=True):
+        try:
+            metadados = json.loads(arquivo.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        metadados.pop('consultas', None)
+        capturas.append(metadados)
+    return capturas
+
+
+def caminho_captura(captura_id, formato='prof'):
+    if not _ID_CAPTURA_RE.match(captura_id or '') or formato not in ('prof', 'json'):
+        raise CapturaNaoEncontradaError("Captura não encontrada.")
+
+    caminho = _diretorio_capturas() / f"{captura_id}.{formato}"
+    if not caminho.exists():
+        raise CapturaNaoEncontradaError("Captura não encontrada.")
+    return caminho
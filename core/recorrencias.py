@@ -0,0 +1,155 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .campos import em_centavos
+from .models import Conta, Transacao, TransacaoRecorrente, SequenciaUsuario
+from .saldos_mensais import efeito_transacao, aplicar_movimentos_mensais
+from .orcamentos import aplicar_gastos, movimentos_de_gasto
+from .services import PASSOS_RECORRENCIA
+from .signals import registrar_escrita_em_lote
+from .categorizacao import atualizar_indice
+from .gatilhos_saldo import gatilhos_saldo_ativos
+from .tracing import rastreado
+
+TENTATIVAS_POR_LOTE = 3
+
+
+def ocorrencias_ate(recorrente: TransacaoRecorrente, ate):
+    """
+    Datas ainda não geradas até ``ate`` (e até ``data_fim``), e a data da
+    ocorrência seguinte.
+
+    A k-ésima ocorrência é sempre ``data_inicio + k * passo``, então um
+    modelo do dia 31 volta para o dia 31 depois de fevereiro.
+    """
+    passo, _ = PASSOS_RECORRENCIA[recorrente.recorrencia]
+    limite = min(ate, recorrente.data_fim) if recorrente.data_fim else ate
+    k = recorrente.ocorrencias_geradas
+    datas = []
+    while True:
+        data = recorrente.data_inicio + passo * k
+        if data > limite:
+            return datas, data
+        datas.append(data)
+        k += 1
+
+
+def _gerar_lote(ids, ate):
+    recorrentes = list(
+        TransacaoRecorrente.objects.select_for_update()
+        .filter(id__in=ids, ativa=True, proxima_execucao__lte=ate)
+        .order_by('id')
+    )
+    if not recorrentes:
+        return 0
+
+    # Ocorrências que já existem (execução anterior interrompida depois do
+    # commit, ou outro processo) não são criadas de novo.
+    existentes = set(
+        Transacao.objects.filter(
+            recorrente__in=recorrentes,
+            data__gte=min(r.proxima_execucao for r in recorrentes),
+        ).values_list('recorrente_id', 'data')
+    )
+
+    novas = defaultdict(list)
+    movimentos = defaultdict(list)
+    gastos = []
+    deltas = defaultdict(Decimal)
+    contas_por_usuario = defaultdict(set)
+    for recorrente in recorrentes:
+        datas, proxima = ocorrencias_ate(recorrente, ate)
+        efeito = efeito_transacao(recorrente.tipo, recorrente.valor)
+        for data in datas:
+            if (recorrente.id, data) in existentes:
+                continue
+            novas[recorrente.usuario_id].append(Transacao(
+                usuario_id=recorrente.usuario_id,
+                conta_id=recorrente.conta_id,
+                categoria_id=recorrente.categoria_id,
+                tipo=recorrente.tipo,
+                descricao=recorrente.descricao,
+                valor=recorrente.valor,
+                data=data,
+                vencimento=data,
+                pago=recorrente.pago,
+                recorrente=recorrente,
+            ))
+            movimentos[recorrente.conta_id].append((data, efeito, recorrente.pago))
+            gastos += movimentos_de_gasto(recorrente.tipo, recorrente.categoria_id, data, recorrente.valor)
+            deltas[recorrente.conta_id] += efeito
+            contas_por_usuario[recorrente.usuario_id].add(recorrente.conta_id)
+
+        recorrente.ocorrencias_geradas += len(datas)
+        recorrente.proxima_execucao = proxima
+        if recorrente.data_fim and proxima > recorrente.data_fim:
+            recorrente.ativa = False
+
+    contas = []
+    transacoes = []
+    gatilhos = gatilhos_saldo_ativos()
+    for usuario_id, lista in novas.items():
+        contas_ids = [] if gatilhos else sorted(contas_por_usuario[usuario_id])
+        # Um seq para cada transação e um para cada conta cujo saldo muda
+        # (com os triggers de saldo, o banco atualiza saldo e seq da conta).
+        seq = SequenciaUsuario.reservar(usuario_id, len(lista) + len(contas_ids)) - len(lista) - len(contas_ids)
+        for transacao in lista:
+            seq += 1
+            transacao.seq = seq
+        for conta_id in contas_ids:
+            seq += 1
+            contas.append(Conta(pk=conta_id, saldo_atual=F('saldo_atual') + em_centavos(deltas[conta_id]), seq=seq))
+        transacoes.extend(lista)
+
+    Transacao.objects.bulk_create(transacoes, batch_size=500)
+    if contas:
+        Conta.objects.bulk_update(contas, ['saldo_atual', 'seq'])
+    for conta_id, lista in movimentos.items():
+        aplicar_movimentos_mensais(conta_id, lista)
+    aplicar_gastos(gastos)
+    TransacaoRecorrente.objects.bulk_update(recorrentes, ['ocorrencias_geradas', 'proxima_execucao', 'ativa'])
+
+    for usuario_id, lista in novas.items():
+        atualizar_indice(usuario_id, [(t.descricao, t.categoria_id, 1) for t in lista])
+        registrar_escrita_em_lote(Transacao, usuario_id)
+    return len(transacoes)
+
+
+@rastreado()
+def gerar_recorrencias(ate=None, lote=500):
+    """
+    Lança todas as ocorrências vencidas até ``ate`` (padrão: hoje) de todos
+    os modelos ativos, em lotes de ``lote`` modelos.
+
+    Cada lote é uma transação: as transações entram com um ``bulk_create``,
+    o saldo de cada conta muda com um único delta somado e ``proxima_execucao``
+    avança junto. Se o processo cair no meio, o lote inteiro é desfeito e a
+    próxima execução o refaz; execuções atrasadas recuperam todas as
+    ocorrências perdidas de uma vez. Retorna quantas transações foram criadas.
+    """
+    ate = ate or timezone.localdate()
+    criadas = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            TransacaoRecorrente.objects.filter(ativa=True, proxima_execucao__lte=ate, id__gt=ultimo_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return criadas
+
+        for tentativa in range(TENTATIVAS_POR_LOTE):
+            try:
+                with transaction.atomic():
+                    criadas += _gerar_lote(ids, ate)
+                break
+            except IntegrityError:
+                # Outro processo lançou as mesmas ocorrências ao mesmo tempo.
+                if tentativa == TENTATIVAS_POR_LOTE - 1:
+                    raise
+        ultimo_id = ids[-1]
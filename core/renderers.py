@@ -0,0 +1,26 @@
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Decimais com até 15 dígitos voltam idênticos de um float (o repr mais curto).
+DIGITOS_EXATOS_FLOAT = 15
+
+
+class EncoderDecimal(JSONEncoder):
+    """
+    Codifica ``Decimal`` sem converter antes a resposta inteira: como texto
+    ("25.50") com ``JSON_DECIMAL_COMO_TEXTO``, senão como número exato.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            if settings.JSON_DECIMAL_COMO_TEXTO or len(obj.as_tuple().digits) > DIGITOS_EXATOS_FLOAT:
+                return str(obj)
+            return float(obj)
+        return super().default(obj)
+
+
+class JSONRendererDecimal(JSONRenderer):
+    encoder_class = EncoderDecimal
@@ -0,0 +1,133 @@
+import functools
+import inspect
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+
+# Caches que cada processo tem o seu: a marca de escrita gravada num worker
+# não seria vista pelos outros.
+CACHES_POR_PROCESSO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_leitura_replica = ContextVar('leitura_replica', default=False)
+
+
+def replica_disponivel():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def verificar_cache_compartilhado(app_configs=None, **kwargs):
+    """
+    Com réplica, o read-your-writes depende de todos os workers verem a
+    marca de escrita no cache; um cache por processo mandaria a requisição
+    seguinte, em outro worker, para a réplica desatualizada.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if replica_disponivel() and backend in CACHES_POR_PROCESSO:
+        return [checks.Error(
+            f"DB_REPLICA_NAME exige um cache compartilhado entre processos, não {backend}.",
+            hint="Defina CACHE_BACKEND (por exemplo, FileBasedCache, Redis ou Memcached).",
+            id='core.E001',
+        )]
+    return []
+
+
+def _chave_escrita(usuario_id):
+    return f"replica:escrita:{usuario_id}"
+
+
+def marcar_escrita(usuario_id):
+    """Mantém as leituras do usuário no primário durante REPLICA_STICKY_SECONDS."""
+    if usuario_id is not None and replica_disponivel():
+        cache.set(_chave_escrita(usuario_id), time.time(), settings.REPLICA_STICKY_SECONDS)
+
+
+def escreveu_recentemente(usuario_id):
+    return usuario_id is not None and cache.get(_chave_escrita(usuario_id)) is not None
+
+
+class ReplicaRouter:
+    """
+    Envia leituras para a réplica apenas dentro de ``ler_da_replica``.
+
+    Escritas sempre vão para o primário, assim como leituras feitas dentro
+    de um bloco atômico no primário.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _leitura_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+@contextmanager
+def ler_da_replica(usuario=None):
+    """
+    Direciona as leituras do bloco para a réplica.
+
+    Se a réplica não estiver configurada ou o usuário escreveu há pouco
+    (read-your-writes), as leituras continuam no primário.
+    """
+    usuario_id = getattr(usuario, 'pk', None)
+    if not replica_disponivel() or escreveu_recentemente(usuario_id):
+        yield DEFAULT_DB_ALIAS
+        return
+
+    token = _leitura_replica.set(True)
+    try:
+        yield REPLICA_ALIAS
+    finally:
+        _leitura_replica.reset(token)
+
+
+def leitura_replica(func):
+    """Decorador para serviços somente leitura que recebem ``usuario``."""
+    assinatura = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        usuario = assinatura.bind_partial(*args, **kwargs).arguments.get('usuario')
+        with ler_da_replica(usuario):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def atualizar_replica(origem=None, destino=None):
+    """
+    Copia o banco primário para a réplica usando a API de backup online do SQLite.
+
+    A cópia é feita em um único passo, então a réplica sempre reflete um
+    snapshot consistente do primário.
+    """
+    origem = str(origem or settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+    destino = str(destino or settings.DATABASES[REPLICA_ALIAS]['NAME'])
+
+    conexao_origem = sqlite3.connect(origem)
+    conexao_destino = sqlite3.connect(destino, timeout=settings.SQLITE_PRAGMAS['busy_timeout'] / 1000)
+    try:
+        conexao_origem.backup(conexao_destino)
+    finally:
+        conexao_destino.close()
+        conexao_origem.close()
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncMonth
+
+from .campos import CentavosField, em_centavos
+from .models import SaldoMensal, Transacao, TransacaoHistorico
+
+
+def efeito_transacao(tipo, valor):
+    """Efeito com sinal de uma transação sobre o saldo da conta."""
+    valor = Decimal(valor)
+    return -valor if tipo == 'saida' else valor
+
+
+def efeito_no_saldo(tipo, valor, pago, parcela):
+    """
+    Efeito sobre ``Conta.saldo_atual``: transações avulsas contam sempre,
+    parcelas de um plano só depois de pagas.
+    """
+    if parcela and not pago:
+        return Decimal('0')
+    return efeito_transacao(tipo, valor)
+
+
+def inicio_do_mes(data):
+    return data.replace(day=1)
+
+
+def _garantir_checkpoint(conta_id, mes):
+    if SaldoMensal.objects.filter(conta_id=conta_id, mes=mes).exists():
+        return
+
+    # Um mês sem checkpoint não tem transações, então o acumulado dele é o
+    # do checkpoint anterior mais próximo.
+    anterior = (
+        SaldoMensal.objects.filter(conta_id=conta_id, mes__lt=mes)
+        .order_by('-mes')
+        .values('saldo_fechamento', 'total_pago', 'total_pendente')
+        .first()
+    ) or {}
+    SaldoMensal.objects.get_or_create(conta_id=conta_id, mes=mes, defaults=anterior)
+
+
+def aplicar_movimento_mensal(conta_id, data, efeito, pago):
+    """
+    Soma ``efeito`` ao checkpoint do mês de ``data`` e de todos os meses
+    seguintes da conta com um único UPDATE.
+    """
+    if not efeito or conta_id is None or data is None:
+        return
+
+    mes = inicio_do_mes(data)
+    campo = 'total_pago' if pago else 'total_pendente'
+    with transaction.atomic():
+        _garantir_checkpoint(conta_id, mes)
+        SaldoMensal.objects.filter(conta_id=conta_id, mes__gte=mes).update(**{
+            campo: F(campo) + em_centavos(efeito),
+            'saldo_fechamento': F('saldo_fechamento') + em_centavos(efeito),
+        })
+
+
+def aplicar_movimentos_mensais(conta_id, movimentos):
+    """
+    Versão em lote de ``aplicar_movimento_mensal``: ``movimentos`` é uma
+    sequência de ``(data, efeito, pago)`` e todos entram nos checkpoints da
+    conta com um único UPDATE.
+    """
+    por_mes = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    for data, efeito, pago in movimentos:
+        if efeito and data is not None:
+            por_mes[inicio_do_mes(data)][0 if pago else 1] += efeito
+    if conta_id is None or not por_mes:
+        return
+
+    meses = sorted(por_mes)
+
+    def acumulado(indices):
+        termos = [
+            Case(
+                When(mes__gte=mes, then=em_centavos(sum(por_mes[mes][i] for i in indices))),
+                default=em_centavos(Decimal('0')),
+                output_field=CentavosField(max_digits=12),
+            )
+            for mes in meses
+        ]
+        return sum(termos[1:], termos[0])
+
+    with transaction.atomic():
+        for mes in meses:
+            _garantir_checkpoint(conta_id, mes)
+        SaldoMensal.objects.filter(conta_id=conta_id, mes__gte=meses[0]).update(
+            total_pago=F('total_pago') + acumulado((0,)),
+            total_pendente=F('total_pendente') + acumulado((1,)),
+            saldo_fechamento=F('saldo_fechamento') + acumulado((0, 1)),
+        )
+
+
+def reconstruir_saldos_mensais(conta_ids=None):
+    """
+    Recalcula do zero os checkpoints das contas informadas (ou de todas),
+    contando também as transações arquivadas.
+    """
+    transacoes = TransacaoHistorico.objects.all()
+    checkpoints = SaldoMensal.objects.all()
+    if conta_ids is not None:
+        transacoes = transacoes.filter(conta_id__in=conta_ids)
+        checkpoints = checkpoints.filter(conta_id__in=conta_ids)
+
+    movimentos = (
+        transacoes.annotate(mes=TruncMonth('data'))
+        .values('conta_id', 'mes', 'tipo', 'pago')
+        .annotate(total=Sum('valor'))
+        .order_by('conta_id', 'mes')
+    )
+
+    por_mes = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    for linha in movimentos:
+        efeito = efeito_transacao(linha['tipo'], linha['total'])
+        por_mes[(linha['conta_id'], linha['mes'])][0 if linha['pago'] else 1] += efeito
+
+    novos = []
+    acumulado = {}
+    for (conta_id, mes), (pago, pendente) in sorted(por_mes.items()):
+        total_pago, total_pendente = acumulado.get(conta_id, (Decimal('0'), Decimal('0')))
+        total_pago += pago
+        total_pendente += pendente
+        acumulado[conta_id] = (total_pago, total_pendente)
+        novos.append(SaldoMensal(
+            conta_id=conta_id,
+            mes=mes,
+            total_pago=total_pago,
+            total_pendente=total_pendente,
+            saldo_fechamento=total_pago + total_pendente,
+        ))
+
+    with transaction.atomic():
+        checkpoints.delete()
+        SaldoMensal.objects.bulk_create(novos, batch_size=1000)
+    return len(novos)
@@ -1,11 +1,18 @@
+from decimal import Decimal
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Transacao,
+    TransacaoHistorico,
     Categoria,
     Conta,
     PerfilAluno,
-    MetaFinanceira
+    MetaFinanceira,
+    PlanoParcelamento,
+    TransacaoRecorrente,
+    Orcamento,
+    GastoMensalCategoria,
+    impressao_transacao,
 )
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -82,6 +89,7 @@ class TransacaoSerializer(serializers.ModelSerializer):
     categoria_nome = serializers.ReadOnlyField(source='categoria.nome')
     conta_nome = serializers.ReadOnlyField(source='conta.nome')
     tipo_categoria = serializers.ReadOnlyField(source='categoria.tipo_categoria')
+    permitir_duplicada = serializers.BooleanField(default=False, write_only=True)
 
     class Meta:
         model = Transacao
@@ -95,8 +103,11 @@ class TransacaoSerializer(serializers.ModelSerializer):
             'vencimento',
             'pago',
             'categoria', 'categoria_nome', 'tipo_categoria',
-            'conta', 'conta_nome'
+            'conta', 'conta_nome',
+            'plano', 'numero_parcela', 'recorrente',
+            'permitir_duplicada',
         ]
+        read_only_fields = ('plano', 'numero_parcela', 'recorrente')
 
     def validate(self, attrs):
         request = self.context.get('request')
@@ -110,12 +121,209 @@ class TransacaoSerializer(serializers.ModelSerializer):
         if categoria and categoria.usuario != user:
             raise serializers.ValidationError({"categoria": "Categoria inválida para o usuário autenticado."})
 
+        # Parcelamentos checam as parcelas em criar_plano_parcelado.
+        if self.instance is None and attrs.get('parcelas', 1) <= 1 and not attrs.get('permitir_duplicada'):
+            impressao = impressao_transacao(
+                user.id, conta.id, attrs['data'], attrs['valor'], attrs['descricao']
+            )
+            existente = Transacao.objects.filter(impressao=impressao).values_list('id', flat=True).first()
+            if existente is not None:
+                raise serializers.ValidationError({
+                    "duplicada": f"Já existe uma transação igual (id {existente}). "
+                                 "Envie permitir_duplicada=true para lançar mesmo assim."
+                })
+
         return super().validate(attrs)
 
     def create(self, validated_data):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
         validated_data['usuario'] = user
+        validated_data.pop('permitir_duplicada', None)
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        validated_data.pop('permitir_duplicada', None)
+        return super().update(instance, validated_data)
+
+
+class TransacaoHistoricoSerializer(TransacaoSerializer):
+    """
+    Leitura de ``TransacaoHistorico``, com as mesmas chaves de
+    ``TransacaoSerializer``: a listagem de quem tem anos arquivados sai no
+    mesmo formato. Plano e recorrência são só ids na visão.
+    """
+    plano = serializers.ReadOnlyField(source='plano_id')
+    recorrente = serializers.ReadOnlyField(source='recorrente_id')
+
+    class Meta(TransacaoSerializer.Meta):
+        model = TransacaoHistorico
+        read_only_fields = TransacaoSerializer.Meta.fields
+
+class LinhaImportacaoSerializer(serializers.Serializer):
+    data = serializers.DateField()
+    descricao = serializers.CharField(max_length=120)
+    valor = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    tipo = serializers.ChoiceField(choices=Transacao.TIPO_CHOICES)
+    # Sem categoria, a importação usa a sugerida pela descrição.
+    categoria = serializers.IntegerField(required=False, allow_null=True, source='categoria_id')
+    pago = serializers.BooleanField(default=True)
+
+
+class ImportacaoTransacoesSerializer(serializers.Serializer):
+    conta = serializers.PrimaryKeyRelatedField(queryset=Conta.objects.all())
+    transacoes = LinhaImportacaoSerializer(many=True, allow_empty=False)
+    # O que fazer com linhas iguais a transações já lançadas.
+    duplicadas = serializers.ChoiceField(choices=['ignorar', 'rejeitar', 'importar'], default='ignorar')
+
+    def validate_conta(self, value):
+        if value.usuario != self.context['request'].user:
+            raise serializers.ValidationError("Conta inválida para o usuário autenticado.")
+        return value
+
+class PlanoParcelamentoSerializer(serializers.ModelSerializer):
+    parcelas = TransacaoSerializer(source='parcelas_geradas', many=True, read_only=True)
+
+    class Meta:
+        model = PlanoParcelamento
+        fields = [
+            'id',
+            'tipo',
+            'descricao',
+            'valor_total',
+            'numero_parcelas',
+            'primeiro_vencimento',
+            'cancelado',
+            'categoria',
+            'conta',
+            'criado_em',
+            'parcelas',
+        ]
+        read_only_fields = (
+            'tipo', 'valor_total', 'numero_parcelas', 'primeiro_vencimento', 'cancelado', 'criado_em',
+        )
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        conta = attrs.get('conta')
+        categoria = attrs.get('categoria')
+
+        if conta and conta.usuario != user:
+            raise serializers.ValidationError({"conta": "Conta inválida para o usuário autenticado."})
+
+        if categoria and categoria.usuario != user:
+            raise serializers.ValidationError({"categoria": "Categoria inválida para o usuário autenticado."})
+
+        return super().validate(attrs)
+
+class TransacaoRecorrenteSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.ReadOnlyField(source='categoria.nome')
+    conta_nome = serializers.ReadOnlyField(source='conta.nome')
+
+    class Meta:
+        model = TransacaoRecorrente
+        fields = [
+            'id',
+            'tipo',
+            'descricao',
+            'valor',
+            'pago',
+            'recorrencia',
+            'data_inicio',
+            'data_fim',
+            'proxima_execucao',
+            'ativa',
+            'categoria', 'categoria_nome',
+            'conta', 'conta_nome',
+        ]
+        read_only_fields = ('proxima_execucao',)
+
+    def validate_valor(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O valor deve ser positivo.")
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        conta = attrs.get('conta')
+        categoria = attrs.get('categoria')
+
+        if conta and conta.usuario != user:
+            raise serializers.ValidationError({"conta": "Conta inválida para o usuário autenticado."})
+
+        if categoria and categoria.usuario != user:
+            raise serializers.ValidationError({"categoria": "Categoria inválida para o usuário autenticado."})
+
+        if self.instance:
+            # Mudar a regra reescreveria ocorrências já lançadas.
+            for campo in ('recorrencia', 'data_inicio'):
+                if campo in attrs and attrs[campo] != getattr(self.instance, campo):
+                    raise serializers.ValidationError(
+                        {campo: "Não é possível mudar a regra; encerre esta recorrência e crie outra."}
+                    )
+
+        inicio = attrs.get('data_inicio', getattr(self.instance, 'data_inicio', None))
+        fim = attrs.get('data_fim', getattr(self.instance, 'data_fim', None))
+        if inicio and fim and fim < inicio:
+            raise serializers.ValidationError({"data_fim": "A data final deve ser depois do início."})
+
+        return super().validate(attrs)
+
+    def create(self, validated_data):
+        validated_data['usuario'] = self.context['request'].user
+        validated_data['proxima_execucao'] = validated_data['data_inicio']
+        return super().create(validated_data)
+
+class OrcamentoSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.ReadOnlyField(source='categoria.nome')
+    gasto = serializers.SerializerMethodField()
+    restante = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Orcamento
+        fields = ['id', 'categoria', 'categoria_nome', 'mes', 'limite', 'gasto', 'restante', 'estourado']
+        read_only_fields = ('estourado',)
+
+    def get_gasto(self, obj):
+        # Nas listagens vem anotado pela consulta; depois de criar, lê a linha do mês.
+        if hasattr(obj, 'gasto'):
+            return obj.gasto
+        return (
+            GastoMensalCategoria.objects.filter(categoria_id=obj.categoria_id, mes=obj.mes)
+            .values_list('total', flat=True).first()
+        ) or Decimal('0.00')
+
+    def get_restante(self, obj):
+        return obj.limite - self.get_gasto(obj)
+
+    def validate_mes(self, value):
+        return value.replace(day=1)
+
+    def validate_limite(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O limite deve ser positivo.")
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        categoria = attrs.get('categoria', getattr(self.instance, 'categoria', None))
+        mes = attrs.get('mes', getattr(self.instance, 'mes', None))
+
+        if categoria and categoria.usuario != user:
+            raise serializers.ValidationError({"categoria": "Categoria inválida para o usuário autenticado."})
+        if categoria and categoria.tipo_categoria != 'saida':
+            raise serializers.ValidationError({"categoria": "Orçamentos só valem para categorias de despesa."})
+
+        qs = Orcamento.objects.filter(categoria=categoria, mes=mes)
+        if self.instance:
+            qs = qs.exclude(pk=self.instance.pk)
+        if qs.exists():
+            raise serializers.ValidationError("Já existe um orçamento para essa categoria nesse mês.")
+
+        return super().validate(attrs)
+
+    def create(self, validated_data):
+        validated_data['usuario'] = self.context['request'].user
         return super().create(validated_data)
 
 class MetaFinanceiraSerializer(serializers.ModelSerializer):
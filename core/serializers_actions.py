@@ -18,9 +18,7 @@ class TransferenciaSerializer(serializers.Serializer):
         if origem.id == destino.id:
             raise serializers.ValidationError("A conta de origem e destino devem ser diferentes.")
 
-        if origem.saldo_inicial < data['valor']:
-            raise serializers.ValidationError("Saldo insuficiente na conta de origem.")
-
+        # O saldo é conferido por transferir_saldo, com as contas travadas.
         data['origem'] = origem
         data['destino'] = destino
         return data
@@ -1,6 +1,6 @@
 from django.db import transaction
 from django.utils import timezone
-from .models import Transacao, Categoria, Conta, MetaFinanceira, Incentivo
+from .models import Transacao, Categoria, Conta, MetaFinanceira, Incentivo, SaldoMensal, Lembrete, PerfilAluno
 from decimal import Decimal
 from io import BytesIO
 from reportlab.lib.pagesizes import letter, A4
@@ -9,8 +9,27 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from datetime import datetime, timedelta
-from django.db.models import Sum
+from datetime import date, datetime, timedelta
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Q, F, Case, When
+from django.db.models.functions import Coalesce
+from .tracing import rastreado, span, anotar
+from .routers import leitura_replica
+from .saldos_mensais import inicio_do_mes, efeito_transacao, efeito_no_saldo, aplicar_movimentos_mensais
+from .orcamentos import aplicar_gastos, movimentos_de_gasto
+from .signals import registrar_escrita_em_lote
+from .categorizacao import atualizar_indice
+from .sincronizacao import novos_seqs
+from .versoes import chave_cache, versoes
+from .gatilhos_saldo import gatilhos_saldo_ativos
+from .campos import CentavosField, em_centavos
+from .arquivo import modelo_do_periodo, somar_pagas
+from .autofill import cronograma_pede_meia
 
 
 class TransferenciaInvalidaError(Exception):
@@ -23,6 +42,19 @@ class ConfirmacaoRecebimentoError(Exception):
     pass
 
 
+GRANULARIDADES = ('diaria', 'semanal', 'mensal')
+
+LOTE_ACOES = 1000
+
+# (passo, maior duração do passo em dias)
+PASSOS_RECORRENCIA = {
+    'diaria': (relativedelta(days=1), 1),
+    'semanal': (relativedelta(weeks=1), 7),
+    'mensal': (relativedelta(months=1), 31),
+    'anual': (relativedelta(years=1), 366),
+}
+
+
 def _obter_ou_criar_categoria(usuario, nome, tipo):
     categoria, _ = Categoria.objects.get_or_create(
         usuario=usuario,
@@ -67,6 +99,40 @@ def _criar_transacao_dupla(usuario, conta_saida, conta_entrada, valor, descricao
     return transacao_saida, transacao_entrada
 
 
+def _travar_contas(*contas):
+    """
+    Relê as contas com ``select_for_update``, uma a uma em ordem de id, e as
+    devolve na ordem pedida. Com a mesma ordem em toda operação, duas
+    transferências em sentidos opostos não se travam mutuamente. No SQLite
+    o ``BEGIN IMMEDIATE`` (``transaction_mode``) já serializa as escritas.
+    """
+    travadas = {
+        conta_id: Conta.objects.select_for_update().get(pk=conta_id)
+        for conta_id in sorted({conta.pk for conta in contas})
+    }
+    return [travadas[conta.pk] for conta in contas]
+
+
+def _saldo_disponivel(conta):
+    """
+    Saldo da conta sem as entradas que ainda não chegaram. ``saldo_atual``
+    segue ``efeito_no_saldo`` e já soma as transações avulsas pendentes: as
+    entradas pendentes são descontadas aqui, e as saídas pendentes continuam
+    descontadas, porque esse dinheiro já está comprometido.
+
+    Chamada com a conta travada: qualquer escrita que mude as entradas
+    pendentes também atualiza o ``saldo_atual`` dessa linha e espera a trava.
+    """
+    pendentes = Transacao.objects.filter(
+        conta=conta, tipo='entrada', pago=False, plano__isnull=True
+    ).aggregate(total=Sum('valor'))['total']
+    return (
+        (conta.saldo_inicial or Decimal('0')) + (conta.saldo_atual or Decimal('0'))
+        - (pendentes or Decimal('0'))
+    )
+
+
+@rastreado()
 @transaction.atomic
 def transferir_saldo(usuario, origem: Conta, destino: Conta, valor: float):
     valor = Decimal(str(valor))
@@ -80,9 +146,14 @@ def transferir_saldo(usuario, origem: Conta, destino: Conta, valor: float):
     if origem.usuario != usuario or destino.usuario != usuario:
         raise TransferenciaInvalidaError("Contas não pertencem ao usuário.")
 
+    origem, destino = _travar_contas(origem, destino)
+    if _saldo_disponivel(origem) < valor:
+        raise TransferenciaInvalidaError("Saldo insuficiente na conta de origem.")
+
     return _criar_transacao_dupla(usuario, origem, destino, valor, "Transferência")
 
 
+@rastreado()
 @transaction.atomic
 def depositar_em_meta(usuario, meta: MetaFinanceira, valor: float):
     valor = Decimal(str(valor))
@@ -104,15 +175,22 @@ def depositar_em_meta(usuario, meta: MetaFinanceira, valor: float):
     if not conta_principal:
         raise DepositoMetaError("Nenhuma conta encontrada para fazer o depósito.")
 
+    conta_principal, conta_meta = _travar_contas(conta_principal, meta.conta_vinculada)
+    if conta_principal.pk == conta_meta.pk:
+        raise DepositoMetaError("A conta da meta não pode ser a conta de origem do depósito.")
+    if _saldo_disponivel(conta_principal) < valor:
+        raise DepositoMetaError("Saldo insuficiente para o depósito.")
+
     return _criar_transacao_dupla(
         usuario,
         conta_principal,
-        meta.conta_vinculada,
+        conta_meta,
         valor,
         f"Depósito em Meta: {meta.nome}"
     )
 
 
+@rastreado()
 @transaction.atomic
 def confirmar_recebimento_pede_meia(usuario, mes: int, ano: int):
     if not (1 <= mes <= 12):
@@ -141,6 +219,7 @@ def confirmar_recebimento_pede_meia(usuario, mes: int, ano: int):
     return transacao
 
 
+@rastreado()
 @transaction.atomic
 def criar_incentivo_conclusao(usuario, ano: int, conta: Conta = None):
     """Cria registro de incentivo de conclusão (bloqueado até liberação)."""
@@ -163,6 +242,7 @@ def criar_incentivo_conclusao(usuario, ano: int, conta: Conta = None):
     return incentivo
 
 
+@rastreado()
 @transaction.atomic
 def liberar_incentivo_conclusao(incentivo: Incentivo):
     """Libera o incentivo de conclusão criando a transação correspondente."""
@@ -194,6 +274,7 @@ def liberar_incentivo_conclusao(incentivo: Incentivo):
     return incentivo, transacao
 
 
+@rastreado()
 @transaction.atomic
 def criar_incentivo_enem(usuario, conta: Conta = None, ano: int = None):
     """Concede incentivo ENEM imediatamente como transação disponível."""
@@ -231,6 +312,391 @@ def criar_incentivo_enem(usuario, conta: Conta = None, ano: int = None):
     return incentivo, transacao
 
 
+def _em_lotes(queryset, campos, lote=LOTE_ACOES):
+    """Linhas de ``queryset`` em lotes por ordem de id, sem carregar tudo."""
+    ultimo_id = 0
+    while True:
+        linhas = list(queryset.filter(id__gt=ultimo_id).order_by('id').values('id', *campos)[:lote])
+        if not linhas:
+            return
+        yield linhas
+        ultimo_id = linhas[-1]['id']
+
+
+def _aplicar_deltas_de_saldo(deltas, usuario_por_conta):
+    """Soma ``deltas[conta_id]`` ao ``saldo_atual`` de cada conta com um único UPDATE."""
+    deltas = {conta_id: delta for conta_id, delta in deltas.items() if delta}
+    if not deltas or gatilhos_saldo_ativos():
+        return
+    Conta.objects.filter(id__in=deltas).update(
+        saldo_atual=F('saldo_atual') + Case(
+            *[When(id=conta_id, then=em_centavos(delta)) for conta_id, delta in deltas.items()],
+            output_field=CentavosField(max_digits=12),
+        ),
+        seq=novos_seqs((conta_id, usuario_por_conta[conta_id]) for conta_id in deltas),
+    )
+
+
+@rastreado()
+def marcar_transacoes_pagas(transacoes):
+    """
+    Marca como pagas as transações pendentes de ``transacoes`` com UPDATEs
+    em lote. Os checkpoints mensais passam o valor de pendente para pago, e
+    o saldo das contas muda só pelas parcelas, que até então não contavam.
+    Retorna quantas transações mudaram.
+    """
+    total = 0
+    campos = ('usuario_id', 'conta_id', 'data', 'tipo', 'valor', 'plano_id')
+    for linhas in _em_lotes(transacoes.filter(pago=False), campos):
+        movimentos = defaultdict(list)
+        deltas = defaultdict(Decimal)
+        usuario_por_conta = {}
+        for linha in linhas:
+            efeito = efeito_transacao(linha['tipo'], linha['valor'])
+            parcela = linha['plano_id'] is not None
+            conta_id = linha['conta_id']
+            movimentos[conta_id] += [(linha['data'], efeito, True), (linha['data'], -efeito, False)]
+            deltas[conta_id] += (
+                efeito_no_saldo(linha['tipo'], linha['valor'], True, parcela)
+                - efeito_no_saldo(linha['tipo'], linha['valor'], False, parcela)
+            )
+            usuario_por_conta[conta_id] = linha['usuario_id']
+
+        with transaction.atomic():
+            Transacao.objects.filter(id__in=[linha['id'] for linha in linhas]).update(
+                pago=True,
+                seq=novos_seqs((linha['id'], linha['usuario_id']) for linha in linhas),
+            )
+            for conta_id, lista in movimentos.items():
+                aplicar_movimentos_mensais(conta_id, lista)
+            _aplicar_deltas_de_saldo(deltas, usuario_por_conta)
+            for usuario_id in set(usuario_por_conta.values()):
+                registrar_escrita_em_lote(Transacao, usuario_id)
+        total += len(linhas)
+    return total
+
+
+@rastreado()
+def recategorizar_transacoes(transacoes, categoria: Categoria):
+    """
+    Move para ``categoria`` as transações de ``transacoes`` que são do mesmo
+    usuário da categoria, com UPDATEs em lote. O saldo não muda; os totais
+    mensais dos orçamentos passam de uma categoria para a outra.
+    Retorna quantas transações mudaram.
+    """
+    total = 0
+    alvo = transacoes.filter(usuario_id=categoria.usuario_id).exclude(categoria=categoria)
+    for linhas in _em_lotes(alvo, ('usuario_id', 'categoria_id', 'data', 'tipo', 'valor', 'descricao')):
+        gastos = []
+        pares = []
+        for linha in linhas:
+            gastos += movimentos_de_gasto(linha['tipo'], linha['categoria_id'], linha['data'], linha['valor'], -1)
+            gastos += movimentos_de_gasto(linha['tipo'], categoria.id, linha['data'], linha['valor'])
+            pares += [(linha['descricao'], linha['categoria_id'], -1), (linha['descricao'], categoria.id, 1)]
+
+        with transaction.atomic():
+            Transacao.objects.filter(id__in=[linha['id'] for linha in linhas]).update(
+                categoria=categoria,
+                seq=novos_seqs((linha['id'], linha['usuario_id']) for linha in linhas),
+            )
+            aplicar_gastos(gastos)
+            atualizar_indice(categoria.usuario_id, pares)
+            registrar_escrita_em_lote(Transacao, categoria.usuario_id)
+        total += len(linhas)
+    return total
+
+
+def saldo_em_data(conta: Conta, data):
+    """
+    Retorna o saldo da conta ao fim do dia ``data``.
+
+    Lê o checkpoint do mês anterior em SaldoMensal e soma apenas as
+    transações do próprio mês até a data.
+    """
+    mes = inicio_do_mes(data)
+    checkpoint = (
+        SaldoMensal.objects.filter(conta=conta, mes__lt=mes)
+        .order_by('-mes')
+        .values('total_pago', 'total_pendente')
+        .first()
+    ) or {'total_pago': Decimal('0'), 'total_pendente': Decimal('0')}
+
+    movimento_mes = (
+        modelo_do_periodo(conta.usuario_id, mes).objects.filter(conta=conta, data__gte=mes, data__lte=data)
+        .values('pago')
+        .annotate(
+            entradas=Sum('valor', filter=Q(tipo='entrada')),
+            saidas=Sum('valor', filter=Q(tipo='saida')),
+        )
+        .order_by()
+    )
+
+    total_pago = checkpoint['total_pago']
+    total_pendente = checkpoint['total_pendente']
+    for linha in movimento_mes:
+        efeito = (linha['entradas'] or 0) - (linha['saidas'] or 0)
+        if linha['pago']:
+            total_pago += efeito
+        else:
+            total_pendente += efeito
+
+    saldo_inicial = conta.saldo_inicial or Decimal('0')
+    return {
+        "conta_id": conta.id,
+        "data": data,
+        "saldo_inicial": saldo_inicial,
+        "movimento_pago": total_pago,
+        "movimento_pendente": total_pendente,
+        "saldo_pago": saldo_inicial + total_pago,
+        "saldo": saldo_inicial + total_pago + total_pendente,
+    }
+
+
+def _fins_de_periodo(inicio, fim, granularidade):
+    """Data de fechamento de cada período (dia, semana ou mês) entre inicio e fim."""
+    if granularidade == 'diaria':
+        return [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+
+    fins = []
+    atual = inicio
+    while atual <= fim:
+        if granularidade == 'semanal':
+            fim_periodo = atual + timedelta(days=6 - atual.weekday())
+        else:
+            fim_periodo = atual.replace(day=1) + relativedelta(months=1) - timedelta(days=1)
+        fins.append(min(fim_periodo, fim))
+        atual = fim_periodo + timedelta(days=1)
+    return fins
+
+
+def _reduzir_pontos(fins, max_pontos):
+    """Mantém no máximo ``max_pontos`` datas igualmente espaçadas, sempre incluindo a última."""
+    if len(fins) <= max_pontos:
+        return fins
+    passo = -(-len(fins) // max_pontos)
+    return fins[::-1][::passo][::-1]
+
+
+@rastreado()
+@leitura_replica
+def obter_historico_saldos(usuario, from_date, to_date, granularidade='diaria', conta_id=None, max_pontos=None):
+    """
+    Série de saldos por conta (e total) no fechamento de cada período.
+
+    O saldo de partida vem dos checkpoints mensais; dentro do intervalo os
+    deltas diários são agrupados no banco e acumulados com ``accumulate``.
+    O resultado fica em cache até a próxima escrita em transações ou contas.
+    """
+    max_pontos = max_pontos or settings.HISTORICO_SALDO_MAX_PONTOS
+    chave = chave_cache(
+        'historico_saldo', usuario.pk, ('transacoes', 'contas'),
+        from_date, to_date, granularidade, conta_id, max_pontos
+    )
+    resultado = cache.get(chave)
+    if resultado is not None:
+        return resultado
+
+    contas = Conta.objects.filter(usuario=usuario).order_by('nome')
+    if conta_id is not None:
+        contas = contas.filter(id=conta_id)
+    contas = list(contas)
+
+    fins = _reduzir_pontos(_fins_de_periodo(from_date, to_date, granularidade), max_pontos)
+
+    movimentos = (
+        modelo_do_periodo(usuario.pk, from_date).objects
+        .filter(conta__in=contas, data__gte=from_date, data__lte=to_date)
+        .values('conta_id', 'data')
+        .annotate(
+            entradas=Sum('valor', filter=Q(tipo='entrada')),
+            saidas=Sum('valor', filter=Q(tipo='saida')),
+        )
+        .order_by('conta_id', 'data')
+    )
+    deltas = defaultdict(lambda: ([], []))
+    for linha in movimentos:
+        datas, efeitos = deltas[linha['conta_id']]
+        datas.append(linha['data'])
+        efeitos.append((linha['entradas'] or 0) - (linha['saidas'] or 0))
+
+    vespera = from_date - timedelta(days=1)
+    total = [Decimal('0')] * len(fins)
+    series = []
+    for conta in contas:
+        datas, efeitos = deltas.get(conta.id, ([], []))
+        acumulados = list(accumulate(efeitos, initial=saldo_em_data(conta, vespera)['saldo']))
+        saldos = [acumulados[bisect_right(datas, fim)] for fim in fins]
+        total = [a + b for a, b in zip(total, saldos)]
+        series.append({"conta_id": conta.id, "nome": conta.nome, "saldos": saldos})
+
+    resultado = {
+        "granularidade": granularidade,
+        "from_date": from_date,
+        "to_date": to_date,
+        "datas": fins,
+        "contas": series,
+        "total": total,
+    }
+    cache.set(chave, resultado, settings.HISTORICO_SALDO_CACHE_TTL)
+    return resultado
+
+
+def _ocorrencias(inicio, recorrencia, depois_de, ate):
+    """Datas ``inicio + k * passo`` no intervalo (depois_de, ate]."""
+    passo, dias_maximos = PASSOS_RECORRENCIA[recorrencia]
+    # Pula direto para perto de ``depois_de`` em vez de andar desde o início.
+    # Dividir pelo passo mais longo nunca passa de ``depois_de``; o laço
+    # anda o resto.
+    k = max(1, (depois_de - inicio).days // dias_maximos)
+    datas = []
+    while True:
+        data = inicio + passo * k
+        if data > ate:
+            return datas
+        if data > depois_de:
+            datas.append(data)
+        k += 1
+
+
+def _parcelas_pede_meia_previstas(usuario, hoje, fim):
+    """Parcelas futuras do cronograma do Pé-de-Meia que ainda não viraram transação."""
+    perfil = PerfilAluno.objects.filter(usuario=usuario).first()
+    if perfil is None or perfil.concluiu:
+        return []
+
+    existentes = list(
+        Transacao.objects.filter(usuario=usuario, tipo='entrada', descricao__icontains="Pé-de-Meia")
+        .values_list('descricao', 'data')
+    )
+    # Só projeta para quem já recebe o benefício.
+    if not existentes:
+        return []
+
+    lancadas = set()
+    for descricao, data in existentes:
+        if 'Matrícula' in descricao:
+            lancadas.add(('matricula', data.year))
+        else:
+            lancadas.add(('frequencia', data.year, data.month))
+
+    previstas = []
+    for ano in range(hoje.year, fim.year + 1):
+        serie = perfil.serie_em + (ano - hoje.year)
+        if serie > 3:
+            break
+        referencia = hoje if ano == hoje.year else date(ano, 1, 1)
+        for parcela in cronograma_pede_meia(serie, hoje=referencia):
+            data = parcela['data']
+            if parcela['parcela'] == 'matricula':
+                chave = ('matricula', data.year)
+            else:
+                chave = ('frequencia', data.year, data.month)
+            if hoje < data <= fim and chave not in lancadas:
+                previstas.append((data, Decimal(str(parcela['valor']))))
+    return previstas
+
+
+def _primeiro_negativo(datas, saldos):
+    return next((data for data, saldo in zip(datas, saldos) if saldo < 0), None)
+
+
+@rastreado()
+@leitura_replica
+def projetar_fluxo_caixa(usuario, meses=3, conta_id=None, incluir_pede_meia=True, hoje=None):
+    """
+    Projeção diária do saldo de cada conta para os próximos ``meses``.
+
+    Parte do saldo pago de hoje e soma, na data prevista, as transações
+    pendentes (pelo vencimento), as parcelas futuras do Pé-de-Meia e as
+    repetições de lembretes recorrentes vinculados a uma transação. Os
+    eventos são somados em um vetor de deltas por dia e acumulados com
+    ``accumulate``; pendências vencidas entram no primeiro dia.
+    """
+    hoje = hoje or timezone.localdate()
+    fim = hoje + relativedelta(months=meses)
+    total_dias = (fim - hoje).days + 1
+    datas = [hoje + timedelta(days=i) for i in range(total_dias)]
+
+    contas = Conta.objects.filter(usuario=usuario).order_by('nome')
+    if conta_id is not None:
+        contas = contas.filter(id=conta_id)
+    contas = list(contas)
+    deltas = {conta.id: [Decimal('0')] * total_dias for conta in contas}
+
+    def somar(conta_id, data, efeito):
+        if conta_id in deltas and data <= fim:
+            deltas[conta_id][max((data - hoje).days, 0)] += efeito
+
+    pendentes = (
+        Transacao.objects.filter(conta__in=contas)
+        .filter(Q(pago=False) | Q(data__gt=hoje))
+        .annotate(dia=Case(When(pago=True, then=F('data')), default=Coalesce('vencimento', 'data')))
+        .filter(dia__lte=fim)
+        .values('conta_id', 'dia')
+        .annotate(
+            entradas=Sum('valor', filter=Q(tipo='entrada')),
+            saidas=Sum('valor', filter=Q(tipo='saida')),
+        )
+        .order_by()
+    )
+    eventos = {"pendentes": 0, "pede_meia": 0, "lembretes": 0}
+    for linha in pendentes:
+        somar(linha['conta_id'], linha['dia'], (linha['entradas'] or 0) - (linha['saidas'] or 0))
+        eventos["pendentes"] += 1
+
+    if incluir_pede_meia:
+        conta_padrao = Conta.objects.filter(usuario=usuario).values_list('id', flat=True).first()
+        for data, valor in _parcelas_pede_meia_previstas(usuario, hoje, fim):
+            somar(conta_padrao, data, valor)
+            eventos["pede_meia"] += 1
+
+    lembretes = (
+        Lembrete.objects.filter(usuario=usuario, ativo=True, transacao__conta__in=contas)
+        .exclude(recorrencia='nenhuma')
+        .values_list('recorrencia', 'transacao__conta_id', 'transacao__tipo',
+                     'transacao__valor', 'transacao__vencimento', 'transacao__data')
+    )
+    for recorrencia, conta_tx, tipo, valor, vencimento, data in lembretes:
+        if recorrencia not in PASSOS_RECORRENCIA:
+            continue
+        # A própria transação já está no saldo ou nas pendências.
+        ancora = vencimento or data
+        efeito = valor if tipo == 'entrada' else -valor
+        for ocorrencia in _ocorrencias(ancora, recorrencia, max(ancora, hoje), fim):
+            somar(conta_tx, ocorrencia, efeito)
+            eventos["lembretes"] += 1
+
+    total = [Decimal('0')] * total_dias
+    series = []
+    for conta in contas:
+        saldo_hoje = saldo_em_data(conta, hoje)['saldo_pago']
+        saldos = list(accumulate(deltas[conta.id], initial=saldo_hoje))[1:]
+        total = [a + b for a, b in zip(total, saldos)]
+        series.append({
+            "conta_id": conta.id,
+            "nome": conta.nome,
+            "saldo_hoje": saldo_hoje,
+            "saldos": saldos,
+            "menor_saldo": min(saldos),
+            "primeiro_negativo": _primeiro_negativo(datas, saldos),
+        })
+
+    return {
+        "from_date": hoje,
+        "to_date": fim,
+        "datas": datas,
+        "contas": series,
+        "total": {
+            "saldos": total,
+            "menor_saldo": min(total),
+            "primeiro_negativo": _primeiro_negativo(datas, total),
+        },
+        "eventos": eventos,
+    }
+
+
+@rastreado()
+@leitura_replica
 def gerar_relatorio_financeiro_pdf(usuario, from_date=None, to_date=None):
     """
     Gera relatório financeiro em PDF com resumo, gráficos de dados e transações.
@@ -251,29 +717,17 @@ def gerar_relatorio_financeiro_pdf(usuario, from_date=None, to_date=None):
         filters["data__lte"] = to_date
     
     # Calcular resumo financeiro
-    total_entradas = (
-        Transacao.objects.filter(**filters, tipo="entrada", pago=True)
-        .aggregate(Sum("valor"))["valor__sum"] or 0
-    )
-    
-    total_saidas = (
-        Transacao.objects.filter(**filters, tipo="saida", pago=True)
-        .aggregate(Sum("valor"))["valor__sum"] or 0
-    )
+    total_entradas = somar_pagas(usuario, filters, "entrada")
+    total_saidas = somar_pagas(usuario, filters, "saida")
     
     saldo_liquido = total_entradas - total_saidas
     
     # Gastos por categoria
-    gastos_categoria = list(
-        Transacao.objects.filter(**filters, tipo="saida", pago=True)
-        .values('categoria__nome')
-        .annotate(total=Sum('valor'))
-        .order_by('-total')
-    )
+    gastos_categoria = somar_pagas(usuario, filters, "saida", agrupar_por='categoria__nome')
     
     # Entradas Pé-de-Meia
     total_pede_meia = (
-        Transacao.objects.filter(usuario=usuario, tipo='entrada', 
+        modelo_do_periodo(usuario.pk).objects.filter(usuario=usuario, tipo='entrada', 
                                  descricao__icontains="Pé-de-Meia", pago=True)
         .aggregate(Sum('valor'))['valor__sum'] or 0
     )
@@ -287,7 +741,7 @@ def gerar_relatorio_financeiro_pdf(usuario, from_date=None, to_date=None):
     
     # Transações recentes (últimas 20)
     transacoes_recentes = list(
-        Transacao.objects.filter(**filters)
+        modelo_do_periodo(usuario.pk, from_date).objects.filter(**filters)
         .values('data', 'tipo', 'descricao', 'valor', 'categoria__nome')
         .order_by('-data')[:20]
     )
@@ -447,130 +901,145 @@ def gerar_relatorio_financeiro_pdf(usuario, from_date=None, to_date=None):
     ))
     
     # Gerar PDF
-    doc.build(elements)
+    with span('reportlab.build', elementos=len(elements),
+              transacoes=len(transacoes_recentes)) as build_span:
+        doc.build(elements)
+        build_span.definir(bytes=buffer.tell())
     buffer.seek(0)
     
     return buffer
 
 
-def obter_dados_dashboard(usuario, from_date=None, to_date=None):
-    """
-    Retorna dados otimizados para dashboard do frontend.
-    
-    Args:
-        usuario: Usuário do Django
-        from_date: Data inicial (datetime.date) - opcional
-        to_date: Data final (datetime.date) - opcional
-    
-    Returns:
-        Dict com estrutura pronta para frontend
-    """
-    filters = {"usuario": usuario}
-    if from_date:
-        filters["data__gte"] = from_date
-    if to_date:
-        filters["data__lte"] = to_date
-    
-    # Totalizadores
-    total_entradas = (
-        Transacao.objects.filter(**filters, tipo="entrada", pago=True)
-        .aggregate(Sum("valor"))["valor__sum"] or Decimal('0')
-    )
-    total_saidas = (
-        Transacao.objects.filter(**filters, tipo="saida", pago=True)
-        .aggregate(Sum("valor"))["valor__sum"] or Decimal('0')
-    )
-    saldo_liquido = total_entradas - total_saidas
-    
-    # Gastos por categoria (para gráfico)
-    gastos_categoria = list(
-        Transacao.objects.filter(**filters, tipo="saida", pago=True)
-        .values('categoria__nome')
-        .annotate(total=Sum('valor'))
-        .order_by('-total')
-    )
-    
-    # Entradas por categoria (para gráfico)
-    entradas_categoria = list(
-        Transacao.objects.filter(**filters, tipo="entrada", pago=True)
-        .values('categoria__nome')
-        .annotate(total=Sum('valor'))
-        .order_by('-total')
-    )
-    
-    # Pé-de-Meia
-    pede_meia_recebido = (
-        Transacao.objects.filter(usuario=usuario, tipo='entrada', 
-                                 descricao__icontains="Pé-de-Meia", pago=True)
-        .aggregate(Sum('valor'))['valor__sum'] or Decimal('0')
-    )
-    
-    pede_meia_pendente = (
-        Transacao.objects.filter(usuario=usuario, tipo='entrada',
-                                 descricao__icontains="Pé-de-Meia", pago=False)
-        .aggregate(Sum('valor'))['valor__sum'] or Decimal('0')
-    )
-    
-    # Incentivos
-    incentivos_conclusao = list(
-        Incentivo.objects.filter(usuario=usuario, tipo='conclusao')
-        .values('id', 'ano', 'valor', 'liberado', 'criado_em')
-    )
-    
-    incentivos_enem = list(
-        Incentivo.objects.filter(usuario=usuario, tipo='enem')
-        .values('id', 'ano', 'valor', 'liberado', 'criado_em')
+def _dashboard_resumo(usuario, filtros):
+    total_entradas = somar_pagas(usuario, filtros, "entrada")
+    total_saidas = somar_pagas(usuario, filtros, "saida")
+    pede_meia = (
+        modelo_do_periodo(usuario.pk).objects.filter(usuario=usuario, tipo='entrada', descricao__icontains="Pé-de-Meia")
+        .aggregate(
+            recebido=Sum('valor', filter=Q(pago=True)),
+            pendente=Sum('valor', filter=Q(pago=False)),
+        )
     )
-    
-    # Saldos por conta
-    saldos_contas = list(
+    return {
+        "total_entradas": total_entradas,
+        "total_saidas": total_saidas,
+        "saldo_liquido": total_entradas - total_saidas,
+        "pede_meia_recebido": pede_meia['recebido'] or Decimal('0'),
+        "pede_meia_pendente": pede_meia['pendente'] or Decimal('0'),
+    }
+
+
+def _dashboard_graficos(usuario, filtros):
+    def por_categoria(tipo):
+        return somar_pagas(usuario, filtros, tipo, agrupar_por='categoria__nome')
+
+    return {
+        "gastos_categoria": por_categoria("saida"),
+        "entradas_categoria": por_categoria("entrada"),
+    }
+
+
+def _dashboard_incentivos(usuario, filtros):
+    incentivos = {"conclusao": [], "enem": []}
+    for incentivo in (
+        Incentivo.objects.filter(usuario=usuario, tipo__in=incentivos)
+        .values('id', 'tipo', 'ano', 'valor', 'liberado', 'criado_em')
+    ):
+        incentivos[incentivo.pop('tipo')].append(incentivo)
+    return incentivos
+
+
+def _dashboard_contas(usuario, filtros):
+    return list(
         Conta.objects.filter(usuario=usuario)
         .values('id', 'nome', 'saldo_inicial', 'saldo_atual')
         .order_by('nome')
     )
-    
-    # Metas financeiras
-    metas = list(
+
+
+def _dashboard_metas(usuario, filtros):
+    return list(
         MetaFinanceira.objects.filter(usuario=usuario)
         .values('id', 'nome', 'valor_alvo', 'data_alvo', 'ativa')
     )
-    
-    # Transações recentes
-    transacoes_recentes = list(
-        Transacao.objects.filter(**filters)
+
+
+def _dashboard_transacoes_recentes(usuario, filtros):
+    return list(
+        modelo_do_periodo(usuario.pk, filtros.get('data__gte')).objects.filter(**filtros)
         .values('id', 'data', 'tipo', 'descricao', 'valor', 'categoria__nome', 'pago')
         .order_by('-data')[:15]
     )
-    
-    # Converter Decimal para float para JSON serialization
-    def convert_decimals(obj):
-        if isinstance(obj, list):
-            return [convert_decimals(item) for item in obj]
-        elif isinstance(obj, dict):
-            return {k: float(v) if isinstance(v, Decimal) else v for k, v in obj.items()}
-        elif isinstance(obj, Decimal):
-            return float(obj)
-        return obj
-    
-    dashboard_data = {
-        "resumo": {
-            "total_entradas": float(total_entradas),
-            "total_saidas": float(total_saidas),
-            "saldo_liquido": float(saldo_liquido),
-            "pede_meia_recebido": float(pede_meia_recebido),
-            "pede_meia_pendente": float(pede_meia_pendente),
-        },
-        "graficos": {
-            "gastos_categoria": convert_decimals(gastos_categoria),
-            "entradas_categoria": convert_decimals(entradas_categoria),
-        },
-        "incentivos": {
-            "conclusao": convert_decimals(incentivos_conclusao),
-            "enem": convert_decimals(incentivos_enem),
-        },
-        "contas": convert_decimals(saldos_contas),
-        "metas": convert_decimals(metas),
-        "transacoes_recentes": convert_decimals(transacoes_recentes),
-    }
-    
+
+
+# Seção -> (cálculo, escopos de versão que a invalidam, depende do período).
+SECOES_DASHBOARD = {
+    "resumo": (_dashboard_resumo, ('transacoes',), True),
+    "graficos": (_dashboard_graficos, ('transacoes',), True),
+    "incentivos": (_dashboard_incentivos, ('incentivos',), False),
+    "contas": (_dashboard_contas, ('contas',), False),
+    "metas": (_dashboard_metas, ('metas',), False),
+    "transacoes_recentes": (_dashboard_transacoes_recentes, ('transacoes',), True),
+}
+
+
+def escopos_dashboard(secoes):
+    return tuple(sorted({escopo for secao in secoes for escopo in SECOES_DASHBOARD[secao][1]}))
+
+
+@rastreado()
+@leitura_replica
+def obter_dados_dashboard(usuario, from_date=None, to_date=None, secoes=None):
+    """
+    Retorna dados otimizados para dashboard do frontend.
+
+    Só as ``secoes`` pedidas (padrão: todas de ``SECOES_DASHBOARD``) são
+    consultadas. Cada seção fica em cache separadamente, com chave pelos
+    tokens de versão dos seus escopos: uma escrita em metas não invalida
+    os gráficos.
+
+    Args:
+        usuario: Usuário do Django
+        from_date: Data inicial (datetime.date) - opcional
+        to_date: Data final (datetime.date) - opcional
+        secoes: Nomes das seções desejadas - opcional
+
+    Returns:
+        Dict com estrutura pronta para frontend (valores monetários em Decimal)
+    """
+    pedidas = set(SECOES_DASHBOARD if secoes is None else secoes)
+    desconhecidas = pedidas.difference(SECOES_DASHBOARD)
+    if desconhecidas:
+        raise ValueError(f"Seções desconhecidas: {', '.join(sorted(desconhecidas))}.")
+    secoes = [secao for secao in SECOES_DASHBOARD if secao in pedidas]
+
+    filtros = {"usuario": usuario}
+    if from_date:
+        filtros["data__gte"] = from_date
+    if to_date:
+        filtros["data__lte"] = to_date
+
+    escopos = escopos_dashboard(secoes)
+    tokens = dict(zip(escopos, versoes(usuario.pk, *escopos)))
+    chaves = {}
+    for secao in secoes:
+        _, escopos_secao, usa_periodo = SECOES_DASHBOARD[secao]
+        periodo = (from_date, to_date) if usa_periodo else ()
+        chaves[secao] = ':'.join(
+            ['dashboard', secao, str(usuario.pk), *map(str, periodo), *(tokens[e] for e in escopos_secao)]
+        )
+
+    guardadas = cache.get_many(chaves.values())
+    novas = {}
+    # Os Decimals vão crus: o renderer JSON os codifica (ver core.renderers).
+    dashboard_data = {}
+    for secao, chave in chaves.items():
+        if chave in guardadas:
+            dashboard_data[secao] = guardadas[chave]
+        else:
+            dashboard_data[secao] = novas[chave] = SECOES_DASHBOARD[secao][0](usuario, filtros)
+    if novas:
+        cache.set_many(novas, settings.DASHBOARD_CACHE_TTL)
+
+    anotar(secoes=len(secoes), secoes_em_cache=len(guardadas))
     return dashboard_data
\ No newline at end of file
@@ -1,75 +1,184 @@
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from decimal import Decimal
-from .models import Transacao, Conta, PerfilAluno
+from django.contrib.auth.models import User
+from .models import Transacao, Conta, PerfilAluno, Sincronizavel, SequenciaUsuario, Exclusao
+from .routers import marcar_escrita
+from .versoes import ESCOPOS_POR_MODELO, invalidar
+from .saldos_mensais import efeito_transacao, efeito_no_saldo, aplicar_movimento_mensal, inicio_do_mes
+from .orcamentos import aplicar_gastos, movimentos_de_gasto
+from .categorizacao import atualizar_indice
+from .gatilhos_saldo import gatilhos_saldo_ativos
+
+def _exclusao_do_usuario(origin):
+    # Em exclusões em cascata a partir do usuário, os registros derivados
+    # (versões, checkpoints, saldos) também estão sendo removidos.
+    modelo = getattr(origin, 'model', None) or type(origin)
+    return modelo is User
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def registrar_escrita_do_usuario(sender, instance, **kwargs):
+    if sender._meta.app_label != 'core' or _exclusao_do_usuario(kwargs.get('origin')):
+        return
+
+    registrar_escrita_em_lote(sender, getattr(instance, 'usuario_id', None))
+
+
+def registrar_escrita_em_lote(sender, usuario_id):
+    """
+    O que os signals de escrita fazem por registro, para quem grava com
+    ``bulk_create``/``update`` (que não disparam signals).
+    """
+    marcar_escrita(usuario_id)
+    escopos = ESCOPOS_POR_MODELO.get(sender._meta.model_name)
+    if escopos:
+        invalidar(usuario_id, *escopos)
+
+
+@receiver(post_delete)
+def registrar_exclusao_sincronizavel(sender, instance, origin=None, **kwargs):
+    if not isinstance(instance, Sincronizavel) or _exclusao_do_usuario(origin):
+        return
+    Exclusao.objects.create(
+        usuario_id=instance.usuario_id,
+        modelo=sender._meta.model_name,
+        objeto_id=instance.pk,
+        seq=SequenciaUsuario.reservar(instance.usuario_id),
+    )
+
 
 def _apply_change_to_account(conta: Conta, delta):
     conta.saldo_atual = (conta.saldo_atual or Decimal('0.00')) + Decimal(delta)
     conta.save(update_fields=['saldo_atual'])
 
 
+def _recarregar_conta(instance: Transacao):
+    # Os triggers mudaram o saldo no banco; a conta em memória não pode
+    # ficar com o valor antigo, senão um save() dela desfaria a mudança.
+    if Transacao.conta.is_cached(instance):
+        try:
+            instance.conta.refresh_from_db(fields=['saldo_atual', 'seq'])
+        except Conta.DoesNotExist:
+            pass
+
+
+def _atualizar_saldos_mensais(instance: Transacao, created):
+    novo_efeito = efeito_transacao(instance.tipo, instance.valor)
+    old_val = getattr(instance, '_original_valor', None)
+
+    if created or old_val is None:
+        aplicar_movimento_mensal(instance.conta_id, instance.data, novo_efeito, instance.pago)
+        return
+
+    old_conta_id = getattr(instance, '_original_conta_id', None)
+    old_data = getattr(instance, '_original_data', None) or instance.data
+    old_pago = getattr(instance, '_original_pago', instance.pago)
+    old_efeito = efeito_transacao(getattr(instance, '_original_tipo', instance.tipo), old_val)
+
+    mesmo_checkpoint = (
+        old_conta_id == instance.conta_id
+        and old_pago == instance.pago
+        and inicio_do_mes(old_data) == inicio_do_mes(instance.data)
+    )
+    if mesmo_checkpoint:
+        aplicar_movimento_mensal(instance.conta_id, instance.data, novo_efeito - old_efeito, instance.pago)
+    else:
+        aplicar_movimento_mensal(old_conta_id, old_data, -old_efeito, old_pago)
+        aplicar_movimento_mensal(instance.conta_id, instance.data, novo_efeito, instance.pago)
+
+
+def _atualizar_gastos(instance: Transacao, created):
+    movimentos = movimentos_de_gasto(instance.tipo, instance.categoria_id, instance.data, instance.valor)
+    old_val = getattr(instance, '_original_valor', None)
+    if not created and old_val is not None:
+        movimentos += movimentos_de_gasto(
+            getattr(instance, '_original_tipo', instance.tipo),
+            getattr(instance, '_original_categoria_id', instance.categoria_id),
+            getattr(instance, '_original_data', None) or instance.data,
+            old_val,
+            sinal=-1,
+        )
+    aplicar_gastos(movimentos)
+
+
+def _atualizar_indice_categorias(instance: Transacao, created):
+    pares = [(instance.descricao, instance.categoria_id, 1)]
+    if not created:
+        old_descricao = getattr(instance, '_original_descricao', instance.descricao)
+        old_categoria_id = getattr(instance, '_original_categoria_id', instance.categoria_id)
+        if old_descricao == instance.descricao and old_categoria_id == instance.categoria_id:
+            return
+        pares.append((old_descricao, old_categoria_id, -1))
+    atualizar_indice(instance.usuario_id, pares)
+
+
+def _atualizar_saldo_conta(instance: Transacao, created):
+    parcela = instance.plano_id is not None
+    new_effect = efeito_no_saldo(instance.tipo, instance.valor, instance.pago, parcela)
+    old_val = getattr(instance, '_original_valor', None)
+
+    if created or old_val is None:
+        if new_effect:
+            _apply_change_to_account(instance.conta, new_effect)
+        return
+
+    old_conta_id = getattr(instance, '_original_conta_id', None)
+    old_effect = efeito_no_saldo(
+        getattr(instance, '_original_tipo', instance.tipo),
+        old_val,
+        getattr(instance, '_original_pago', instance.pago),
+        parcela,
+    )
+
+    if old_conta_id and old_conta_id != instance.conta_id:
+        try:
+            _apply_change_to_account(Conta.objects.get(pk=old_conta_id), -old_effect)
+        except Conta.DoesNotExist:
+            pass
+        _apply_change_to_account(instance.conta, new_effect)
+    elif new_effect != old_effect:
+        _apply_change_to_account(instance.conta, new_effect - old_effect)
+
+
 @receiver(post_save, sender=Transacao)
 def transacao_post_save(sender, instance: Transacao, created, **kwargs):
-    from decimal import Decimal
+    _atualizar_saldos_mensais(instance, created)
+    _atualizar_gastos(instance, created)
+    _atualizar_indice_categorias(instance, created)
 
-    if created:
-        delta = Decimal(instance.valor)
-        if instance.tipo == 'saida':
-            delta = -delta
-        _apply_change_to_account(instance.conta, delta)
+    if gatilhos_saldo_ativos(kwargs.get('using')):
+        _recarregar_conta(instance)
     else:
-        old_val = getattr(instance, '_original_valor', None)
-        old_tipo = getattr(instance, '_original_tipo', None)
-        old_conta_id = getattr(instance, '_original_conta_id', None)
-
-        new_val = instance.valor
-        new_tipo = instance.tipo
-        new_conta_id = instance.conta_id
-
-        if old_conta_id and old_conta_id != new_conta_id:
-            try:
-                old_conta = Conta.objects.get(pk=old_conta_id)
-                old_delta = Decimal(old_val)
-                if old_tipo == 'saida':
-                    old_delta = -old_delta
-                _apply_change_to_account(old_conta, -old_delta)  
-            except Conta.DoesNotExist:
-                pass
-
-            new_delta = Decimal(new_val)
-            if new_tipo == 'saida':
-                new_delta = -new_delta
-            _apply_change_to_account(instance.conta, new_delta)
-        else:
-            if old_val is None:
-                delta = Decimal(new_val)
-                if new_tipo == 'saida':
-                    delta = -delta
-                _apply_change_to_account(instance.conta, delta)
-            else:
-                old_effect = Decimal(old_val)
-                if old_tipo == 'saida':
-                    old_effect = -old_effect
-                new_effect = Decimal(new_val)
-                if new_tipo == 'saida':
-                    new_effect = -new_effect
-                delta_effect = new_effect - old_effect
-                if delta_effect != 0:
-                    _apply_change_to_account(instance.conta, delta_effect)
-
-        instance._original_valor = instance.valor
-        instance._original_tipo = instance.tipo
-        instance._original_conta_id = instance.conta_id
+        _atualizar_saldo_conta(instance, created)
+
+    instance._original_valor = instance.valor
+    instance._original_tipo = instance.tipo
+    instance._original_conta_id = instance.conta_id
+    instance._original_pago = instance.pago
+    instance._original_data = instance.data
+    instance._original_categoria_id = instance.categoria_id
+    instance._original_descricao = instance.descricao
 
 
 @receiver(post_delete, sender=Transacao)
 def transacao_post_delete(sender, instance: Transacao, **kwargs):
-    from decimal import Decimal
-    delta = Decimal(instance.valor)
-    if instance.tipo == 'saida':
-        delta = -delta
+    if _exclusao_do_usuario(kwargs.get('origin')):
+        return
+    aplicar_movimento_mensal(
+        instance.conta_id, instance.data, -efeito_transacao(instance.tipo, instance.valor), instance.pago
+    )
+    aplicar_gastos(movimentos_de_gasto(instance.tipo, instance.categoria_id, instance.data, instance.valor, sinal=-1))
+    atualizar_indice(instance.usuario_id, [(instance.descricao, instance.categoria_id, -1)])
+    if gatilhos_saldo_ativos(kwargs.get('using')):
+        _recarregar_conta(instance)
+        return
+    efeito = efeito_no_saldo(instance.tipo, instance.valor, instance.pago, instance.plano_id is not None)
+    if not efeito:
+        return
     try:
         conta = instance.conta
-        _apply_change_to_account(conta, -delta)
+        _apply_change_to_account(conta, -efeito)
     except Conta.DoesNotExist:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import timedelta
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import (
+    Categoria, Conta, Transacao, MetaFinanceira, Lembrete, Notificacao,
+    Exclusao, SequenciaUsuario,
+)
+from .serializers import CategoriaSerializer, ContaSerializer, TransacaoSerializer, MetaFinanceiraSerializer
+from .serializers_actions import LembreteSerializer, NotificacaoSerializer
+
+# modelo -> (serializer, select_related)
+FONTES = {
+    Categoria: (CategoriaSerializer, ()),
+    Conta: (ContaSerializer, ()),
+    Transacao: (TransacaoSerializer, ('categoria', 'conta')),
+    MetaFinanceira: (MetaFinanceiraSerializer, ('conta_vinculada',)),
+    Lembrete: (LembreteSerializer, ()),
+    Notificacao: (NotificacaoSerializer, ()),
+}
+
+
+class CursorExpiradoError(Exception):
+    pass
+
+
+def alteracoes_desde(usuario, since=0, limite=None, contexto=None):
+    """
+    Alterações do usuário com ``seq > since``, em ordem de ``seq``.
+
+    Cada tipo é lido pelo índice (usuario, seq) com no máximo ``limite + 1``
+    linhas, e as listas são intercaladas; o custo depende do tamanho da
+    página, não do histórico. Exclusões vêm como itens com ``excluido``.
+    """
+    limite = min(limite or settings.SYNC_LIMITE_PADRAO, settings.SYNC_LIMITE_MAXIMO)
+
+    horizonte = (
+        SequenciaUsuario.objects.filter(usuario=usuario)
+        .values_list('horizonte_exclusoes', flat=True).first()
+    ) or 0
+    if 0 < since < horizonte:
+        raise CursorExpiradoError(
+            "Cursor anterior às exclusões já purgadas; sincronize de novo com since=0."
+        )
+
+    fluxos = []
+    for modelo, (_, relacionados) in FONTES.items():
+        consulta = modelo.objects.filter(usuario=usuario, seq__gt=since).order_by('seq')
+        if relacionados:
+            consulta = consulta.select_related(*relacionados)
+        fluxos.append(list(consulta[:limite + 1]))
+    fluxos.append(list(
+        Exclusao.objects.filter(usuario=usuario, seq__gt=since).order_by('seq')[:limite + 1]
+    ))
+
+    pagina = list(islice(merge(*fluxos, key=lambda objeto: objeto.seq), limite + 1))
+    mais = len(pagina) > limite
+    pagina = pagina[:limite]
+
+    por_modelo = defaultdict(list)
+    for objeto in pagina:
+        if not isinstance(objeto, Exclusao):
+            por_modelo[type(objeto)].append(objeto)
+    dados = {}
+    for modelo, objetos in por_modelo.items():
+        serializer = FONTES[modelo][0](objetos, many=True, context=contexto or {})
+        for objeto, serializado in zip(objetos, serializer.data):
+            dados[(modelo, objeto.pk)] = serializado
+
+    itens = []
+    for objeto in pagina:
+        if isinstance(objeto, Exclusao):
+            itens.append({
+                "seq": objeto.seq, "tipo": objeto.modelo, "id": objeto.objeto_id,
+                "excluido": True, "dados": None,
+            })
+        else:
+            itens.append({
+                "seq": objeto.seq, "tipo": objeto._meta.model_name, "id": objeto.pk,
+                "excluido": False, "dados": dados[(type(objeto), objeto.pk)],
+            })
+
+    return {
+        "cursor": str(pagina[-1].seq if pagina else since),
+        "mais": mais,
+        "alteracoes": itens,
+    }
+
+
+def novos_seqs(linhas):
+    """
+    Expressão para ``update(seq=...)`` que dá um seq novo a cada
+    ``(id, usuario_id)`` de ``linhas``, com uma reserva por usuário. Para
+    UPDATEs em lote de modelos sincronizáveis, que não passam pelo ``save()``.
+    """
+    por_usuario = defaultdict(list)
+    for id_, usuario_id in linhas:
+        por_usuario[usuario_id].append(id_)
+    casos = []
+    for usuario_id, ids in por_usuario.items():
+        primeiro = SequenciaUsuario.reservar(usuario_id, len(ids)) - len(ids) + 1
+        casos += [When(id=id_, then=Value(primeiro + i)) for i, id_ in enumerate(ids)]
+    return Case(*casos, default=F('seq'), output_field=BigIntegerField())
+
+
+def purgar_exclusoes(dias=None, lote=1000):
+    """
+    Remove exclusões mais antigas que ``dias`` em lotes e avança o horizonte
+    de cada usuário, para que cursores anteriores peçam sincronização completa.
+    """
+    dias = settings.SYNC_RETENCAO_EXCLUSOES_DIAS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    removidas = 0
+    while True:
+        linhas = list(
+            Exclusao.objects.filter(excluida_em__lt=limite)
+            .order_by('id').values_list('id', 'usuario_id', 'seq')[:lote]
+        )
+        if not linhas:
+            return removidas
+
+        maior_seq = defaultdict(int)
+        for _, usuario_id, seq in linhas:
+            maior_seq[usuario_id] = max(maior_seq[usuario_id], seq)
+
+        with transaction.atomic():
+            for usuario_id, seq in maior_seq.items():
+                SequenciaUsuario.objects.filter(usuario_id=usuario_id).update(
+                    horizonte_exclusoes=Greatest('horizonte_exclusoes', seq)
+                )
+            removidas += Exclusao.objects.filter(id__in=[linha[0] for linha in linhas]).delete()[0]
@@ -0,0 +1,38 @@
+import pytest
+from django.contrib.auth.models import User
+from core.models import Categoria, Conta, PerfilAluno
+
+
+@pytest.fixture
+def user_factory(db):
+    def create_user(username="testuser", password="testpass123"):
+        user = User.objects.create_user(
+            username=username,
+            email=f"{username}@test.com",
+            password=password
+        )
+        PerfilAluno.objects.get_or_create(
+            usuario=user,
+            defaults={
+                'email': f"{username}@test.com",
+                'serie_em': 1
+            }
+        )
+        return user
+    return create_user
+
+@pytest.fixture
+def user(user_factory):
+    return user_factory(username="aluno_teste")
+
+@pytest.fixture
+def conta_factory(db):
+    def create_conta(usuario, nome="Principal", **campos):
+        return Conta.objects.create(usuario=usuario, nome=nome, **campos)
+    return create_conta
+
+@pytest.fixture
+def categoria_factory(db):
+    def create_categoria(usuario, nome, tipo_categoria="saida"):
+        return Categoria.objects.create(usuario=usuario, nome=nome, tipo_categoria=tipo_categoria)
+    return create_categoria
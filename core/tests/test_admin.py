@@ -0,0 +1,127 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.urls import reverse
+from core.models import Conta, Categoria, Transacao, GastoMensalCategoria, SaldoMensal
+from core.busca import buscar_transacoes, termo_fts
+from core.parcelamento import criar_plano_parcelado
+from core.saldos_mensais import reconstruir_saldos_mensais
+
+URL = reverse('admin:core_transacao_changelist')
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user)
+
+
+@pytest.fixture
+def lanche(categoria_factory, user):
+    return categoria_factory(user, 'Lanche')
+
+
+@pytest.fixture
+def transporte(categoria_factory, user):
+    return categoria_factory(user, 'Transporte')
+
+
+def _transacao(user, conta, categoria, descricao, valor='10.00', pago=False, data=date(2025, 3, 10)):
+    return Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                    valor=Decimal(valor), descricao=descricao, data=data, pago=pago)
+
+
+@pytest.mark.django_db
+class TestBuscaTextual:
+
+    def test_termo_fts(self):
+        assert termo_fts('uber  MAR') == '"uber"* "MAR"*'
+        assert termo_fts('"; DROP') == '"DROP"*'
+        assert termo_fts('') == ''
+
+    def test_busca_por_prefixo_sem_acentos_e_acompanha_escritas(self, user, conta, lanche):
+        a = _transacao(user, conta, lanche, 'Uber março')
+        _transacao(user, conta, lanche, 'Cantina da escola')
+        qs = Transacao.objects.all()
+
+        assert list(buscar_transacoes(qs, 'uber marc')) == [a]
+        assert list(buscar_transacoes(qs, 'MARÇO')) == [a]
+
+        a.descricao = 'Ônibus'
+        a.save()
+        assert not buscar_transacoes(qs, 'uber').exists()
+        assert list(buscar_transacoes(qs, 'onibus')) == [a]
+
+        Transacao.objects.filter(pk=a.pk).update(descricao='Metrô')
+        assert list(buscar_transacoes(qs, 'metro')) == [a]
+        a.delete()
+        assert not buscar_transacoes(qs, 'metro').exists()
+
+
+@pytest.mark.django_db
+class TestTransacaoAdmin:
+
+    def test_changelist_com_busca_e_filtro_por_id(self, admin_user, user, conta, lanche, transporte, client, django_assert_max_num_queries):
+        for i in range(30):
+            _transacao(user, conta, lanche if i % 2 else transporte, f'Gasto {i}')
+        client.force_login(admin_user)
+
+        with django_assert_max_num_queries(12):
+            response = client.get(URL)
+        assert response.status_code == 200
+        # As opções de categoria não são listadas inteiras no filtro.
+        assert 'Transporte</a></li>' not in response.content.decode()
+
+        response = client.get(URL, {'categoria': lanche.id, 'q': 'gasto'})
+        assert response.status_code == 200
+        assert response.context['cl'].result_count == 15
+
+    def test_paginador_estima_sem_filtro(self, admin_user, user, conta, lanche, client):
+        primeira = _transacao(user, conta, lanche, 'A')
+        _transacao(user, conta, lanche, 'B')
+        primeira.delete()
+        client.force_login(admin_user)
+
+        response = client.get(URL)
+        # Estimativa pelo maior id, sem COUNT(*): a linha excluída ainda conta.
+        assert response.context['cl'].paginator.count == 2
+        assert client.get(URL, {'pago__exact': 0}).context['cl'].paginator.count == 1
+
+    def test_acao_marcar_pagas_mantem_saldos(self, admin_user, user, conta, lanche, client):
+        avulsa = _transacao(user, conta, lanche, 'Avulsa', '10.00')
+        plano = criar_plano_parcelado(user, conta, lanche, 'saida', 'Fone', Decimal('60.00'), 3, date(2025, 3, 1))
+        parcelas = list(plano.parcelas_geradas.values_list('id', flat=True))
+        client.force_login(admin_user)
+
+        response = client.post(URL, {
+            'action': 'marcar_como_pagas', '_selected_action': [avulsa.id, *parcelas[:2]],
+        })
+        assert response.status_code == 302
+
+        assert Transacao.objects.filter(pago=True).count() == 3
+        conta.refresh_from_db()
+        # A avulsa já contava; só as duas parcelas entram agora.
+        assert conta.saldo_atual == Decimal('-50.00')
+        incremental = list(SaldoMensal.objects.filter(conta=conta).values_list('mes', 'total_pago', 'total_pendente'))
+        reconstruir_saldos_mensais([conta.id])
+        assert list(SaldoMensal.objects.filter(conta=conta).values_list(
+            'mes', 'total_pago', 'total_pendente')) == incremental
+
+    def test_acao_recategorizar(self, admin_user, user, conta, lanche, transporte, client):
+        ids = [_transacao(user, conta, lanche, f'T{i}').id for i in range(3)]
+        outro = User.objects.create_user(username='outro_admin', password='pass')
+        alheia = _transacao(outro, Conta.objects.create(usuario=outro, nome='X'),
+                            Categoria.objects.create(usuario=outro, nome='Y', tipo_categoria='saida'), 'Alheia')
+        seqs = dict(Transacao.objects.filter(id__in=ids).values_list('id', 'seq'))
+        client.force_login(admin_user)
+
+        client.post(URL, {
+            'action': 'recategorizar', 'categoria_id': transporte.id, '_selected_action': [*ids, alheia.id],
+        })
+
+        assert set(Transacao.objects.filter(id__in=ids).values_list('categoria_id', flat=True)) == {transporte.id}
+        alheia.refresh_from_db()
+        assert alheia.categoria.nome == 'Y'
+        assert all(t.seq > seqs[t.id] for t in Transacao.objects.filter(id__in=ids))
+        gastos = dict(GastoMensalCategoria.objects.filter(categoria__usuario=user).values_list('categoria', 'total'))
+        assert gastos == {lanche.id: Decimal('0.00'), transporte.id: Decimal('30.00')}
@@ -0,0 +1,257 @@
+import pytest
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from io import StringIO
+from rest_framework.test import APIClient
+from core.arquivo import VISAO_HISTORICO, arquivar_transacoes
+from core.models import (
+    Categoria, Conta, GastoMensalCategoria, Notificacao, ResumoAnual, SaldoMensal, Transacao,
+    TransacaoArquivada, TransacaoHistorico,
+)
+from core.orcamentos import reconstruir_gastos_mensais
+from core.saldos_mensais import reconstruir_saldos_mensais
+from core.services import gerar_relatorio_financeiro_pdf, obter_dados_dashboard, obter_historico_saldos, saldo_em_data
+from core.tests.test_gatilhos_saldo import _sem_gatilhos
+
+
+def _criar_cenario(nome='arquivo_user'):
+    user = User.objects.create_user(username=nome, password='pass123')
+    corrente = Conta.objects.create(usuario=user, nome='Corrente', saldo_inicial=Decimal('100.00'))
+    poupanca = Conta.objects.create(usuario=user, nome='Poupança')
+    mercado = Categoria.objects.create(usuario=user, nome='Mercado', tipo_categoria='saida')
+    salario = Categoria.objects.create(usuario=user, nome='Salário', tipo_categoria='entrada')
+
+    def criar(data, tipo, valor, conta=corrente, pago=True, descricao='Lançamento'):
+        return Transacao.objects.create(
+            usuario=user, conta=conta, categoria=salario if tipo == 'entrada' else mercado,
+            tipo=tipo, valor=Decimal(valor), data=data, pago=pago, descricao=descricao,
+        )
+
+    transacoes = {
+        'salario_2023': criar(date(2023, 3, 5), 'entrada', '1500.00'),
+        'mercado_2023': criar(date(2023, 3, 10), 'saida', '320.45'),
+        'pe_de_meia_2023': criar(date(2023, 11, 1), 'entrada', '200.00', conta=poupanca, descricao='Pé-de-Meia'),
+        'salario_2024': criar(date(2024, 6, 5), 'entrada', '1600.00'),
+        'mercado_2024': criar(date(2024, 6, 20), 'saida', '410.10'),
+        'mercado_2024_b': criar(date(2024, 12, 31), 'saida', '0.35', conta=poupanca),
+        'pendente_2024': criar(date(2024, 8, 1), 'saida', '90.00', pago=False),
+        'notificada_2024': criar(date(2024, 9, 1), 'saida', '15.00'),
+        'mercado_2025': criar(date(2025, 2, 1), 'saida', '55.55'),
+    }
+    Notificacao.objects.create(usuario=user, texto='Conta paga', transacao=transacoes['notificada_2024'])
+    return user, {'corrente': corrente, 'poupanca': poupanca}, transacoes
+
+
+def _saldos(contas):
+    return {nome: Conta.objects.get(pk=conta.pk).saldo_atual for nome, conta in contas.items()}
+
+
+def _leituras(user, contas):
+    cache.clear()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    resumo = client.get('/api/transacoes/resumo_financeiro/').json()
+    resumo_2024 = client.get('/api/transacoes/resumo_financeiro/?from_date=2024-01-01&to_date=2024-12-31').json()
+    dashboard = obter_dados_dashboard(user)
+    return {
+        'resumo': resumo,
+        'resumo_2024': resumo_2024,
+        'dashboard': (dashboard['resumo'], dashboard['graficos']),
+        'saldo_em_data': [
+            saldo_em_data(conta, dia) for conta in contas.values()
+            for dia in (date(2023, 3, 7), date(2024, 6, 30), date(2025, 2, 1))
+        ],
+        'historico': obter_historico_saldos(user, date(2023, 1, 1), date(2025, 3, 31), 'mensal'),
+    }
+
+
+@pytest.mark.django_db
+class TestArquivarTransacoes:
+
+    def test_move_so_as_pagas_sem_referencias(self):
+        user, contas, transacoes = _criar_cenario()
+
+        assert arquivar_transacoes(ano=2025) == 6
+
+        assert {t.pk for t in Transacao.objects.filter(usuario=user)} == {
+            transacoes['pendente_2024'].pk, transacoes['notificada_2024'].pk, transacoes['mercado_2025'].pk,
+        }
+        arquivada = TransacaoArquivada.objects.get(pk=transacoes['mercado_2023'].pk)
+        assert arquivada.valor == Decimal('320.45')
+        assert arquivada.conta_id == contas['corrente'].pk
+        assert TransacaoHistorico.objects.filter(usuario=user).count() == 9
+        assert TransacaoHistorico.objects.filter(usuario=user, arquivada=True).count() == 6
+
+    def test_resumos_anuais(self):
+        user, contas, _ = _criar_cenario()
+        arquivar_transacoes(ano=2025)
+
+        resumos = {
+            (r.conta_id, r.categoria.nome, r.ano): (r.entradas, r.saidas, r.quantidade)
+            for r in ResumoAnual.objects.filter(usuario=user).select_related('categoria')
+        }
+        corrente, poupanca = contas['corrente'].pk, contas['poupanca'].pk
+        assert resumos == {
+            (corrente, 'Salário', 2023): (Decimal('1500.00'), Decimal('0.00'), 1),
+            (corrente, 'Mercado', 2023): (Decimal('0.00'), Decimal('320.45'), 1),
+            (poupanca, 'Salário', 2023): (Decimal('200.00'), Decimal('0.00'), 1),
+            (corrente, 'Salário', 2024): (Decimal('1600.00'), Decimal('0.00'), 1),
+            (corrente, 'Mercado', 2024): (Decimal('0.00'), Decimal('410.10'), 1),
+            (poupanca, 'Mercado', 2024): (Decimal('0.00'), Decimal('0.35'), 1),
+        }
+
+    def test_saldo_atual_nao_muda(self):
+        _, contas, _ = _criar_cenario()
+        antes = _saldos(contas)
+
+        arquivar_transacoes(ano=2025)
+
+        assert _saldos(contas) == antes
+
+    def test_saldo_atual_nao_muda_sem_gatilhos(self):
+        with _sem_gatilhos():
+            _, contas, _ = _criar_cenario()
+            antes = _saldos(contas)
+
+            arquivar_transacoes(ano=2025)
+
+            assert _saldos(contas) == antes
+
+    def test_leituras_iguais_antes_e_depois(self):
+        user, contas, _ = _criar_cenario()
+        antes = _leituras(user, contas)
+
+        arquivar_transacoes(ano=2025)
+
+        assert _leituras(user, contas) == antes
+        assert gerar_relatorio_financeiro_pdf(user).getvalue().startswith(b'%PDF')
+
+    def test_reconstrucoes_contam_o_arquivo(self):
+        user, _, _ = _criar_cenario()
+        checkpoints = sorted(SaldoMensal.objects.values_list('conta_id', 'mes', 'total_pago', 'total_pendente'))
+        gastos = sorted(GastoMensalCategoria.objects.values_list('categoria_id', 'mes', 'total'))
+
+        arquivar_transacoes(ano=2025)
+        reconstruir_saldos_mensais()
+        reconstruir_gastos_mensais()
+
+        assert sorted(SaldoMensal.objects.values_list('conta_id', 'mes', 'total_pago', 'total_pendente')) == checkpoints
+        assert sorted(GastoMensalCategoria.objects.values_list('categoria_id', 'mes', 'total')) == gastos
+
+    def test_exportacao_inclui_arquivadas(self):
+        user, _, transacoes = _criar_cenario()
+        arquivar_transacoes(ano=2025)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get('/api/exportar/transacoes/?to_date=2023-12-31')
+
+        linhas = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        assert {int(linha['id']) for linha in linhas} == {
+            transacoes['salario_2023'].pk, transacoes['mercado_2023'].pk, transacoes['pe_de_meia_2023'].pk,
+        }
+
+    def test_em_lotes_e_repetido(self):
+        user, _, _ = _criar_cenario()
+
+        assert arquivar_transacoes(ano=2024, lote=2) == 3
+        assert arquivar_transacoes(ano=2025, lote=2) == 3
+        assert arquivar_transacoes(ano=2025, lote=2) == 0
+
+        assert TransacaoArquivada.objects.filter(usuario=user).count() == 6
+        assert ResumoAnual.objects.filter(usuario=user).count() == 6
+
+    def test_por_usuario(self):
+        user, _, _ = _criar_cenario()
+        outro, _, _ = _criar_cenario('arquivo_outro')
+
+        assert arquivar_transacoes(ano=2025, usuario_id=outro.pk) == 6
+
+        assert not TransacaoArquivada.objects.filter(usuario=user).exists()
+        assert Transacao.objects.filter(usuario=user).count() == 9
+
+    def test_comando(self):
+        _criar_cenario()
+        out = StringIO()
+
+        call_command('arquivar_transacoes', '--ano', '2024', '--lote', '1', stdout=out)
+
+        assert '3 transações anteriores a 2024 arquivadas.' in out.getvalue()
+
+
+def _listagem(client, **params):
+    return sorted(client.get('/api/transacoes/', params).json(), key=lambda linha: linha['id'])
+
+
+@pytest.mark.django_db
+class TestApiComArquivo:
+
+    def test_listagem_igual_antes_e_depois(self):
+        user, _, _ = _criar_cenario()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        antes = _listagem(client)
+        campos = _listagem(client, fields='id,valor,plano')
+        compacta = client.get('/api/transacoes/', {'formato': 'compacto'}).json()
+
+        arquivar_transacoes(ano=2025)
+
+        assert len(antes) == 9
+        assert _listagem(client) == antes
+        assert _listagem(client, fields='id,valor,plano') == campos
+        depois = client.get('/api/transacoes/', {'formato': 'compacto'}).json()
+        assert sorted(depois['transacoes'], key=lambda linha: linha['id']) == sorted(
+            compacta['transacoes'], key=lambda linha: linha['id']
+        )
+        assert depois['categorias'] == compacta['categorias']
+        assert depois['contas'] == compacta['contas']
+
+    def test_arquivada_so_leitura(self):
+        user, _, transacoes = _criar_cenario()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = f"/api/transacoes/{transacoes['mercado_2023'].pk}/"
+        antes = client.get(url).json()
+
+        arquivar_transacoes(ano=2025)
+
+        assert client.get(url).json() == antes
+        assert client.patch(url, {'pago': False}, format='json').status_code == 403
+        assert client.delete(url).status_code == 403
+        assert TransacaoArquivada.objects.filter(pk=transacoes['mercado_2023'].pk).exists()
+        assert client.delete('/api/transacoes/999999/').status_code == 404
+
+    def test_outro_usuario_nao_le(self):
+        _, _, transacoes = _criar_cenario()
+        outro, _, _ = _criar_cenario('arquivo_outro')
+        arquivar_transacoes(ano=2025)
+        client = APIClient()
+        client.force_authenticate(user=outro)
+
+        assert client.get(f"/api/transacoes/{transacoes['mercado_2023'].pk}/").status_code == 404
+        assert client.delete(f"/api/transacoes/{transacoes['mercado_2023'].pk}/").status_code == 404
+
+    def test_admin_lista_e_busca_arquivadas(self, admin_client):
+        _, _, transacoes = _criar_cenario()
+        arquivar_transacoes(ano=2025)
+        url = reverse('admin:core_transacaoarquivada_changelist')
+
+        response = admin_client.get(url, {'q': 'pé-de-meia'})
+
+        assert response.status_code == 200
+        assert [t.pk for t in response.context['cl'].result_list] == [transacoes['pe_de_meia_2023'].pk]
+        assert admin_client.get(reverse('admin:core_transacaoarquivada_add')).status_code == 403
+
+
+@pytest.mark.django_db
+def test_visao_existe_depois_das_migracoes():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'view' AND name = %s", [VISAO_HISTORICO])
+        assert cursor.fetchone()[0] == 1
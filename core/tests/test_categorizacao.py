@@ -0,0 +1,192 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Categoria, Transacao, TermoCategoria, SaldoMensal, GastoMensalCategoria
+from core.categorizacao import (
+    IndiceCategorias, indice, termos, sugerir_categorias, reconstruir_indice_categorias,
+)
+from core.parcelamento import criar_plano_parcelado, atualizar_plano, cancelar_plano
+from core.services import recategorizar_transacoes
+from core.saldos_mensais import reconstruir_saldos_mensais
+
+
+@pytest.fixture(autouse=True)
+def indice_limpo():
+    # Os ids dos usuários se repetem entre testes (rollback).
+    indice.limpar()
+    yield
+    indice.limpar()
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('100.00'))
+
+
+@pytest.fixture
+def transporte(categoria_factory, user):
+    return categoria_factory(user, 'Transporte')
+
+
+@pytest.fixture
+def lanche(categoria_factory, user):
+    return categoria_factory(user, 'Lanche')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _transacao(user, conta, categoria, descricao, valor='10.00'):
+    return Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                    valor=Decimal(valor), descricao=descricao, data=date(2025, 3, 10), pago=True)
+
+
+def _contagens():
+    return {
+        (t.usuario_id, t.termo, t.categoria_id): t.contagem
+        for t in TermoCategoria.objects.all() if t.contagem
+    }
+
+
+@pytest.mark.django_db
+class TestIndiceCategorias:
+
+    def test_termos(self):
+        assert termos('Uber Março 2/3') == ['uber', 'marco']
+        assert termos('iFood - pedido do iFood') == ['ifood', 'pedido']
+        assert termos('') == []
+
+    def test_indice_acompanha_escritas_e_bate_com_reconstrucao(self, user, conta, transporte, lanche):
+        a = _transacao(user, conta, transporte, 'Uber centro')
+        _transacao(user, conta, transporte, 'Uber escola')
+        b = _transacao(user, conta, lanche, 'iFood pizza')
+        a.descricao = 'Uber shopping'
+        a.save()
+        b.categoria = transporte
+        b.save()
+        b.delete()
+        plano = criar_plano_parcelado(user, conta, lanche, 'saida', 'Fone', Decimal('60.00'), 3, date(2025, 3, 1))
+        atualizar_plano(plano, descricao='Fone bluetooth', categoria=transporte)
+        recategorizar_transacoes(Transacao.objects.filter(descricao__startswith='Uber'), lanche)
+        cancelar_plano(plano)
+
+        incremental = _contagens()
+        assert incremental[(user.id, 'uber', lanche.id)] == 2
+        reconstruir_indice_categorias()
+        assert _contagens() == incremental
+
+    def test_sugestao_sem_consultas_depois_de_carregar(self, user, conta, transporte, lanche, django_assert_num_queries,
+                                                       django_capture_on_commit_callbacks):
+        for _ in range(3):
+            _transacao(user, conta, transporte, 'Uber')
+        _transacao(user, conta, lanche, 'Uber Eats')
+
+        assert sugerir_categorias(user.id, 'uber')[0] == (transporte.id, 0.75)
+        with django_assert_num_queries(0):
+            assert sugerir_categorias(user.id, 'UBER para casa')[0][0] == transporte.id
+            assert sugerir_categorias(user.id, 'padaria') == []
+
+        # Depois do commit, a escrita entra no índice em memória sem relê-lo.
+        with django_capture_on_commit_callbacks(execute=True):
+            _transacao(user, conta, lanche, 'Padaria')
+        with django_assert_num_queries(0):
+            assert sugerir_categorias(user.id, 'padaria') == [(lanche.id, 1.0)]
+
+    def test_lru_limita_usuarios_em_memoria(self, user):
+        outros = [User.objects.create_user(username=f'lru_{i}', password='pass') for i in range(2)]
+        lru = IndiceCategorias(maximo=2, ttl=60)
+        lru.obter(user.id)
+        lru.obter(outros[0].id)
+        lru.obter(user.id)
+        lru.obter(outros[1].id)
+        assert len(lru) == 2
+        assert user.id in lru and outros[0].id not in lru
+
+
+@pytest.mark.django_db
+class TestSugestaoAPI:
+
+    def test_sugere_categoria_do_usuario(self, user, conta, transporte, lanche):
+        mesada = Categoria.objects.create(usuario=user, nome='Mesada', tipo_categoria='entrada')
+        _transacao(user, conta, transporte, 'Uber')
+        Transacao.objects.create(usuario=user, conta=conta, categoria=mesada, tipo='entrada',
+                                 valor=Decimal('50.00'), descricao='Uber reembolso', data=date(2025, 3, 1))
+        client = _cliente(user)
+
+        response = client.get('/api/transacoes/sugerir_categoria/', {'descricao': 'uber', 'tipo': 'saida'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [s['categoria_nome'] for s in response.data['sugestoes']] == ['Transporte']
+
+        assert client.get('/api/transacoes/sugerir_categoria/').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_tipo_filtra_antes_do_limite(self, user, conta, transporte, lanche, categoria_factory):
+        mesada = categoria_factory(user, 'Mesada', tipo_categoria='entrada')
+        for categoria in (transporte, lanche, categoria_factory(user, 'Lazer')):
+            _transacao(user, conta, categoria, 'Uber')
+            _transacao(user, conta, categoria, 'Uber')
+        Transacao.objects.create(usuario=user, conta=conta, categoria=mesada, tipo='entrada',
+                                 valor=Decimal('50.00'), descricao='Uber reembolso', data=date(2025, 3, 1))
+
+        assert mesada.id not in [c for c, _ in sugerir_categorias(user.id, 'uber')]
+        assert sugerir_categorias(user.id, 'uber', categorias={mesada.id}) == [(mesada.id, 0.14)]
+
+        response = _cliente(user).get('/api/transacoes/sugerir_categoria/', {'descricao': 'uber', 'tipo': 'entrada'})
+        assert [s['categoria_nome'] for s in response.data['sugestoes']] == ['Mesada']
+
+
+@pytest.mark.django_db
+class TestImportacao:
+
+    def test_importa_em_lote_categorizando_pela_descricao(self, user, conta, transporte, lanche):
+        _transacao(user, conta, transporte, 'Uber')
+        _transacao(user, conta, lanche, 'iFood')
+        conta.refresh_from_db()
+        saldo_antes = conta.saldo_atual
+
+        response = _cliente(user).post('/api/transacoes/importar/', {
+            'conta': conta.id,
+            'transacoes': [
+                {'data': '2025-04-02', 'descricao': 'UBER *TRIP', 'valor': '12.50', 'tipo': 'saida'},
+                {'data': '2025-04-03', 'descricao': 'IFOOD *PEDIDO', 'valor': '30.00', 'tipo': 'saida'},
+                {'data': '2025-04-05', 'descricao': 'Cinema', 'valor': '20.00', 'tipo': 'saida',
+                 'categoria': lanche.id, 'pago': False},
+            ],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['criadas'] == 3 and response.data['categorizadas_automaticamente'] == 2
+        importadas = {t.descricao: t for t in Transacao.objects.filter(id__in=response.data['ids'])}
+        assert importadas['UBER *TRIP'].categoria == transporte
+        assert importadas['IFOOD *PEDIDO'].categoria == lanche
+
+        conta.refresh_from_db()
+        assert conta.saldo_atual == saldo_antes - Decimal('62.50')
+        incremental = list(SaldoMensal.objects.filter(conta=conta).values_list('mes', 'total_pago', 'total_pendente'))
+        reconstruir_saldos_mensais([conta.id])
+        assert list(SaldoMensal.objects.filter(conta=conta).values_list(
+            'mes', 'total_pago', 'total_pendente')) == incremental
+        assert GastoMensalCategoria.objects.get(categoria=lanche, mes=date(2025, 4, 1)).total == Decimal('50.00')
+        assert TermoCategoria.objects.get(usuario=user, termo='trip').categoria == transporte
+
+    def test_linha_sem_sugestao_cancela_a_importacao(self, user, conta, transporte):
+        _transacao(user, conta, transporte, 'Uber')
+        antes = Transacao.objects.count()
+
+        response = _cliente(user).post('/api/transacoes/importar/', {
+            'conta': conta.id,
+            'transacoes': [
+                {'data': '2025-04-02', 'descricao': 'Uber', 'valor': '12.50', 'tipo': 'saida'},
+                {'data': '2025-04-03', 'descricao': 'Livraria', 'valor': '40.00', 'tipo': 'saida'},
+            ],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'linhas 2' in response.data['detail']
+        assert Transacao.objects.count() == antes
@@ -0,0 +1,88 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F, Sum
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.campos import em_centavos
+from core.models import Conta, Transacao
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('100.10'))
+
+
+@pytest.fixture
+def categoria(categoria_factory, user):
+    return categoria_factory(user, 'Geral')
+
+
+def _transacao(user, conta, categoria, valor, tipo='saida'):
+    return Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo=tipo,
+                                    valor=valor, descricao='Café', data=date(2025, 3, 1))
+
+
+def _colunas(tabela, colunas, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(f'{c}, typeof({c})' for c in colunas)} FROM {tabela} WHERE id = %s", [pk])
+        return cursor.fetchone()
+
+
+@pytest.mark.django_db
+class TestCentavosField:
+
+    def test_grava_centavos_e_le_decimal(self, user, conta, categoria):
+        t = _transacao(user, conta, categoria, Decimal('12.34'))
+        assert _colunas('core_transacao', ['valor'], t.pk) == (1234, 'integer')
+        assert _colunas('core_conta', ['saldo_inicial', 'saldo_atual'], conta.pk) == (10010, 'integer', -1234, 'integer')
+
+        t.refresh_from_db()
+        assert t.valor == Decimal('12.34') and str(t.valor) == '12.34'
+        assert str(Transacao.objects.values_list('valor', flat=True).get(pk=t.pk)) == '12.34'
+
+    def test_arredonda_meio_centavo_e_aceita_float(self, user, conta, categoria):
+        t = _transacao(user, conta, categoria, Decimal('0.005'))
+        assert _colunas('core_transacao', ['valor'], t.pk)[0] == 1
+        t.delete()
+        t = _transacao(user, conta, categoria, 0.1)
+        assert _colunas('core_transacao', ['valor'], t.pk)[0] == 10
+        assert Transacao.objects.filter(valor__gte=Decimal('0.10')).count() == 1
+
+    def test_somas_sao_exatas(self, user, conta, categoria):
+        Transacao.objects.bulk_create([
+            Transacao(usuario=user, conta=conta, categoria=categoria, tipo='entrada',
+                      valor=Decimal('0.10'), descricao=f'Troco {i}', data=date(2025, 3, 1))
+            for i in range(1000)
+        ])
+        total = Transacao.objects.aggregate(total=Sum('valor'))['total']
+        assert total == Decimal('100.00') and str(total) == '100.00'
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('100.00')
+
+    def test_expressoes_usam_em_centavos(self, user, conta, categoria):
+        Conta.objects.filter(pk=conta.pk).update(saldo_inicial=F('saldo_inicial') + em_centavos(Decimal('0.90')))
+        conta.refresh_from_db()
+        assert conta.saldo_inicial == Decimal('101.00')
+
+    def test_api_continua_em_reais(self, user, conta, categoria):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        response = client.post('/api/transacoes/', {
+            'tipo': 'saida', 'descricao': 'Mercado', 'valor': '45.67', 'data': '2025-03-02',
+            'categoria': categoria.id, 'conta': conta.id, 'pago': True,
+        }, format='json')
+        assert response.status_code == 201
+        assert Decimal(str(response.data['valor'])) == Decimal('45.67')
+        assert Transacao.objects.get().valor == Decimal('45.67')
+
+
+@pytest.mark.django_db
+def test_benchmark_centavos():
+    saida = StringIO()
+    call_command('benchmark_centavos', '--linhas', '500', '--repeticoes', '1', stdout=saida)
+    assert saida.getvalue().count('0/') == 2
+    assert not Transacao.objects.exists()
@@ -0,0 +1,148 @@
+import fcntl
+import os
+import pickle
+import threading
+import time
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from core import coalescencia, metricas
+from core.coalescencia import chave_coalescencia, executar_uma_vez
+from core.models import Conta
+
+
+@pytest.fixture(autouse=True)
+def diretorio(settings, tmp_path):
+    cache.clear()
+    settings.COALESCENCIA_DIR = str(tmp_path)
+    settings.COALESCENCIA_ESPERA_SEGUNDOS = 5
+    return tmp_path
+
+
+def _em_thread(alvo):
+    resultado = {}
+    thread = threading.Thread(target=lambda: resultado.setdefault('valor', alvo()))
+    thread.start()
+    return thread, resultado
+
+
+def test_requisicoes_simultaneas_no_processo_calculam_uma_vez():
+    chamadas = []
+    liberar = threading.Event()
+
+    def calcular():
+        chamadas.append(1)
+        liberar.wait(5)
+        return {'total': 42}
+
+    primeira, resultado_primeira = _em_thread(lambda: executar_uma_vez('k', calcular, 'dashboard'))
+    while 'k' not in coalescencia._voos:
+        time.sleep(0.01)
+    segunda, resultado_segunda = _em_thread(lambda: executar_uma_vez('k', calcular, 'dashboard'))
+    time.sleep(0.1)
+    liberar.set()
+    primeira.join()
+    segunda.join()
+
+    assert chamadas == [1]
+    assert resultado_primeira['valor'] == resultado_segunda['valor'] == {'total': 42}
+    assert metricas.ler('coalescencia_economizadas', endpoint='dashboard', origem='processo') == 1
+    assert not coalescencia._voos
+
+
+def test_erro_do_primeiro_e_repassado():
+    liberar = threading.Event()
+    erros = []
+
+    def falhar():
+        liberar.wait(5)
+        raise ValueError('falhou')
+
+    def chamar():
+        try:
+            executar_uma_vez('k-erro', falhar)
+        except ValueError as e:
+            erros.append(str(e))
+
+    primeira = threading.Thread(target=chamar)
+    primeira.start()
+    while 'k-erro' not in coalescencia._voos:
+        time.sleep(0.01)
+    segunda = threading.Thread(target=chamar)
+    segunda.start()
+    time.sleep(0.1)
+    liberar.set()
+    primeira.join()
+    segunda.join()
+
+    assert erros == ['falhou', 'falhou']
+
+
+def test_outro_processo_calculando_compartilha_resultado_por_arquivo():
+    diretorio, caminho_trava, caminho_resultado = coalescencia._caminhos('k-arquivo')
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    # Simula outro processo: segura a trava e grava o resultado antes de soltar.
+    with open(caminho_trava, 'a+b') as trava:
+        fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+        thread, resultado = _em_thread(
+            lambda: executar_uma_vez('k-arquivo', lambda: pytest.fail("não deveria calcular"), 'relatorio_pdf')
+        )
+        time.sleep(0.1)
+        with open(caminho_resultado, 'wb') as arquivo:
+            pickle.dump(b'%PDF-1.4', arquivo)
+        fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+    thread.join()
+
+    assert resultado['valor'] == b'%PDF-1.4'
+    assert metricas.ler('coalescencia_economizadas', endpoint='relatorio_pdf', origem='arquivo') == 1
+
+
+def test_chaves_diferentes_nao_esperam_a_mesma_trava():
+    diretorio, caminho_trava, _ = coalescencia._caminhos('k-ocupada')
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    with open(caminho_trava, 'a+b') as trava:
+        fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+        inicio = time.monotonic()
+        assert [executar_uma_vez(f'k-livre-{i}', lambda: i) for i in range(20)] == list(range(20))
+        assert time.monotonic() - inicio < 1
+        fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+
+def test_limpeza_fora_das_requisicoes(diretorio):
+    executar_uma_vez('k-velha', lambda: 'velho')
+    executar_uma_vez('k-nova', lambda: 'novo')
+    _, trava_velha, resultado_velho = coalescencia._caminhos('k-velha')
+    _, trava_segura, _ = coalescencia._caminhos('k-segura')
+    trava_segura.touch()
+    uma_hora_atras = time.time() - 3600
+    for caminho in (trava_velha, resultado_velho, trava_segura):
+        os.utime(caminho, (uma_hora_atras, uma_hora_atras))
+
+    with open(trava_segura, 'a+b') as trava:
+        fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+        assert coalescencia.limpar_arquivos(60) == 2
+
+    assert sorted(p.name for p in diretorio.iterdir()) == sorted(
+        p.name for p in (*coalescencia._caminhos('k-nova')[1:], trava_segura)
+    )
+
+
+def test_resultado_antigo_nao_e_reaproveitado():
+    executar_uma_vez('k-antigo', lambda: 'primeiro')
+    assert executar_uma_vez('k-antigo', lambda: 'segundo') == 'segundo'
+
+
+@pytest.mark.django_db
+def test_chave_muda_com_o_estado_dos_dados():
+    user = User.objects.create_user(username='coalescencia_user', password='pass')
+    escopos = ('transacoes', 'contas')
+    antes = chave_coalescencia('dashboard', user, escopos, date(2025, 1, 1), None)
+    assert chave_coalescencia('dashboard', user, escopos, date(2025, 1, 1), None) == antes
+
+    Conta.objects.create(usuario=user, nome='Nova', saldo_inicial=Decimal('1.00'))
+
+    assert chave_coalescencia('dashboard', user, escopos, date(2025, 1, 1), None) != antes
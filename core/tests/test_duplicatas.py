@@ -0,0 +1,127 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Conta, Transacao, impressao_transacao
+from core.duplicatas import grupos_duplicados, indices_duplicados
+from core.parcelamento import criar_plano_parcelado, atualizar_plano, ParcelamentoInvalidoError
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('100.00'))
+
+
+@pytest.fixture
+def lanche(categoria_factory, user):
+    return categoria_factory(user, 'Lanche')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _transacao(user, conta, categoria, descricao='Cantina', valor='5.00', data=date(2025, 3, 10)):
+    return Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                    valor=Decimal(valor), descricao=descricao, data=data, pago=True)
+
+
+@pytest.mark.django_db
+class TestImpressao:
+
+    def test_normaliza_descricao_e_valor(self, user, conta, lanche):
+        t = _transacao(user, conta, lanche, 'Pão de Queijo  *Cantina', '5')
+        assert t.impressao == impressao_transacao(user.id, conta.id, date(2025, 3, 10), '5.00', 'pao de queijo cantina')
+        assert t.impressao != impressao_transacao(user.id, conta.id, date(2025, 3, 11), '5.00', 'pao de queijo cantina')
+
+        t.valor = Decimal('6.00')
+        t.save(update_fields=['valor'])
+        t.refresh_from_db()
+        assert t.impressao == t.calcular_impressao()
+
+    def test_repetidas_contam_como_multiconjunto(self, user, conta, lanche):
+        _transacao(user, conta, lanche)
+        _transacao(user, conta, lanche)
+        cafe = impressao_transacao(user.id, conta.id, date(2025, 3, 10), '5.00', 'Cantina')
+        outro = impressao_transacao(user.id, conta.id, date(2025, 3, 10), '7.00', 'Cantina')
+
+        with CaptureQueriesContext(connection) as consultas:
+            assert indices_duplicados([cafe, outro, cafe, cafe]) == [0, 2]
+        assert len(consultas.captured_queries) == 1
+
+    def test_atualizar_plano_recalcula_impressoes(self, user, conta, lanche):
+        outra = Conta.objects.create(usuario=user, nome='Reserva')
+        plano = criar_plano_parcelado(user, conta, lanche, 'saida', 'Fone', Decimal('90.00'), 3, date(2025, 3, 1))
+        atualizar_plano(plano, descricao='Fone novo', conta=outra)
+        for parcela in plano.parcelas_geradas.all():
+            assert parcela.impressao == parcela.calcular_impressao()
+
+    def test_grupos_e_comando(self, user, conta, lanche):
+        for _ in range(3):
+            _transacao(user, conta, lanche, 'Cantina')
+        _transacao(user, conta, lanche, 'CANTINA ')
+        _transacao(user, conta, lanche, 'Cantina', valor='8.00')
+
+        grupos = list(grupos_duplicados(user.id))
+        assert len(grupos) == 1
+        assert grupos[0]['quantidade'] == 4 and grupos[0]['valor'] == Decimal('5.00')
+
+        saida = StringIO()
+        call_command('detectar_duplicadas', '--usuario', str(user.id), stdout=saida)
+        assert '4x' in saida.getvalue() and 'R$ 15.00 a mais' in saida.getvalue()
+
+
+@pytest.mark.django_db
+class TestBloqueioDeDuplicatas:
+
+    def test_criar_recusa_envio_repetido(self, user, conta, lanche):
+        client = _cliente(user)
+        dados = {'tipo': 'saida', 'descricao': 'Cantina', 'valor': '5.00', 'data': '2025-03-10',
+                 'categoria': lanche.id, 'conta': conta.id, 'pago': True}
+
+        assert client.post('/api/transacoes/', dados, format='json').status_code == status.HTTP_201_CREATED
+        response = client.post('/api/transacoes/', {**dados, 'descricao': 'cantina'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'duplicada' in response.data
+
+        response = client.post('/api/transacoes/', {**dados, 'permitir_duplicada': True}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('-10.00')
+
+    def test_parcelamento_repetido(self, user, conta, lanche):
+        argumentos = (user, conta, lanche, 'saida', 'Fone', Decimal('90.00'), 3, date(2025, 3, 1))
+        criar_plano_parcelado(*argumentos)
+        with pytest.raises(ParcelamentoInvalidoError):
+            criar_plano_parcelado(*argumentos)
+        criar_plano_parcelado(*argumentos, permitir_duplicada=True)
+        assert Transacao.objects.count() == 6
+
+    def test_reimportar_extrato(self, user, conta, lanche):
+        client = _cliente(user)
+        linha = {'data': '2025-04-02', 'descricao': 'Cantina', 'valor': '5.00', 'tipo': 'saida',
+                 'categoria': lanche.id}
+        extrato = {'conta': conta.id, 'transacoes': [linha, linha, {**linha, 'valor': '7.00'}]}
+
+        response = client.post('/api/transacoes/importar/', extrato, format='json')
+        assert response.data['criadas'] == 3
+
+        response = client.post('/api/transacoes/importar/', extrato, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['criadas'] == 0 and response.data['duplicadas_ignoradas'] == [1, 2, 3]
+
+        # Um terceiro lanche igual no mesmo dia é novo.
+        response = client.post('/api/transacoes/importar/', {**extrato, 'transacoes': [linha] * 3}, format='json')
+        assert response.data['criadas'] == 1 and response.data['duplicadas_ignoradas'] == [1, 2]
+
+        response = client.post('/api/transacoes/importar/', {**extrato, 'duplicadas': 'rejeitar'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Transacao.objects.count() == 4
@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Transacao
+
+
+@pytest.fixture
+def corrente(conta_factory, user):
+    return conta_factory(user, 'Corrente', saldo_inicial=Decimal('10.00'))
+
+
+@pytest.fixture
+def lancamentos(user, corrente, conta_factory, categoria_factory, user_factory):
+    reserva = conta_factory(user, 'Reserva')
+    categoria = categoria_factory(user, 'Lanche')
+    for i, (conta, data) in enumerate([
+        (corrente, date(2025, 1, 5)),
+        (corrente, date(2025, 2, 5)),
+        (reserva, date(2025, 2, 10)),
+    ]):
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 valor=Decimal('1.50') * (i + 1), descricao=f'Lanche, dia {i}', data=data, pago=True)
+
+    outro = user_factory(username='exporta_outro')
+    conta_outro = conta_factory(outro, 'Outra')
+    categoria_outro = categoria_factory(outro, 'X')
+    Transacao.objects.create(usuario=outro, conta=conta_outro, categoria=categoria_outro, tipo='saida',
+                             valor=Decimal('9.00'), descricao='não exportar', data=date(2025, 1, 1))
+
+
+@pytest.fixture
+def cliente(user, lancamentos):
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return cliente
+
+
+def _conteudo(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExportacao:
+
+    @override_settings(EXPORTACAO_CHUNK_SIZE=1, EXPORTACAO_BUFFER_BYTES=10)
+    def test_csv_em_varios_blocos(self, cliente):
+        response = cliente.get('/api/exportar/transacoes/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'attachment; filename="transacoes_' in response['Content-Disposition']
+
+        blocos = list(response.streaming_content)
+        assert len(blocos) > 1
+        linhas = list(csv.reader(io.StringIO(b''.join(blocos).decode('utf-8'))))
+        assert linhas[0][:5] == ['id', 'data', 'tipo', 'descricao', 'valor']
+        assert [linha[3] for linha in linhas[1:]] == ['Lanche, dia 0', 'Lanche, dia 1', 'Lanche, dia 2']
+
+    def test_jsonl_com_filtros(self, cliente, corrente):
+        response = cliente.get(
+            f'/api/exportar/transacoes/?formato=jsonl&from_date=2025-02-01&conta={corrente.id}'
+        )
+
+        registros = [json.loads(linha) for linha in _conteudo(response).decode('utf-8').splitlines()]
+        assert len(registros) == 1
+        assert registros[0]['data'] == '2025-02-05'
+        assert registros[0]['valor'] == 3.0
+        assert registros[0]['conta__nome'] == 'Corrente'
+
+    def test_gzip(self, cliente):
+        response = cliente.get('/api/exportar/contas/?gzip=1')
+
+        assert response['Content-Type'] == 'application/gzip'
+        assert response['Content-Disposition'].endswith('.csv.gz"')
+        texto = gzip.decompress(_conteudo(response)).decode('utf-8')
+        assert texto.splitlines()[0] == 'id,nome,saldo_inicial,saldo_atual'
+        assert len(texto.splitlines()) == 3
+
+    def test_parametros_invalidos(self, cliente):
+        assert cliente.get('/api/exportar/usuarios/').status_code == status.HTTP_400_BAD_REQUEST
+        assert cliente.get('/api/exportar/transacoes/?formato=xlsx').status_code == status.HTTP_400_BAD_REQUEST
+        assert cliente.get('/api/exportar/categorias/?from_date=2025-01-01').status_code == status.HTTP_400_BAD_REQUEST
+        assert cliente.get('/api/exportar/transacoes/?conta=abc').status_code == status.HTTP_400_BAD_REQUEST
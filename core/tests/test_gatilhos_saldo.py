@@ -0,0 +1,140 @@
+import pytest
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from io import StringIO
+from core.campos import em_centavos
+from core.gatilhos_saldo import SQL_INSTALAR, SQL_REMOVER, esquecer_deteccao, gatilhos_saldo_ativos
+from core.models import Conta, Categoria, PlanoParcelamento, Transacao
+from core.saldos_mensais import efeito_no_saldo
+
+
+@contextmanager
+def _sem_gatilhos():
+    with connection.cursor() as cursor:
+        for sql in SQL_REMOVER:
+            cursor.execute(sql)
+    esquecer_deteccao(connection)
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for sql in SQL_INSTALAR:
+                cursor.execute(sql)
+        esquecer_deteccao(connection)
+
+
+def _criar_cenario(nome):
+    user = User.objects.create_user(username=nome)
+    principal = Conta.objects.create(usuario=user, nome='Principal', saldo_inicial=Decimal('10.00'))
+    reserva = Conta.objects.create(usuario=user, nome='Reserva')
+    categoria = Categoria.objects.create(usuario=user, nome='Geral', tipo_categoria='saida')
+    plano = PlanoParcelamento.objects.create(
+        usuario=user, conta=principal, categoria=categoria, tipo='saida', descricao='Fone',
+        valor_total=Decimal('90.00'), numero_parcelas=1, primeiro_vencimento=date(2025, 3, 1),
+    )
+    base = dict(usuario=user, conta=principal, categoria=categoria, data=date(2025, 3, 1))
+    transacoes = {
+        'salario': Transacao.objects.create(**base, tipo='entrada', valor=Decimal('500.00'), descricao='Salário'),
+        'mercado': Transacao.objects.create(**base, tipo='saida', valor=Decimal('120.35'), descricao='Mercado'),
+        'pendente': Transacao.objects.create(**base, tipo='saida', valor=Decimal('40.00'), descricao='Luz', pago=False),
+        'parcela': Transacao.objects.create(**base, tipo='saida', valor=Decimal('90.00'), descricao='Fone 1/1',
+                                            pago=False, plano=plano, numero_parcela=1),
+    }
+    return {'principal': principal, 'reserva': reserva}, transacoes
+
+
+def _editar(transacoes, contas, **campos):
+    def aplicar():
+        transacao = Transacao.objects.get(pk=transacoes[campos.pop('alvo')].pk)
+        for campo, valor in campos.items():
+            setattr(transacao, campo, contas.get(valor, valor) if campo == 'conta' else valor)
+        transacao.save()
+    return aplicar
+
+
+OPERACOES = {
+    'criar': lambda contas, transacoes: None,
+    'editar_valor': lambda c, t: _editar(t, c, alvo='mercado', valor=Decimal('99.99'))(),
+    'mover_de_conta': lambda c, t: _editar(t, c, alvo='mercado', conta='reserva')(),
+    'trocar_tipo': lambda c, t: _editar(t, c, alvo='mercado', tipo='entrada')(),
+    'pagar_pendente': lambda c, t: _editar(t, c, alvo='pendente', pago=True)(),
+    'pagar_parcela': lambda c, t: _editar(t, c, alvo='parcela', pago=True)(),
+    'mover_parcela_pendente': lambda c, t: _editar(t, c, alvo='parcela', conta='reserva')(),
+    'excluir': lambda c, t: Transacao.objects.get(pk=t['salario'].pk).delete(),
+    'excluir_parcela_pendente': lambda c, t: Transacao.objects.get(pk=t['parcela'].pk).delete(),
+}
+
+
+def _saldos(contas):
+    return {nome: Conta.objects.get(pk=conta.pk).saldo_atual for nome, conta in contas.items()}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('operacao', OPERACOES)
+def test_gatilhos_equivalem_aos_signals(operacao):
+    assert gatilhos_saldo_ativos()
+    contas, transacoes = _criar_cenario('com_gatilhos')
+    OPERACOES[operacao](contas, transacoes)
+    com_gatilhos = _saldos(contas)
+
+    with _sem_gatilhos():
+        assert not gatilhos_saldo_ativos()
+        contas, transacoes = _criar_cenario('com_signals')
+        OPERACOES[operacao](contas, transacoes)
+        com_signals = _saldos(contas)
+
+    assert com_gatilhos == com_signals
+
+
+@pytest.mark.django_db
+def test_escritas_em_lote_mantem_o_saldo():
+    contas, transacoes = _criar_cenario('lote')
+    principal, reserva = contas['principal'], contas['reserva']
+    seq_antes = Conta.objects.get(pk=principal.pk).seq
+
+    Transacao.objects.bulk_create([
+        Transacao(usuario=principal.usuario, conta=principal, categoria_id=transacoes['mercado'].categoria_id,
+                  tipo='saida', valor=Decimal('1.10'), descricao=f'Café {i}', data=date(2025, 3, 2))
+        for i in range(50)
+    ])
+    Transacao.objects.filter(descricao__in=[f'Café {i}' for i in range(10)]).update(conta=reserva)
+    Transacao.objects.filter(descricao='Mercado').update(valor=F('valor') + em_centavos(Decimal('1.00')))
+    Transacao.objects.filter(descricao='Salário').delete()
+
+    for conta in (principal, reserva):
+        conta.refresh_from_db()
+        assert conta.saldo_atual == sum(
+            (efeito_no_saldo(t.tipo, t.valor, t.pago, t.plano_id is not None) for t in Transacao.objects.filter(conta=conta)),
+            Decimal('0'),
+        )
+    # 500 - 120,35 - 40 - 50 x 1,10 + 10 x 1,10 - 1 - 500
+    assert principal.saldo_atual == Decimal('-205.35')
+    assert reserva.saldo_atual == Decimal('-11.00')
+    assert principal.seq > seq_antes
+
+
+@pytest.mark.django_db
+def test_conta_em_memoria_acompanha_o_banco():
+    contas, transacoes = _criar_cenario('memoria')
+    principal = contas['principal']
+    Transacao.objects.create(usuario=principal.usuario, conta=principal, categoria=transacoes['mercado'].categoria,
+                             tipo='saida', valor=Decimal('5.00'), descricao='Pão', data=date(2025, 3, 3))
+    assert principal.saldo_atual == Decimal('334.65')
+    principal.nome = 'Corrente'
+    principal.save()
+    principal.refresh_from_db()
+    assert principal.saldo_atual == Decimal('334.65')
+
+
+@pytest.mark.django_db
+def test_benchmark_gatilhos_saldo():
+    saida = StringIO()
+    call_command('benchmark_gatilhos_saldo', '--linhas', '300', '--linhas-signals', '30', stdout=saida)
+    assert 'gatilhos' in saida.getvalue() and 'signals' in saida.getvalue()
+    assert not Transacao.objects.exists()
+    assert gatilhos_saldo_ativos()
@@ -0,0 +1,102 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Categoria, Transacao
+from core.services import obter_historico_saldos, saldo_em_data
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, 'Corrente', saldo_inicial=Decimal('100.00'))
+
+
+@pytest.fixture
+def poupanca(conta_factory, user):
+    return conta_factory(user, 'Poupança', saldo_inicial=Decimal('50.00'))
+
+
+@pytest.fixture
+def lancamentos(user, conta, poupanca, categoria_factory):
+    entrada = categoria_factory(user, 'Bolsa', 'entrada')
+    saida = categoria_factory(user, 'Lanche')
+    for data, conta_tx, categoria, tipo, valor in [
+        (date(2024, 12, 20), conta, entrada, 'entrada', '200.00'),
+        (date(2025, 1, 2), conta, saida, 'saida', '30.00'),
+        (date(2025, 1, 2), conta, saida, 'saida', '5.00'),
+        (date(2025, 1, 9), poupanca, entrada, 'entrada', '40.00'),
+        (date(2025, 2, 3), conta, saida, 'saida', '15.00'),
+    ]:
+        Transacao.objects.create(usuario=user, conta=conta_tx, categoria=categoria, tipo=tipo,
+                                 valor=Decimal(valor), descricao='t', data=data, pago=True)
+
+
+@pytest.mark.django_db
+class TestHistoricoSaldo:
+
+    def test_serie_diaria_confere_com_saldo_em_data(self, user, lancamentos, conta, poupanca):
+        inicio, fim = date(2025, 1, 1), date(2025, 2, 10)
+
+        resultado = obter_historico_saldos(user, inicio, fim)
+
+        assert len(resultado['datas']) == (fim - inicio).days + 1
+        for serie, conta_serie in zip(resultado['contas'], [conta, poupanca]):
+            assert serie['conta_id'] == conta_serie.id
+            for dia, saldo in zip(resultado['datas'], serie['saldos']):
+                assert saldo == saldo_em_data(conta_serie, dia)['saldo']
+
+        assert resultado['total'][0] == Decimal('350.00')
+        assert resultado['total'][-1] == Decimal('340.00')
+
+    def test_granularidade_mensal_e_reducao_de_pontos(self, user, lancamentos, conta):
+        mensal = obter_historico_saldos(user, date(2024, 11, 15), date(2025, 2, 10), 'mensal', conta_id=conta.id)
+        assert mensal['datas'] == [date(2024, 11, 30), date(2024, 12, 31), date(2025, 1, 31), date(2025, 2, 10)]
+        assert mensal['contas'][0]['saldos'] == [
+            Decimal('100.00'), Decimal('300.00'), Decimal('265.00'), Decimal('250.00')
+        ]
+
+        reduzido = obter_historico_saldos(user, date(2024, 1, 1), date(2025, 2, 10), max_pontos=10)
+        assert len(reduzido['datas']) <= 10
+        assert reduzido['datas'][-1] == date(2025, 2, 10)
+
+    def test_cache_invalida_apos_escrita(self, user, lancamentos, conta):
+        inicio, fim = date(2025, 1, 1), date(2025, 1, 31)
+
+        antes = obter_historico_saldos(user, inicio, fim, 'semanal')
+        assert obter_historico_saldos(user, inicio, fim, 'semanal') == antes
+
+        categoria = Categoria.objects.get(usuario=user, nome='Lanche')
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 valor=Decimal('10.00'), descricao='t', data=date(2025, 1, 15), pago=True)
+
+        depois = obter_historico_saldos(user, inicio, fim, 'semanal')
+        assert depois['total'][-1] == antes['total'][-1] - 10
+
+    def test_endpoint(self, user, lancamentos, conta):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get('/api/contas/historico_saldo/?from_date=2025-01-01&to_date=2025-01-31&granularidade=semanal')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['contas']) == 2
+
+        assert client.get('/api/contas/historico_saldo/?granularidade=anual').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get('/api/contas/historico_saldo/?conta=999999').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_endpoint_limita_intervalo(self, user, settings):
+        settings.HISTORICO_SALDO_MAX_DIAS = 31
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        url = '/api/contas/historico_saldo/'
+        assert client.get(url, {'from_date': '2025-01-01', 'to_date': '2025-02-01'}).status_code == status.HTTP_200_OK
+        assert client.get(url, {'from_date': '2025-01-01', 'to_date': '2025-02-02'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(url, {'from_date': '0001-01-01', 'to_date': '2025-01-01'}).status_code == status.HTTP_400_BAD_REQUEST
+        # Sem from_date, o padrão de 90 dias antes de to_date passaria de date.min.
+        assert client.get(url, {'to_date': '0001-01-02'}).status_code == status.HTTP_400_BAD_REQUEST
+        # O fim do último mês passaria de date.max.
+        for granularidade in ('semanal', 'mensal'):
+            resposta = client.get(url, {'from_date': '9999-12-20', 'to_date': '9999-12-31', 'granularidade': granularidade})
+            assert resposta.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,136 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core import idempotencia
+from core.models import Conta, Transacao, ChaveIdempotencia
+from core.idempotencia import purgar_chaves_expiradas
+
+
+@pytest.fixture
+def origem(conta_factory, user):
+    return conta_factory(user, 'Origem', saldo_inicial=Decimal('100.00'), saldo_atual=Decimal('100.00'))
+
+
+@pytest.fixture
+def destino(conta_factory, user):
+    return conta_factory(user, 'Destino')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _transferir(client, origem, destino, valor='10.00', chave='chave-1'):
+    headers = {'HTTP_IDEMPOTENCY_KEY': chave} if chave else {}
+    return client.post('/api/contas/transferir/', {
+        'conta_origem_id': origem.id, 'conta_destino_id': destino.id, 'valor': valor
+    }, format='json', **headers)
+
+
+@pytest.mark.django_db
+class TestIdempotencia:
+
+    def test_repeticao_devolve_resposta_gravada(self, user, origem, destino):
+        client = _cliente(user)
+
+        primeira = _transferir(client, origem, destino)
+        segunda = _transferir(client, origem, destino)
+
+        assert primeira.status_code == segunda.status_code == status.HTTP_201_CREATED
+        assert segunda.data == primeira.data
+        assert segunda['Idempotent-Replayed'] == 'true'
+        assert Transacao.objects.filter(usuario=user).count() == 2
+        origem.refresh_from_db()
+        assert origem.saldo_atual == Decimal('90.00')
+
+    def test_sem_chave_executa_sempre(self, user, origem, destino):
+        client = _cliente(user)
+
+        _transferir(client, origem, destino, chave=None)
+        _transferir(client, origem, destino, chave=None)
+
+        assert Transacao.objects.filter(usuario=user).count() == 4
+        assert not ChaveIdempotencia.objects.exists()
+
+    def test_mesma_chave_com_outro_corpo(self, user, origem, destino):
+        client = _cliente(user)
+
+        _transferir(client, origem, destino)
+        response = _transferir(client, origem, destino, valor='20.00')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Transacao.objects.filter(usuario=user).count() == 2
+
+    def test_chaves_sao_por_usuario(self, user, origem, destino):
+        outro = User.objects.create_user(username='idempotencia_outro', password='pass')
+        origem_outro = Conta.objects.create(usuario=outro, nome='Origem', saldo_inicial=Decimal('50.00'))
+        destino_outro = Conta.objects.create(usuario=outro, nome='Destino')
+
+        _transferir(_cliente(user), origem, destino)
+        response = _transferir(_cliente(outro), origem_outro, destino_outro)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'Idempotent-Replayed' not in response
+
+    def test_duplicata_concorrente_espera_a_primeira(self, user, origem, destino, monkeypatch):
+        monkeypatch.setattr(idempotencia, 'hash_requisicao', lambda request: 'h')
+        registro = ChaveIdempotencia.objects.create(
+            usuario=user, chave='chave-1', hash_requisicao='h',
+            expira_em=timezone.now() + timedelta(hours=1)
+        )
+
+        def primeira_termina(segundos):
+            registro.concluida = True
+            registro.status_code = 201
+            registro.resposta = {'detail': 'feito pela primeira'}
+            registro.save()
+        monkeypatch.setattr(idempotencia.time, 'sleep', primeira_termina)
+
+        response = _transferir(_cliente(user), origem, destino)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data == {'detail': 'feito pela primeira'}
+        assert not Transacao.objects.exists()
+
+    @override_settings(IDEMPOTENCIA_ESPERA_SEGUNDOS=0)
+    def test_duplicata_ainda_em_processamento(self, user, origem, destino, monkeypatch):
+        monkeypatch.setattr(idempotencia, 'hash_requisicao', lambda request: 'h')
+        ChaveIdempotencia.objects.create(
+            usuario=user, chave='chave-1', hash_requisicao='h',
+            expira_em=timezone.now() + timedelta(hours=1)
+        )
+
+        response = _transferir(_cliente(user), origem, destino)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not Transacao.objects.exists()
+
+    def test_chave_expirada_executa_de_novo(self, user, origem, destino):
+        client = _cliente(user)
+        _transferir(client, origem, destino)
+        ChaveIdempotencia.objects.update(expira_em=timezone.now() - timedelta(seconds=1))
+
+        response = _transferir(client, origem, destino)
+
+        assert 'Idempotent-Replayed' not in response
+        assert Transacao.objects.filter(usuario=user).count() == 4
+
+    def test_purga_em_lotes(self, user):
+        agora = timezone.now()
+        for i in range(5):
+            ChaveIdempotencia.objects.create(usuario=user, chave=f'velha-{i}', hash_requisicao='h',
+                                             expira_em=agora - timedelta(minutes=1))
+        ChaveIdempotencia.objects.create(usuario=user, chave='nova', hash_requisicao='h',
+                                         expira_em=agora + timedelta(hours=1))
+
+        assert purgar_chaves_expiradas(lote=2) == 5
+        assert list(ChaveIdempotencia.objects.values_list('chave', flat=True)) == ['nova']
+
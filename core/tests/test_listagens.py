@@ -0,0 +1,138 @@
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Transacao, TransacaoRecorrente, Orcamento
+from core.listagens import leitor_do_serializer
+from core.parcelamento import criar_plano_parcelado
+from core.renderers import JSONRendererDecimal
+from core.serializers import TransacaoSerializer
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user)
+
+
+@pytest.fixture
+def mercado(categoria_factory, user):
+    return categoria_factory(user, 'Mercado')
+
+
+@pytest.fixture
+def lancamentos(user, conta, mercado, categoria_factory):
+    Transacao.objects.create(usuario=user, conta=conta, categoria=mercado, tipo='saida',
+                             valor=Decimal('12.30'), descricao='Feira', data=date(2025, 2, 1), pago=True)
+    salario = categoria_factory(user, 'Salário', 'entrada')
+    Transacao.objects.create(usuario=user, conta=conta, categoria=salario, tipo='entrada',
+                             valor=Decimal('1000'), descricao='Salário', data=date(2025, 2, 5),
+                             vencimento=date(2025, 2, 10), pago=False)
+    criar_plano_parcelado(user, conta, mercado, 'saida', 'Geladeira', Decimal('300.00'), 3, date(2025, 1, 15))
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _consultas_em(client, url, tabela, **params):
+    with CaptureQueriesContext(connection) as consultas:
+        response = client.get(url, params)
+    return response, [c['sql'] for c in consultas.captured_queries if tabela in c['sql']]
+
+
+@pytest.mark.django_db
+class TestLeitorLinhas:
+
+    def test_mesmas_linhas_do_serializer(self, user, lancamentos):
+        queryset = Transacao.objects.filter(usuario=user).order_by('id')
+        esperado = TransacaoSerializer(queryset, many=True).data
+        assert list(leitor_do_serializer(TransacaoSerializer).linhas(queryset)) == esperado
+
+    def test_listagem_da_api(self, user, lancamentos):
+        response = _cliente(user).get('/api/transacoes/')
+        linhas = json.loads(response.content)
+        assert len(linhas) == 5
+        assert {linha['valor'] for linha in linhas} >= {'12.30', '1000.00', '100.00'}
+        assert 'permitir_duplicada' not in linhas[0]
+
+
+@pytest.mark.django_db
+class TestCamposEsparsos:
+
+    def test_listagem_so_busca_os_campos_pedidos(self, user, lancamentos):
+        client = _cliente(user)
+        response, sql = _consultas_em(client, '/api/transacoes/', 'core_transacao', fields='id,valor, data')
+        assert list(response.data[0]) == ['id', 'valor', 'data']
+        assert len(sql) == 1 and 'core_categoria' not in sql[0] and 'descricao' not in sql[0]
+
+        transacao = Transacao.objects.filter(usuario=user).first()
+        response = client.get(f'/api/transacoes/{transacao.id}/', {'fields': 'descricao,conta_nome'})
+        assert response.data == {'descricao': transacao.descricao, 'conta_nome': 'Principal'}
+
+    def test_campo_desconhecido(self, user, lancamentos):
+        response = _cliente(user).get('/api/categorias/', {'fields': 'id,usuario'})
+        assert response.status_code == 400
+        assert 'usuario' in response.data['detail']
+
+    def test_projecao_nas_relacoes(self, user, lancamentos, conta, mercado):
+        client = _cliente(user)
+        TransacaoRecorrente.objects.create(usuario=user, conta=conta, categoria=mercado, tipo='saida',
+                                           descricao='Aluguel', valor=Decimal('500.00'),
+                                           data_inicio=date(2025, 1, 5), proxima_execucao=date(2025, 1, 5))
+
+        response, sql = _consultas_em(client, '/api/recorrentes/', 'core_transacaorecorrente', fields='id,conta_nome')
+        assert response.data == [{'id': TransacaoRecorrente.objects.get().id, 'conta_nome': 'Principal'}]
+        assert 'core_categoria' not in sql[0] and 'descricao' not in sql[0]
+
+        # Sem as parcelas, o prefetch delas nem roda.
+        response, sql = _consultas_em(client, '/api/planos/', 'core_transacao"', fields='id,descricao')
+        assert response.data[0]['descricao'] == 'Geladeira' and sql == []
+        response = client.get('/api/planos/', {'fields': 'parcelas'})
+        assert len(response.data[0]['parcelas']) == 3
+
+    def test_campo_calculado_usa_consulta_completa(self, user, lancamentos, mercado):
+        Orcamento.objects.create(usuario=user, categoria=mercado, mes=date(2025, 2, 1), limite=Decimal('100.00'))
+        response = _cliente(user).get('/api/orcamentos/', {'fields': 'limite,restante'})
+        assert response.data == [{'limite': '100.00', 'restante': Decimal('-12.30')}]
+
+    def test_formato_compacto(self, user, lancamentos, conta, mercado):
+        response = _cliente(user).get('/api/transacoes/', {'formato': 'compacto'})
+        conteudo = json.loads(response.content)
+        assert set(conteudo) == {'transacoes', 'categorias', 'contas'}
+        assert len(conteudo['transacoes']) == 5
+        assert 'categoria_nome' not in conteudo['transacoes'][0]
+        assert conteudo['categorias'][str(mercado.id)] == {'nome': 'Mercado', 'tipo_categoria': 'saida'}
+        assert conteudo['contas'] == {str(conta.id): {'nome': 'Principal'}}
+
+        response = _cliente(user).get('/api/transacoes/', {'formato': 'compacto', 'fields': 'valor,categoria_nome'})
+        conteudo = json.loads(response.content)
+        assert set(conteudo) == {'transacoes', 'categorias'}
+        assert set(conteudo['transacoes'][0]) == {'valor', 'categoria'}
+
+
+class TestRendererDecimal:
+
+    def test_numero_ou_texto(self, settings):
+        renderer = JSONRendererDecimal()
+        dados = {'valor': Decimal('10.50'), 'grande': Decimal('12345678901234567.89')}
+
+        assert json.loads(renderer.render(dados)) == {'valor': 10.5, 'grande': '12345678901234567.89'}
+
+        settings.JSON_DECIMAL_COMO_TEXTO = True
+        assert json.loads(renderer.render(dados))['valor'] == '10.50'
+
+
+@pytest.mark.django_db
+def test_benchmark_serializacao():
+    saida = StringIO()
+    call_command('benchmark_serializacao', '--linhas', '50', stdout=saida)
+    assert 'serializer' in saida.getvalue() and 'leitor' in saida.getvalue()
+    assert not Transacao.objects.exists()
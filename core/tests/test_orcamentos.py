@@ -0,0 +1,158 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Categoria, Transacao, Orcamento, GastoMensalCategoria, Notificacao
+from core.orcamentos import reconstruir_gastos_mensais
+from core.parcelamento import criar_plano_parcelado, cancelar_plano
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('500.00'))
+
+
+@pytest.fixture
+def lanche(categoria_factory, user):
+    return categoria_factory(user, 'Lanche')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _gasto(user, conta, categoria, valor, data=date(2025, 3, 10), tipo='saida'):
+    return Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo=tipo,
+                                    valor=Decimal(valor), descricao='Gasto', data=data, pago=True)
+
+
+def _total(categoria, mes=date(2025, 3, 1)):
+    return GastoMensalCategoria.objects.filter(categoria=categoria, mes=mes).values_list('total', flat=True).first()
+
+
+@pytest.mark.django_db
+class TestGastosMensais:
+
+    def test_totais_acompanham_criacao_edicao_e_exclusao(self, user, conta, lanche):
+        transporte = Categoria.objects.create(usuario=user, nome='Transporte', tipo_categoria='saida')
+        t = _gasto(user, conta, lanche, '30.00')
+        _gasto(user, conta, lanche, '20.00')
+        _gasto(user, conta, lanche, '99.00', tipo='entrada')
+        assert _total(lanche) == Decimal('50.00')
+
+        t.valor = Decimal('35.00')
+        t.save()
+        assert _total(lanche) == Decimal('55.00')
+
+        t.categoria = transporte
+        t.data = date(2025, 4, 2)
+        t.save()
+        assert _total(lanche) == Decimal('20.00')
+        assert _total(transporte, date(2025, 4, 1)) == Decimal('35.00')
+
+        t.delete()
+        assert _total(transporte, date(2025, 4, 1)) == Decimal('0.00')
+
+    def test_reconstrucao_bate_com_incremental(self, user, conta, lanche):
+        _gasto(user, conta, lanche, '12.00')
+        plano = criar_plano_parcelado(user, conta, lanche, 'saida', 'Fone', Decimal('90.00'), 3, date(2025, 3, 5))
+        cancelar_plano(plano)
+        _gasto(user, conta, lanche, '8.00', data=date(2025, 5, 1))
+
+        incremental = {
+            (g.categoria_id, g.mes): g.total for g in GastoMensalCategoria.objects.all() if g.total
+        }
+        reconstruir_gastos_mensais()
+        assert {(g.categoria_id, g.mes): g.total for g in GastoMensalCategoria.objects.all()} == incremental
+
+
+@pytest.mark.django_db
+class TestEstouroDeOrcamento:
+
+    def test_avisa_uma_vez_por_estouro(self, user, conta, lanche):
+        Orcamento.objects.create(usuario=user, categoria=lanche, mes=date(2025, 3, 1), limite=Decimal('50.00'))
+
+        _gasto(user, conta, lanche, '40.00')
+        assert not Notificacao.objects.filter(usuario=user).exists()
+
+        t = _gasto(user, conta, lanche, '15.00')
+        _gasto(user, conta, lanche, '5.00')
+        avisos = Notificacao.objects.filter(usuario=user)
+        assert avisos.count() == 1
+        assert 'Lanche' in avisos.get().texto and 'R$ 55.00 de R$ 50.00' in avisos.get().texto
+
+        # Voltou para dentro do limite: o próximo estouro avisa de novo.
+        t.delete()
+        assert Orcamento.objects.get().estourado is False
+        _gasto(user, conta, lanche, '30.00')
+        assert avisos.count() == 2
+
+    def test_checagem_e_um_unico_comando_por_mes(self, user, conta, lanche):
+        Orcamento.objects.create(usuario=user, categoria=lanche, mes=date(2025, 3, 1), limite=Decimal('50.00'))
+        _gasto(user, conta, lanche, '1.00')
+        t = _gasto(user, conta, lanche, '1.00')
+        t.valor = Decimal('2.00')
+        with CaptureQueriesContext(connection) as consultas:
+            t.save()
+        sql = [q['sql'] for q in consultas.captured_queries]
+        # Sem somar o mês: um UPDATE no total da categoria e um no orçamento.
+        assert len([q for q in sql if q.startswith('UPDATE "core_gastomensalcategoria"')]) == 1
+        assert len([q for q in sql if '"core_orcamento"' in q]) == 1
+        assert not any('SUM(' in q for q in sql)
+
+
+@pytest.mark.django_db
+class TestOrcamentoAPI:
+
+    def test_lista_gasto_de_todos_os_orcamentos(self, user, conta, lanche, django_assert_max_num_queries):
+        outras = [Categoria.objects.create(usuario=user, nome=f'C{i}', tipo_categoria='saida') for i in range(4)]
+        client = _cliente(user)
+        for categoria in [lanche, *outras]:
+            response = client.post('/api/orcamentos/', {
+                'categoria': categoria.id, 'mes': '2025-03-15', 'limite': '100.00'
+            }, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+            assert response.data['mes'] == '2025-03-01'
+        _gasto(user, conta, lanche, '30.00')
+
+        with django_assert_max_num_queries(3):
+            response = client.get('/api/orcamentos/?mes=2025-03-01')
+        assert response.status_code == status.HTTP_200_OK
+        dados = {item['categoria_nome']: item for item in response.data}
+        assert Decimal(dados['Lanche']['gasto']) == Decimal('30.00')
+        assert Decimal(dados['Lanche']['restante']) == Decimal('70.00')
+        assert Decimal(dados['C0']['gasto']) == 0
+
+    def test_criar_orcamento_ja_estourado_avisa(self, user, conta, lanche):
+        _gasto(user, conta, lanche, '80.00')
+        response = _cliente(user).post('/api/orcamentos/', {
+            'categoria': lanche.id, 'mes': '2025-03-01', 'limite': '50.00'
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Decimal(response.data['gasto']) == Decimal('80.00')
+        assert Notificacao.objects.filter(usuario=user).count() == 1
+
+    def test_validacoes(self, user, conta, lanche):
+        client = _cliente(user)
+        mesada = Categoria.objects.create(usuario=user, nome='Mesada', tipo_categoria='entrada')
+        response = client.post('/api/orcamentos/', {'categoria': mesada.id, 'mes': '2025-03-01', 'limite': '50'},
+                               format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        client.post('/api/orcamentos/', {'categoria': lanche.id, 'mes': '2025-03-01', 'limite': '50'}, format='json')
+        response = client.post('/api/orcamentos/', {'categoria': lanche.id, 'mes': '2025-03-20', 'limite': '60'},
+                               format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        orcamento = Orcamento.objects.get(usuario=user, categoria=lanche)
+        for url in ('/api/orcamentos/', f'/api/orcamentos/{orcamento.id}/'):
+            for mes in ('marco', '2025-13-01', '2025-02-30'):
+                response = client.get(url, {'mes': mes})
+                assert response.status_code == status.HTTP_400_BAD_REQUEST
+                assert response.data['detail'] == "Parâmetro 'mes' inválido; use AAAA-MM-DD."
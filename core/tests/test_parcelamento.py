@@ -0,0 +1,197 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Conta, Transacao, Notificacao, Exclusao, PlanoParcelamento, SaldoMensal
+from core.parcelamento import (
+    ParcelamentoInvalidoError, dividir_valor, criar_plano_parcelado, atualizar_plano, cancelar_plano,
+)
+from core.saldos_mensais import reconstruir_saldos_mensais
+from core.sincronizacao import alteracoes_desde
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, 'Cartão')
+
+
+@pytest.fixture
+def categoria(categoria_factory, user):
+    return categoria_factory(user, 'Eletrônicos')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _plano(user, conta, categoria, total='100.00', n=3):
+    return criar_plano_parcelado(user, conta, categoria, 'saida', 'Celular', Decimal(total), n, date(2025, 1, 31))
+
+
+def _checkpoints(conta):
+    return list(
+        SaldoMensal.objects.filter(conta=conta).order_by('mes')
+        .values_list('mes', 'total_pago', 'total_pendente', 'saldo_fechamento')
+    )
+
+
+def _assert_bate_com_reconstrucao(*contas):
+    """
+    Os checkpoints mantidos em lote equivalem aos reconstruídos do zero
+    (meses que ficaram sem transações continuam com o acumulado anterior).
+    """
+    incrementais = {conta.id: _checkpoints(conta) for conta in contas}
+    reconstruir_saldos_mensais([conta.id for conta in contas])
+    for conta in contas:
+        reconstruidos = {mes: valores for mes, *valores in _checkpoints(conta)}
+        acumulado = [Decimal('0.00')] * 3
+        for mes, *valores in incrementais[conta.id]:
+            acumulado = reconstruidos.get(mes, acumulado)
+            assert valores == list(acumulado), mes
+
+
+@pytest.mark.django_db
+class TestParcelamento:
+
+    def test_dividir_valor_coloca_centavos_na_primeira(self):
+        assert dividir_valor(Decimal('100.00'), 3) == [Decimal('33.34'), Decimal('33.33'), Decimal('33.33')]
+        assert sum(dividir_valor(Decimal('0.05'), 4)) == Decimal('0.05')
+
+    def test_criar_plano_gera_parcelas_mensais(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+
+        parcelas = list(plano.parcelas_geradas.order_by('numero_parcela'))
+        assert [p.vencimento for p in parcelas] == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+        assert [p.descricao for p in parcelas] == ['Celular (1/3)', 'Celular (2/3)', 'Celular (3/3)']
+        assert {p.pago for p in parcelas} == {False}
+        assert len({p.seq for p in parcelas}) == 3
+
+        # Parcelas pendentes não mexem no saldo, só no total pendente dos meses.
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('0.00')
+        assert _checkpoints(conta)[-1][2] == Decimal('-100.00')
+
+    def test_checkpoints_em_lote_batem_com_reconstrucao(self, user, conta, categoria):
+        _plano(user, conta, categoria, n=5)
+        _assert_bate_com_reconstrucao(conta)
+
+    def test_pagar_parcela_aplica_efeito_no_saldo(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+        primeira = plano.parcelas_geradas.get(numero_parcela=1)
+
+        primeira.pago = True
+        primeira.save()
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('-33.34')
+
+        primeira.pago = False
+        primeira.save()
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('0.00')
+
+    def test_atualizar_plano_altera_so_pendentes(self, user, conta, categoria):
+        outra = Conta.objects.create(usuario=user, nome='Débito')
+        plano = _plano(user, conta, categoria)
+        paga = plano.parcelas_geradas.get(numero_parcela=1)
+        paga.pago = True
+        paga.save()
+
+        atualizar_plano(plano, descricao='Smartphone', conta=outra)
+
+        paga.refresh_from_db()
+        assert (paga.descricao, paga.conta_id) == ('Celular (1/3)', conta.id)
+        pendentes = plano.parcelas_geradas.filter(pago=False).order_by('numero_parcela')
+        assert [p.descricao for p in pendentes] == ['Smartphone (2/3)', 'Smartphone (3/3)']
+        assert {p.conta_id for p in pendentes} == {outra.id}
+
+        _assert_bate_com_reconstrucao(conta, outra)
+
+    def test_atualizar_plano_renova_seq(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+        cursor = int(alteracoes_desde(user)['cursor'])
+
+        atualizar_plano(plano, descricao='Smartphone')
+        alteracoes = alteracoes_desde(user, since=cursor)['alteracoes']
+        assert sorted(item['dados']['numero_parcela'] for item in alteracoes) == [1, 2, 3]
+
+    def test_cancelar_plano_remove_pendentes(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+        paga = plano.parcelas_geradas.get(numero_parcela=1)
+        paga.pago = True
+        paga.save()
+        pendente = plano.parcelas_geradas.get(numero_parcela=2)
+        aviso = Notificacao.objects.create(usuario=user, texto='Vence amanhã', transacao=pendente)
+
+        assert cancelar_plano(plano) == 2
+
+        plano.refresh_from_db()
+        assert plano.cancelado
+        assert list(plano.parcelas_geradas.values_list('id', flat=True)) == [paga.id]
+        aviso.refresh_from_db()
+        assert aviso.transacao is None
+        assert Exclusao.objects.filter(usuario=user, modelo='transacao').count() == 2
+
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('-33.34')
+        _assert_bate_com_reconstrucao(conta)
+
+        with pytest.raises(ParcelamentoInvalidoError):
+            cancelar_plano(plano)
+
+    def test_validacoes(self, user, conta, categoria):
+        with pytest.raises(ParcelamentoInvalidoError):
+            _plano(user, conta, categoria, n=1)
+        with pytest.raises(ParcelamentoInvalidoError):
+            _plano(user, conta, categoria, total='0.02')
+
+
+@pytest.mark.django_db
+class TestParcelamentoAPI:
+
+    def test_post_com_parcelas_cria_plano(self, user, conta, categoria):
+        client = _cliente(user)
+        response = client.post('/api/transacoes/', {
+            'tipo': 'saida', 'descricao': 'Notebook', 'valor': '1200.00', 'data': '2025-03-10',
+            'parcelas': 12, 'categoria': categoria.id, 'conta': conta.id,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['numero_parcelas'] == 12
+        assert len(response.data['parcelas']) == 12
+        assert response.data['parcelas'][-1]['vencimento'] == '2026-02-10'
+        assert Transacao.objects.filter(usuario=user).count() == 12
+
+    def test_post_sem_parcelas_continua_igual(self, user, conta, categoria):
+        response = _cliente(user).post('/api/transacoes/', {
+            'tipo': 'saida', 'descricao': 'Lanche', 'valor': '10.00', 'data': '2025-03-10',
+            'categoria': categoria.id, 'conta': conta.id,
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['plano'] is None
+        assert not PlanoParcelamento.objects.exists()
+
+    def test_patch_e_cancelar(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+        client = _cliente(user)
+
+        response = client.patch(f'/api/planos/{plano.id}/', {'descricao': 'Smartphone'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['parcelas'][0]['descricao'] == 'Smartphone (1/3)'
+
+        response = client.post(f'/api/planos/{plano.id}/cancelar/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['parcelas_removidas'] == 3
+
+        response = client.post(f'/api/planos/{plano.id}/cancelar/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_plano_de_outro_usuario(self, user, conta, categoria):
+        plano = _plano(user, conta, categoria)
+        outro = User.objects.create_user(username='intruso', password='pass')
+        response = _cliente(outro).post(f'/api/planos/{plano.id}/cancelar/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
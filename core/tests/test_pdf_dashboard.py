@@ -1,8 +1,13 @@
+import json
 import pytest
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 from core.models import Conta, Categoria, Transacao, MetaFinanceira, Incentivo
 from core.services import gerar_relatorio_financeiro_pdf, obter_dados_dashboard
 
@@ -81,7 +86,15 @@ class TestRelatorioFinanceiroPDF:
         assert pdf_buffer.getbuffer().nbytes > 0
 
 
+@pytest.fixture
+def cache_limpo():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.mark.django_db
+@pytest.mark.usefixtures('cache_limpo')
 class TestDashboardData:
     
     def test_obter_dados_dashboard_estrutura(self):
@@ -173,16 +186,62 @@ class TestDashboardData:
         assert len(data['metas']) >= 1
         assert data['metas'][0]['valor_alvo'] == 5000.0
     
-    def test_dashboard_conversao_decimals_para_float(self):
+    def test_dashboard_decimais_exatos_no_json(self, settings):
         user = User.objects.create_user(username='decimal_user', password='pass123', email='dec@test.com')
         conta = Conta.objects.create(usuario=user, nome='Conta Decimal', saldo_inicial=1000.50, saldo_atual=1500.75)
         
         data = obter_dados_dashboard(user)
         
-        assert isinstance(data['resumo']['total_entradas'], (int, float))
-        assert isinstance(data['resumo']['total_saidas'], (int, float))
-        assert isinstance(data['resumo']['saldo_liquido'], (int, float))
+        # O serviço devolve Decimal; a conversão fica com o renderer.
+        assert isinstance(data['resumo']['total_entradas'], Decimal)
+        assert data['contas'][0]['saldo_atual'] == Decimal('1500.75')
+        
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/dashboard/')
+        conteudo = json.loads(response.content)
+        assert conteudo['contas'][0]['saldo_inicial'] == 1000.5
+        assert isinstance(conteudo['resumo']['saldo_liquido'], (int, float))
         
-        for conta_data in data['contas']:
-            assert isinstance(conta_data['saldo_inicial'], (int, float))
-            assert isinstance(conta_data['saldo_atual'], (int, float))
+        settings.JSON_DECIMAL_COMO_TEXTO = True
+        response = client.get('/api/dashboard/', {'from_date': '2020-01-01'})
+        assert json.loads(response.content)['contas'][0]['saldo_atual'] == '1500.75'
+
+    def test_secoes_pedidas_e_cache_por_secao(self):
+        user = User.objects.create_user(username='secoes_user', password='pass123')
+        conta = Conta.objects.create(usuario=user, nome='Carteira')
+        categoria = Categoria.objects.create(usuario=user, nome='Lanche', tipo_categoria='saida')
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 valor=Decimal('8.00'), descricao='Lanche', pago=True, data=timezone.localdate())
+
+        with CaptureQueriesContext(connection) as consultas:
+            data = obter_dados_dashboard(user, secoes=['contas', 'resumo'])
+        assert list(data) == ['resumo', 'contas']
+        tabelas = ' '.join(c['sql'] for c in consultas.captured_queries)
+        assert 'core_incentivo' not in tabelas and 'core_metafinanceira' not in tabelas
+
+        obter_dados_dashboard(user, secoes=['graficos', 'metas'])
+        MetaFinanceira.objects.create(usuario=user, nome='Bike', valor_alvo=Decimal('900.00'), data_alvo=date(2026, 12, 1))
+
+        # Só as metas mudaram: os gráficos saem do cache, sem tocar nas transações.
+        with CaptureQueriesContext(connection) as consultas:
+            data = obter_dados_dashboard(user, secoes=['graficos', 'metas'])
+        assert [m['nome'] for m in data['metas']] == ['Bike']
+        assert data['graficos']['gastos_categoria'] == [{'categoria__nome': 'Lanche', 'total': Decimal('8.00')}]
+        assert not any('core_transacao' in c['sql'] for c in consultas.captured_queries)
+
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 valor=Decimal('2.00'), descricao='Suco', pago=True, data=timezone.localdate())
+        data = obter_dados_dashboard(user, secoes=['graficos'])
+        assert data['graficos']['gastos_categoria'][0]['total'] == Decimal('10.00')
+
+    def test_parametro_sections(self):
+        user = User.objects.create_user(username='sections_user', password='pass123')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get('/api/dashboard/', {'sections': 'resumo, contas'})
+        assert set(json.loads(response.content)) == {'resumo', 'contas'}
+
+        response = client.get('/api/dashboard/', {'sections': 'resumo,extrato'})
+        assert response.status_code == 400
@@ -0,0 +1,96 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth.models import User
+from django.test import override_settings
+from core import metricas
+from core.profiling import _trava_captura
+
+
+def _cliente(user):
+    client = APIClient()
+    refresh = RefreshToken.for_user(user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestProfilerMiddleware:
+
+    def test_staff_com_cabecalho_gera_captura(self, tmp_path):
+        staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+        client = _cliente(staff)
+
+        with override_settings(PROFILER_DIR=str(tmp_path)):
+            response = client.get('/api/dashboard/', HTTP_X_PROFILE='1')
+            assert response.status_code == status.HTTP_200_OK
+            captura_id = response['X-Profile-Id']
+
+            assert (tmp_path / f'{captura_id}.prof').exists()
+            assert (tmp_path / f'{captura_id}.json').exists()
+
+            lista = client.get('/api/admin/perfis/')
+            assert lista.status_code == status.HTTP_200_OK
+            assert lista.data[0]['id'] == captura_id
+            assert lista.data[0]['total_consultas'] > 0
+
+            download = client.get(f'/api/admin/perfis/{captura_id}/?formato=json')
+            assert download.status_code == status.HTTP_200_OK
+
+    def test_captura_simultanea_atende_sem_perfil(self, tmp_path):
+        staff = User.objects.create_user(username='staff_ocupado', password='pass', is_staff=True)
+        client = _cliente(staff)
+
+        with override_settings(PROFILER_DIR=str(tmp_path)), _trava_captura:
+            response = client.get('/api/dashboard/', HTTP_X_PROFILE='1')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Profile-Skipped'] == 'ocupado'
+        assert 'X-Profile-Id' not in response
+        assert not list(tmp_path.iterdir())
+        assert metricas.ler('perfis_ignorados') >= 1
+
+    def test_requisicao_sem_marcacao_nao_captura(self, tmp_path):
+        staff = User.objects.create_user(username='staff2', password='pass', is_staff=True)
+        client = _cliente(staff)
+
+        with override_settings(PROFILER_DIR=str(tmp_path)):
+            response = client.get('/api/dashboard/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'X-Profile-Id' not in response
+        assert list(tmp_path.iterdir()) == []
+
+    def test_usuario_comum_nao_captura_nem_lista(self, tmp_path):
+        user = User.objects.create_user(username='aluno', password='pass')
+        client = _cliente(user)
+
+        with override_settings(PROFILER_DIR=str(tmp_path)):
+            response = client.get('/api/dashboard/?_profile=1')
+            assert 'X-Profile-Id' not in response
+            assert list(tmp_path.iterdir()) == []
+            assert client.get('/api/admin/perfis/').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_buffer_circular_limita_capturas(self, tmp_path):
+        staff = User.objects.create_user(username='staff3', password='pass', is_staff=True)
+        client = _cliente(staff)
+
+        with override_settings(PROFILER_DIR=str(tmp_path), PROFILER_MAX_CAPTURAS=2):
+            ids = [
+                client.get('/api/transacoes/?_profile=1')['X-Profile-Id']
+                for _ in range(4)
+            ]
+
+        restantes = sorted(p.stem for p in tmp_path.glob('*.json'))
+        assert restantes == sorted(ids[-2:])
+        assert len(list(tmp_path.glob('*.prof'))) == 2
+
+    def test_download_rejeita_id_invalido(self, tmp_path):
+        staff = User.objects.create_user(username='staff4', password='pass', is_staff=True)
+        client = _cliente(staff)
+
+        with override_settings(PROFILER_DIR=str(tmp_path)):
+            response = client.get('/api/admin/perfis/..%2Fsettings/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,127 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.autofill import cronograma_pede_meia
+from core.models import Transacao, Lembrete, PerfilAluno
+from core.services import PASSOS_RECORRENCIA, _ocorrencias, projetar_fluxo_caixa
+
+HOJE = date(2025, 5, 10)
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, 'Corrente', saldo_inicial=Decimal('100.00'))
+
+
+@pytest.fixture
+def entrada(categoria_factory, user):
+    return categoria_factory(user, 'Bolsa', 'entrada')
+
+
+@pytest.fixture
+def saida(categoria_factory, user):
+    return categoria_factory(user, 'Contas')
+
+
+def _criar(user, conta, categoria, tipo, valor, data, pago=True, vencimento=None):
+    return Transacao.objects.create(
+        usuario=user, conta=conta, categoria=categoria, tipo=tipo, valor=Decimal(valor),
+        descricao='t', data=data, pago=pago, vencimento=vencimento
+    )
+
+
+def _saldo(resultado, dia, conta_idx=0):
+    return resultado['contas'][conta_idx]['saldos'][resultado['datas'].index(dia)]
+
+
+@pytest.mark.django_db
+class TestProjecaoFluxoCaixa:
+
+    def test_pendentes_entram_no_vencimento(self, user, conta, entrada, saida):
+        _criar(user, conta, entrada, 'entrada', '50.00', date(2024, 1, 5))
+        _criar(user, conta, saida, 'saida', '30.00', date(2025, 5, 1), pago=False, vencimento=date(2025, 5, 20))
+        _criar(user, conta, saida, 'saida', '10.00', date(2025, 4, 1), pago=False)  # vencida
+        _criar(user, conta, entrada, 'entrada', '5.00', date(2025, 6, 1))  # paga com data futura
+
+        resultado = projetar_fluxo_caixa(user, meses=2, incluir_pede_meia=False, hoje=HOJE)
+
+        assert resultado['datas'][0] == HOJE
+        assert resultado['datas'][-1] == date(2025, 7, 10)
+        assert resultado['contas'][0]['saldo_hoje'] == Decimal('150.00')
+        assert _saldo(resultado, HOJE) == Decimal('140.00')
+        assert _saldo(resultado, date(2025, 5, 19)) == Decimal('140.00')
+        assert _saldo(resultado, date(2025, 5, 20)) == Decimal('110.00')
+        assert _saldo(resultado, date(2025, 6, 1)) == Decimal('115.00')
+        assert resultado['contas'][0]['primeiro_negativo'] is None
+
+    def test_lembrete_recorrente_e_primeiro_negativo(self, user, conta, saida):
+        aluguel = _criar(user, conta, saida, 'saida', '60.00', date(2025, 4, 15))
+        Lembrete.objects.create(usuario=user, titulo='Aluguel', recorrencia='mensal', transacao=aluguel)
+
+        resultado = projetar_fluxo_caixa(user, meses=3, incluir_pede_meia=False, hoje=HOJE)
+
+        assert resultado['eventos']['lembretes'] == 3
+        assert _saldo(resultado, date(2025, 5, 15)) == Decimal('-20.00')
+        assert resultado['contas'][0]['primeiro_negativo'] == date(2025, 5, 15)
+        assert resultado['total']['primeiro_negativo'] == date(2025, 5, 15)
+        assert resultado['total']['menor_saldo'] == Decimal('-140.00')
+
+    def test_lembrete_com_ancora_antiga(self, user, conta, saida):
+        conta_fixa = _criar(user, conta, saida, 'saida', '10.00', date(2023, 1, 31))
+        Lembrete.objects.create(usuario=user, titulo='Internet', recorrencia='mensal', transacao=conta_fixa)
+
+        resultado = projetar_fluxo_caixa(user, meses=1, incluir_pede_meia=False, hoje=HOJE)
+
+        assert resultado['eventos']['lembretes'] == 1
+        assert _saldo(resultado, date(2025, 5, 31)) == _saldo(resultado, date(2025, 5, 30)) - 10
+
+    def test_ocorrencias_nao_pulam_datas(self):
+        assert _ocorrencias(date(2024, 1, 15), 'anual', date(2025, 1, 14), date(2025, 12, 31)) == [date(2025, 1, 15)]
+        assert _ocorrencias(date(2023, 1, 31), 'mensal', date(2025, 5, 10), date(2025, 6, 30)) == [
+            date(2025, 5, 31), date(2025, 6, 30),
+        ]
+
+        # Confere com a contagem passo a passo para âncoras de vários anos.
+        for recorrencia, (passo, _) in PASSOS_RECORRENCIA.items():
+            for dias in range(0, 4 * 366, 29):
+                inicio = date(2020, 2, 29) + timedelta(days=dias)
+                depois_de, ate = date(2025, 1, 14), date(2025, 3, 31)
+                esperado, k = [], 1
+                while inicio + passo * k <= ate:
+                    if inicio + passo * k > depois_de:
+                        esperado.append(inicio + passo * k)
+                    k += 1
+                assert _ocorrencias(inicio, recorrencia, depois_de, ate) == esperado, (recorrencia, inicio)
+
+    def test_pede_meia_projeta_apenas_parcelas_nao_lancadas(self, user, conta, entrada):
+        PerfilAluno.objects.filter(usuario=user).update(serie_em=3)
+        _criar(user, conta, entrada, 'entrada', '200.00', date(2025, 3, 30))
+        Transacao.objects.filter(usuario=user).update(descricao="Pé-de-Meia: Incentivo Matrícula - 3º Ano")
+        _criar(user, conta, entrada, 'entrada', '200.00', date(2025, 5, 28), pago=False)
+        Transacao.objects.filter(usuario=user, pago=False).update(descricao="Pé-de-Meia: Frequência - May/2025")
+
+        resultado = projetar_fluxo_caixa(user, meses=12, hoje=HOJE)
+
+        # Junho a novembro de 2025; em 2026 o aluno já passou do 3º ano.
+        assert resultado['eventos']['pede_meia'] == 6
+        assert _saldo(resultado, date(2025, 11, 30)) == Decimal('300.00') + 200 + 6 * 200
+
+    def test_cronograma_mantem_regra_do_autofill(self):
+        parcelas = cronograma_pede_meia(2, hoje=date(2025, 10, 3))
+        assert parcelas[0]['parcela'] == 'matricula'
+        assert parcelas[0]['data'] == date(2025, 10, 3)
+        assert [p['data'] for p in parcelas[1:]] == [date(2025, 10, 28), date(2025, 11, 28)]
+
+    def test_endpoint(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get('/api/contas/projecao/?meses=1')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['datas']) == (response.data['to_date'] - response.data['from_date']).days + 1
+
+        assert client.get('/api/contas/projecao/?meses=0').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get('/api/contas/projecao/?conta=999999').status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,141 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Conta, Categoria, Transacao, TransacaoRecorrente, SaldoMensal
+from core.recorrencias import gerar_recorrencias, ocorrencias_ate
+from core.saldos_mensais import reconstruir_saldos_mensais
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user)
+
+
+@pytest.fixture
+def categoria(categoria_factory, user):
+    return categoria_factory(user, 'Transporte')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _recorrente(user, conta, categoria, **extra):
+    dados = dict(
+        usuario=user, conta=conta, categoria=categoria, tipo='saida', descricao='Passe escolar',
+        valor=Decimal('50.00'), recorrencia='mensal', data_inicio=date(2025, 1, 31),
+        proxima_execucao=date(2025, 1, 31),
+    )
+    dados.update(extra)
+    return TransacaoRecorrente.objects.create(**dados)
+
+
+@pytest.mark.django_db
+class TestRecorrencias:
+
+    def test_ocorrencias_nao_acumulam_deslocamento(self, user, conta, categoria):
+        recorrente = _recorrente(user, conta, categoria)
+        datas, proxima = ocorrencias_ate(recorrente, date(2025, 4, 15))
+        assert datas == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+        assert proxima == date(2025, 4, 30)
+
+    def test_backfill_lanca_todas_as_ocorrencias_perdidas(self, user, conta, categoria):
+        recorrente = _recorrente(user, conta, categoria)
+
+        assert gerar_recorrencias(date(2025, 6, 30)) == 6
+
+        datas = list(Transacao.objects.filter(recorrente=recorrente).order_by('data').values_list('data', flat=True))
+        assert datas[0] == date(2025, 1, 31) and datas[-1] == date(2025, 6, 30)
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('-300.00')
+        recorrente.refresh_from_db()
+        assert (recorrente.ocorrencias_geradas, recorrente.proxima_execucao) == (6, date(2025, 7, 31))
+
+    def test_rodar_de_novo_nao_duplica(self, user, conta, categoria):
+        _recorrente(user, conta, categoria)
+        gerar_recorrencias(date(2025, 3, 31))
+        assert gerar_recorrencias(date(2025, 3, 31)) == 0
+        assert Transacao.objects.filter(usuario=user).count() == 3
+
+    def test_ocorrencia_ja_lancada_nao_se_repete(self, user, conta, categoria):
+        recorrente = _recorrente(user, conta, categoria)
+        # Simula uma execução anterior que lançou a ocorrência mas não avançou o modelo.
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 descricao='Passe escolar', valor=Decimal('50.00'),
+                                 data=date(2025, 1, 31), pago=True, recorrente=recorrente)
+
+        assert gerar_recorrencias(date(2025, 2, 28)) == 1
+        conta.refresh_from_db()
+        assert conta.saldo_atual == Decimal('-100.00')
+
+    def test_saldo_e_checkpoints_com_varias_contas_e_usuarios(self, user, conta, categoria):
+        outra = Conta.objects.create(usuario=user, nome='Poupança')
+        _recorrente(user, conta, categoria)
+        _recorrente(user, conta, categoria, descricao='Recarga', valor=Decimal('20.00'), recorrencia='semanal',
+                    data_inicio=date(2025, 1, 1), proxima_execucao=date(2025, 1, 1))
+        _recorrente(user, outra, categoria, tipo='entrada', descricao='Mesada', valor=Decimal('100.00'),
+                    data_inicio=date(2025, 1, 5), proxima_execucao=date(2025, 1, 5))
+        vizinho = User.objects.create_user(username='vizinho', password='pass')
+        conta_vizinho = Conta.objects.create(usuario=vizinho, nome='Principal')
+        _recorrente(vizinho, conta_vizinho, Categoria.objects.create(usuario=vizinho, nome='X', tipo_categoria='saida'))
+
+        gerar_recorrencias(date(2025, 2, 28), lote=2)
+
+        for c in (conta, outra, conta_vizinho):
+            c.refresh_from_db()
+            esperado = sum(
+                t.valor if t.tipo == 'entrada' else -t.valor for t in Transacao.objects.filter(conta=c)
+            )
+            assert c.saldo_atual == esperado
+        assert outra.saldo_atual == Decimal('200.00')
+
+        incrementais = {c.id: list(SaldoMensal.objects.filter(conta=c).order_by('mes').values_list(
+            'mes', 'total_pago', 'saldo_fechamento')) for c in (conta, outra)}
+        reconstruir_saldos_mensais([conta.id, outra.id])
+        for c in (conta, outra):
+            assert list(SaldoMensal.objects.filter(conta=c).order_by('mes').values_list(
+                'mes', 'total_pago', 'saldo_fechamento')) == incrementais[c.id]
+
+    def test_data_fim_encerra_o_modelo(self, user, conta, categoria):
+        recorrente = _recorrente(user, conta, categoria, data_fim=date(2025, 3, 15))
+        assert gerar_recorrencias(date(2025, 12, 31)) == 2
+        recorrente.refresh_from_db()
+        assert recorrente.ativa is False
+
+    def test_comando(self, user, conta, categoria, capsys):
+        _recorrente(user, conta, categoria)
+        call_command('gerar_recorrencias', ate='2025-02-28')
+        assert '2 transações recorrentes lançadas' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+class TestRecorrenciasAPI:
+
+    def test_criar_e_nao_mudar_a_regra(self, user, conta, categoria):
+        client = _cliente(user)
+        response = client.post('/api/recorrentes/', {
+            'tipo': 'saida', 'descricao': 'Recarga', 'valor': '15.00', 'recorrencia': 'mensal',
+            'data_inicio': '2025-05-10', 'categoria': categoria.id, 'conta': conta.id,
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['proxima_execucao'] == '2025-05-10'
+
+        url = f"/api/recorrentes/{response.data['id']}/"
+        assert client.patch(url, {'valor': '18.00'}, format='json').status_code == status.HTTP_200_OK
+        response = client.patch(url, {'recorrencia': 'semanal'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_conta_de_outro_usuario(self, user, conta, categoria):
+        outro = User.objects.create_user(username='outro', password='pass')
+        response = _cliente(outro).post('/api/recorrentes/', {
+            'tipo': 'saida', 'descricao': 'Recarga', 'valor': '15.00', 'recorrencia': 'nenhuma',
+            'data_inicio': '2025-05-10', 'categoria': categoria.id, 'conta': conta.id,
+        }, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
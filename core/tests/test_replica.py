@@ -0,0 +1,95 @@
+import sqlite3
+import pytest
+from types import SimpleNamespace
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import override_settings
+from core import routers
+from core.models import Conta, Transacao
+from core.routers import ReplicaRouter, ler_da_replica, atualizar_replica, escreveu_recentemente
+
+
+@pytest.fixture
+def com_replica(monkeypatch):
+    monkeypatch.setattr(routers, 'replica_disponivel', lambda: True)
+
+
+@pytest.mark.django_db
+class TestReplicaRouter:
+
+    def test_leituras_fora_do_contexto_vao_para_primario(self, com_replica):
+        assert ReplicaRouter().db_for_read(Transacao) == 'default'
+
+    def test_escrita_recente_mantem_usuario_no_primario(self, com_replica):
+        user = User.objects.create_user(username='escritor', password='pass')
+        Conta.objects.create(usuario=user, nome='Conta', saldo_inicial=Decimal('10.00'))
+
+        assert escreveu_recentemente(user.pk)
+        with ler_da_replica(user) as banco:
+            assert banco == 'default'
+            assert ReplicaRouter().db_for_read(Transacao) == 'default'
+
+    def test_bloco_atomico_le_do_primario(self, com_replica):
+        with ler_da_replica():
+            with transaction.atomic():
+                assert ReplicaRouter().db_for_read(Transacao) == 'default'
+
+    def test_sem_replica_configurada_usa_primario(self):
+        with ler_da_replica() as banco:
+            assert banco == 'default'
+            assert ReplicaRouter().db_for_read(Transacao) == 'default'
+
+    def test_replica_nao_recebe_migracoes(self):
+        assert ReplicaRouter().allow_migrate('replica', 'core') is False
+        assert ReplicaRouter().allow_migrate('default', 'core') is None
+
+
+def test_leituras_no_contexto_vao_para_replica(com_replica):
+    usuario = SimpleNamespace(pk=987654)
+    routers.cache.delete(routers._chave_escrita(usuario.pk))
+
+    with ler_da_replica(usuario) as banco:
+        assert banco == 'replica'
+        assert ReplicaRouter().db_for_read(Transacao) == 'replica'
+        assert ReplicaRouter().db_for_write(Transacao) == 'default'
+
+    assert ReplicaRouter().db_for_read(Transacao) == 'default'
+
+
+def test_atualizar_replica_copia_snapshot(tmp_path):
+    primario = tmp_path / 'primario.sqlite3'
+    replica = tmp_path / 'replica.sqlite3'
+
+    conexao = sqlite3.connect(primario)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("CREATE TABLE t (valor INTEGER)")
+    conexao.execute("INSERT INTO t VALUES (1)")
+    conexao.commit()
+
+    with override_settings(SQLITE_PRAGMAS={'busy_timeout': 1000}):
+        atualizar_replica(primario, replica)
+        leitor = sqlite3.connect(replica)
+        assert leitor.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+        # Leitor com conexão aberta enxerga a nova cópia após a atualização.
+        conexao.execute("INSERT INTO t VALUES (2)")
+        conexao.commit()
+        atualizar_replica(primario, replica)
+        assert leitor.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+
+    leitor.close()
+    conexao.close()
+
+
+def test_replica_exige_cache_compartilhado(com_replica, settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert [erro.id for erro in routers.verificar_cache_compartilhado()] == ['core.E001']
+
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                   'LOCATION': '/tmp/controlae-cache'}}
+    assert routers.verificar_cache_compartilhado() == []
+
+
+def test_sem_replica_qualquer_cache_serve():
+    assert routers.verificar_cache_compartilhado() == []
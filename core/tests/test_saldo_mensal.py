@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db.models import Sum
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Transacao, SaldoMensal
+from core.saldos_mensais import reconstruir_saldos_mensais
+from core.services import saldo_em_data
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('100.00'))
+
+
+@pytest.fixture
+def outra(conta_factory, user):
+    return conta_factory(user, 'Reserva')
+
+
+@pytest.fixture
+def entrada(categoria_factory, user):
+    return categoria_factory(user, 'Salário', 'entrada')
+
+
+@pytest.fixture
+def saida(categoria_factory, user):
+    return categoria_factory(user, 'Mercado')
+
+
+def _criar(user, conta, categoria, tipo, valor, data, pago=True):
+    return Transacao.objects.create(
+        usuario=user, conta=conta, categoria=categoria, tipo=tipo,
+        valor=Decimal(valor), descricao='t', data=data, pago=pago
+    )
+
+
+def _saldo_por_varredura(conta, data):
+    transacoes = Transacao.objects.filter(conta=conta, data__lte=data)
+    entradas = transacoes.filter(tipo='entrada').aggregate(Sum('valor'))['valor__sum'] or 0
+    saidas = transacoes.filter(tipo='saida').aggregate(Sum('valor'))['valor__sum'] or 0
+    return conta.saldo_inicial + entradas - saidas
+
+
+def _checkpoints(conta):
+    return list(SaldoMensal.objects.filter(conta=conta).values_list('mes', 'saldo_fechamento'))
+
+
+@pytest.mark.django_db
+class TestSaldoMensal:
+
+    def test_checkpoints_acumulam_por_mes(self, user, conta, entrada, saida):
+        _criar(user, conta, entrada, 'entrada', '500.00', date(2025, 1, 10))
+        _criar(user, conta, saida, 'saida', '120.00', date(2025, 3, 5))
+        _criar(user, conta, saida, 'saida', '30.00', date(2025, 3, 20), pago=False)
+
+        assert _checkpoints(conta) == [
+            (date(2025, 1, 1), Decimal('500.00')),
+            (date(2025, 3, 1), Decimal('350.00')),
+        ]
+        marco = SaldoMensal.objects.get(conta=conta, mes=date(2025, 3, 1))
+        assert marco.total_pago == Decimal('380.00')
+        assert marco.total_pendente == Decimal('-30.00')
+
+    def test_edicao_retroativa_propaga_para_meses_seguintes(self, user, conta, entrada, saida):
+        _criar(user, conta, entrada, 'entrada', '500.00', date(2025, 1, 10))
+        _criar(user, conta, saida, 'saida', '100.00', date(2025, 4, 1))
+
+        transacao = _criar(user, conta, entrada, 'entrada', '50.00', date(2025, 6, 1))
+        transacao.data = date(2025, 2, 15)
+        transacao.valor = Decimal('80.00')
+        transacao.save()
+
+        assert _checkpoints(conta) == [
+            (date(2025, 1, 1), Decimal('500.00')),
+            (date(2025, 2, 1), Decimal('580.00')),
+            (date(2025, 4, 1), Decimal('480.00')),
+            (date(2025, 6, 1), Decimal('480.00')),
+        ]
+
+    def test_mover_entre_contas_tipo_pago_e_excluir(self, user, conta, outra, entrada, saida):
+        transacao = _criar(user, conta, saida, 'saida', '40.00', date(2025, 5, 2), pago=False)
+
+        transacao.pago = True
+        transacao.save()
+        checkpoint = SaldoMensal.objects.get(conta=conta, mes=date(2025, 5, 1))
+        assert (checkpoint.total_pago, checkpoint.total_pendente) == (Decimal('-40.00'), Decimal('0.00'))
+
+        transacao.conta = outra
+        transacao.tipo = 'entrada'
+        transacao.save()
+        assert SaldoMensal.objects.get(conta=conta, mes=date(2025, 5, 1)).saldo_fechamento == Decimal('0.00')
+        assert SaldoMensal.objects.get(conta=outra, mes=date(2025, 5, 1)).saldo_fechamento == Decimal('40.00')
+
+        transacao.delete()
+        assert SaldoMensal.objects.get(conta=outra, mes=date(2025, 5, 1)).saldo_fechamento == Decimal('0.00')
+
+    def test_saldo_em_data_confere_com_varredura(self, user, conta, entrada, saida):
+        _criar(user, conta, entrada, 'entrada', '500.00', date(2024, 11, 10))
+        _criar(user, conta, saida, 'saida', '75.50', date(2025, 1, 3))
+        _criar(user, conta, saida, 'saida', '20.00', date(2025, 1, 25), pago=False)
+        _criar(user, conta, entrada, 'entrada', '10.00', date(2025, 2, 1))
+
+        for dia in [date(2024, 10, 1), date(2024, 11, 10), date(2025, 1, 3),
+                    date(2025, 1, 24), date(2025, 1, 31), date(2025, 2, 1), date(2026, 1, 1)]:
+            resultado = saldo_em_data(conta, dia)
+            assert resultado['saldo'] == _saldo_por_varredura(conta, dia), dia
+
+        janeiro = saldo_em_data(conta, date(2025, 1, 31))
+        assert janeiro['saldo_pago'] == Decimal('524.50')
+        assert janeiro['movimento_pendente'] == Decimal('-20.00')
+
+    def test_reconstruir_gera_os_mesmos_checkpoints(self, user, conta, outra, entrada, saida):
+        _criar(user, conta, entrada, 'entrada', '500.00', date(2025, 1, 10))
+        _criar(user, conta, saida, 'saida', '120.00', date(2025, 3, 5), pago=False)
+        _criar(user, outra, entrada, 'entrada', '9.99', date(2025, 2, 5))
+
+        incremental = sorted(SaldoMensal.objects.values_list(
+            'conta_id', 'mes', 'saldo_fechamento', 'total_pago', 'total_pendente'))
+        reconstruir_saldos_mensais()
+        reconstruido = sorted(SaldoMensal.objects.values_list(
+            'conta_id', 'mes', 'saldo_fechamento', 'total_pago', 'total_pendente'))
+
+        assert incremental == reconstruido
+
+    def test_endpoint_saldo_em(self, user, conta, entrada):
+        _criar(user, conta, entrada, 'entrada', '500.00', date(2025, 1, 10))
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get(f'/api/contas/{conta.id}/saldo_em/?data=2025-02-01')
+        assert response.status_code == status.HTTP_200_OK
+        assert Decimal(str(response.data['saldo'])) == Decimal('600.00')
+
+        response = client.get(f'/api/contas/{conta.id}/saldo_em/?data=ontem')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
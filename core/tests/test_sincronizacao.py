@@ -0,0 +1,108 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Conta, Transacao, Lembrete, Exclusao, SequenciaUsuario
+from core.sincronizacao import alteracoes_desde, purgar_exclusoes
+
+
+@pytest.fixture
+def conta(conta_factory, user):
+    return conta_factory(user, saldo_inicial=Decimal('10.00'))
+
+
+@pytest.fixture
+def categoria(categoria_factory, user):
+    return categoria_factory(user, 'Lanche')
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _tipos(pagina):
+    return [(item['tipo'], item['id']) for item in pagina['alteracoes']]
+
+
+@pytest.mark.django_db
+class TestSincronizacao:
+
+    def test_seq_cresce_em_todas_as_escritas(self, user, conta, categoria):
+        assert (conta.seq, categoria.seq) == (1, 2)
+
+        transacao = Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                             valor=Decimal('2.00'), descricao='t', data=date(2025, 1, 1))
+        conta.refresh_from_db()
+        # Criar a transação também atualiza o saldo da conta.
+        assert conta.seq > transacao.seq
+        assert SequenciaUsuario.objects.get(usuario=user).valor == conta.seq
+
+    def test_cursor_retorna_apenas_o_que_mudou(self, user, conta, categoria):
+        inicial = alteracoes_desde(user)
+        assert _tipos(inicial) == [('conta', conta.id), ('categoria', categoria.id)]
+        assert inicial['mais'] is False
+
+        categoria.nome = 'Lanches'
+        categoria.save()
+        lembrete = Lembrete.objects.create(usuario=user, titulo='Pagar')
+
+        pagina = alteracoes_desde(user, int(inicial['cursor']))
+        assert _tipos(pagina) == [('categoria', categoria.id), ('lembrete', lembrete.id)]
+        assert pagina['alteracoes'][0]['dados']['nome'] == 'Lanches'
+        assert alteracoes_desde(user, int(pagina['cursor']))['alteracoes'] == []
+
+    def test_paginas_limitadas_cobrem_tudo_uma_vez(self, user, conta, categoria):
+        for i in range(3):
+            Lembrete.objects.create(usuario=user, titulo=f'L{i}')
+
+        vistos, cursor = [], 0
+        while True:
+            pagina = alteracoes_desde(user, cursor, limite=2)
+            assert len(pagina['alteracoes']) <= 2
+            vistos += [item['seq'] for item in pagina['alteracoes']]
+            cursor = int(pagina['cursor'])
+            if not pagina['mais']:
+                break
+
+        assert vistos == [1, 2, 3, 4, 5]
+
+    def test_exclusao_vira_tombstone(self, user, categoria):
+        cursor = int(alteracoes_desde(user)['cursor'])
+        categoria_id = categoria.id
+        categoria.delete()
+
+        pagina = alteracoes_desde(user, cursor)
+        assert pagina['alteracoes'] == [{
+            'seq': cursor + 1, 'tipo': 'categoria', 'id': categoria_id, 'excluido': True, 'dados': None,
+        }]
+
+    def test_exclusao_do_usuario_nao_gera_tombstones(self, user):
+        user.delete()
+        assert not Exclusao.objects.exists()
+
+    def test_purga_expira_cursores_antigos(self, user, conta, categoria):
+        categoria.delete()
+        Exclusao.objects.update(excluida_em=timezone.now() - timedelta(days=100))
+
+        assert purgar_exclusoes(dias=90) == 1
+        client = _cliente(user)
+        assert client.get('/api/sync/?since=1').status_code == status.HTTP_410_GONE
+        response = client.get('/api/sync/?since=0')
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['tipo'] for item in response.data['alteracoes']] == ['conta']
+
+    def test_endpoint_isolado_por_usuario(self, user):
+        outro = User.objects.create_user(username='sync_outro', password='pass')
+        Conta.objects.create(usuario=outro, nome='Outra')
+
+        response = _cliente(outro).get('/api/sync/?limite=10')
+        assert [item['tipo'] for item in response.data['alteracoes']] == ['conta']
+        assert response.data['alteracoes'][0]['dados']['nome'] == 'Outra'
+
+        assert _cliente(user).get('/api/sync/?since=abc').status_code == status.HTTP_400_BAD_REQUEST
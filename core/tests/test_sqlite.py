@@ -0,0 +1,32 @@
+import pytest
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.mark.django_db
+class TestConexaoSQLite:
+
+    def test_pragmas_aplicados_na_conexao(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == settings.SQLITE_PRAGMAS['busy_timeout']
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone()[0] == 1  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            assert cursor.fetchone()[0] == 2  # MEMORY
+            cursor.execute("PRAGMA cache_size")
+            assert cursor.fetchone()[0] == settings.SQLITE_PRAGMAS['cache_size']
+
+    def test_transacoes_de_escrita_usam_begin_immediate(self):
+        assert connection.transaction_mode == 'IMMEDIATE'
+
+
+def test_benchmark_sqlite_executa():
+    saida = StringIO()
+    call_command('benchmark_sqlite', processos=2, operacoes=20, linhas_iniciais=100, stdout=saida)
+    texto = saida.getvalue()
+
+    assert 'padrao' in texto
+    assert 'ajustado' in texto
@@ -0,0 +1,106 @@
+import pytest
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core import metricas, throttling
+from core.models import BaldeThrottle
+from core.throttling import consumir_tokens, custo_da_view, interpretar_orcamento
+
+ORCAMENTOS = {'usuario': '100/min', 'anonimo': '2/min', 'relatorios': '40/min'}
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = SimpleNamespace(valor=1_000_000.0)
+    monkeypatch.setattr(throttling.time, 'time', lambda: agora.valor)
+    return agora
+
+
+@pytest.fixture
+def client(db):
+    cache.clear()
+    user = User.objects.create_user(username='throttle_user', password='pass')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestBaldeTokens:
+
+    def test_consome_e_recarrega(self, relogio):
+        capacidade, recarga = interpretar_orcamento('3/min')
+        assert (capacidade, recarga) == (3, 0.05)
+
+        assert [consumir_tokens('t', 1, capacidade, recarga)[0] for _ in range(3)] == [True] * 3
+        permitido, espera = consumir_tokens('t', 1, capacidade, recarga)
+        assert not permitido
+        assert espera == pytest.approx(20.0)
+
+        relogio.valor += 20
+        assert consumir_tokens('t', 1, capacidade, recarga) == (True, 0)
+        assert BaldeThrottle.objects.get(chave='t').tokens == pytest.approx(0)
+
+    def test_recarga_limitada_a_capacidade(self, relogio):
+        consumir_tokens('t', 2, 3, 1.0)
+        relogio.valor += 3600
+
+        assert consumir_tokens('t', 3, 3, 1.0)[0]
+        assert not consumir_tokens('t', 1, 3, 1.0)[0]
+
+    def test_custo_por_action(self):
+        view = SimpleNamespace(action='projecao', custos_throttle={'projecao': 3})
+        assert custo_da_view(view) == 3
+        assert custo_da_view(SimpleNamespace(action='list', custos_throttle={'projecao': 3})) == 1
+        assert custo_da_view(SimpleNamespace(custo_throttle=20)) == 20
+
+
+@pytest.fixture(autouse=True)
+def orcamentos(settings):
+    settings.THROTTLE_ORCAMENTOS = ORCAMENTOS
+
+
+@pytest.mark.django_db
+class TestThrottleEndpoints:
+
+    def test_pdf_custa_mais_e_informa_retry_after(self, client, relogio):
+        assert client.get('/api/relatorio/pdf/').status_code == status.HTTP_200_OK
+        assert client.get('/api/relatorio/pdf/').status_code == status.HTTP_200_OK
+
+        response = client.get('/api/relatorio/pdf/')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) == 30
+        assert metricas.ler('throttle_bloqueios', escopo='relatorios') == 1
+
+        # O escopo dos relatórios não gasta o orçamento geral.
+        assert client.get('/api/contas/').status_code == status.HTTP_200_OK
+
+    def test_todos_os_escopos_no_banco(self, client, relogio):
+        # Um balde no cache seria um por worker com o LocMemCache padrão.
+        client.get('/api/contas/')
+        client.get('/api/dashboard/')
+        usuario_id = User.objects.get(username='throttle_user').pk
+        assert set(BaldeThrottle.objects.values_list('chave', flat=True)) == {
+            f'usuario:{usuario_id}', f'relatorios:{usuario_id}',
+        }
+
+    def test_anonimo_limitado_por_ip(self, db, relogio):
+        client = APIClient()
+        dados = {'username': 'ninguem', 'password': 'errada'}
+        assert client.post('/api/token/', dados).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.post('/api/token/', dados).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.post('/api/token/', dados).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_metricas_para_staff(self, db, relogio):
+        cache.clear()
+        metricas.incrementar('throttle_bloqueios', escopo='relatorios')
+        admin = User.objects.create_user(username='admin_metricas', password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get('/api/admin/metricas/')
+        assert response.status_code == status.HTTP_200_OK
+        assert {'nome': 'throttle_bloqueios', 'rotulos': {'escopo': 'relatorios'}, 'valor': 1} in response.data
@@ -0,0 +1,89 @@
+import json
+import pytest
+from io import StringIO
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from core.models import Conta, Categoria, Transacao
+from core.services import transferir_saldo, gerar_relatorio_financeiro_pdf
+from core.tracing import exportador
+
+
+def _ler_spans(caminho):
+    exportador.descarregar()
+    with open(caminho, encoding='utf-8') as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+@pytest.mark.django_db
+class TestTracing:
+
+    def test_spans_aninhados_servico_sql(self, tmp_path):
+        arquivo = tmp_path / 'traces.jsonl'
+        user = User.objects.create_user(username='trace_user', password='pass')
+        origem = Conta.objects.create(usuario=user, nome='A', saldo_inicial=100, saldo_atual=100)
+        destino = Conta.objects.create(usuario=user, nome='B', saldo_inicial=0, saldo_atual=0)
+
+        with override_settings(TRACING_ENABLED=True, TRACING_FILE=str(arquivo)):
+            transferir_saldo(user, origem, destino, 10)
+            spans = _ler_spans(arquivo)
+
+        raiz = next(s for s in spans if s['pai_id'] is None)
+        assert raiz['nome'] == 'services.transferir_saldo'
+        assert raiz['atributos']['usuario_id'] == user.id
+        assert raiz['atributos']['sql_consultas'] > 0
+
+        sql = [s for s in spans if s['nome'] == 'sql']
+        assert sql
+        assert all(s['trace_id'] == raiz['trace_id'] for s in sql)
+        assert all(s['pai_id'] == raiz['span_id'] for s in sql)
+
+    def test_pdf_gera_span_reportlab(self, tmp_path):
+        arquivo = tmp_path / 'traces.jsonl'
+        user = User.objects.create_user(username='trace_pdf', password='pass')
+        conta = Conta.objects.create(usuario=user, nome='A', saldo_inicial=100, saldo_atual=100)
+        categoria = Categoria.objects.create(usuario=user, nome='Cat', tipo_categoria='saida')
+        Transacao.objects.create(usuario=user, conta=conta, categoria=categoria, tipo='saida',
+                                 valor=Decimal('5.00'), descricao='X', pago=True, data=timezone.localdate())
+
+        with override_settings(TRACING_ENABLED=True, TRACING_FILE=str(arquivo)):
+            gerar_relatorio_financeiro_pdf(user)
+            spans = _ler_spans(arquivo)
+
+        raiz = next(s for s in spans if s['pai_id'] is None)
+        build = next(s for s in spans if s['nome'] == 'reportlab.build')
+        assert build['pai_id'] == raiz['span_id']
+        assert build['atributos']['bytes'] > 0
+        assert build['atributos']['transacoes'] == 1
+
+    def test_amostragem_zero_nao_grava(self, tmp_path):
+        arquivo = tmp_path / 'traces.jsonl'
+        user = User.objects.create_user(username='trace_amostra', password='pass')
+        origem = Conta.objects.create(usuario=user, nome='A', saldo_inicial=100, saldo_atual=100)
+        destino = Conta.objects.create(usuario=user, nome='B', saldo_inicial=0, saldo_atual=0)
+
+        with override_settings(TRACING_ENABLED=True, TRACING_FILE=str(arquivo), TRACING_SAMPLE_RATE=0.0):
+            transferir_saldo(user, origem, destino, 10)
+            exportador.descarregar()
+
+        assert not arquivo.exists()
+
+    def test_comando_traces_lentos(self, tmp_path):
+        arquivo = tmp_path / 'traces.jsonl'
+        user = User.objects.create_user(username='trace_cli', password='pass')
+        origem = Conta.objects.create(usuario=user, nome='A', saldo_inicial=100, saldo_atual=100)
+        destino = Conta.objects.create(usuario=user, nome='B', saldo_inicial=0, saldo_atual=0)
+
+        with override_settings(TRACING_ENABLED=True, TRACING_FILE=str(arquivo)):
+            transferir_saldo(user, origem, destino, 10)
+            transferir_saldo(user, origem, destino, 20)
+            exportador.descarregar()
+
+        saida = StringIO()
+        call_command('traces_lentos', arquivo=str(arquivo), detalhes=True, stdout=saida)
+        texto = saida.getvalue()
+
+        assert texto.count('services.transferir_saldo') == 4
+        assert 'consultas' in texto
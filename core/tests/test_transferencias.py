@@ -0,0 +1,152 @@
+import random
+import sqlite3
+import threading
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import Conta, MetaFinanceira, Transacao
+from core.services import transferir_saldo, depositar_em_meta, TransferenciaInvalidaError, DepositoMetaError
+
+
+@pytest.fixture
+def origem(conta_factory, user):
+    return conta_factory(user, 'Carteira', saldo_atual=Decimal('50.00'))
+
+
+@pytest.fixture
+def destino(conta_factory, user):
+    return conta_factory(user, 'Poupança')
+
+
+@pytest.fixture
+def banco_em_arquivo(transactional_db, tmp_path):
+    """
+    O banco de teste do SQLite fica em memória com cache compartilhado, onde
+    escritas concorrentes falham com "table is locked" em vez de esperar.
+    Copia o schema para um arquivo e aponta as conexões para ele.
+    """
+    connection.ensure_connection()
+    memoria = connection.connection
+    caminho = str(tmp_path / 'concorrencia.sqlite3')
+    arquivo = sqlite3.connect(caminho)
+    memoria.backup(arquivo)
+    arquivo.close()
+
+    nome_original = connection.settings_dict['NAME']
+    connection.connection = None
+    connection.settings_dict['NAME'] = caminho
+    yield
+    connection.close()
+    connection.settings_dict['NAME'] = nome_original
+    connection.connection = memoria
+
+
+@pytest.mark.django_db
+class TestSaldoInsuficiente:
+
+    def test_transferencia_recusada_sem_lancamentos(self, user, origem, destino):
+        with pytest.raises(TransferenciaInvalidaError, match='Saldo insuficiente'):
+            transferir_saldo(user, origem, destino, 50.01)
+        assert not Transacao.objects.exists()
+
+        transferir_saldo(user, origem, destino, 50)
+        origem.refresh_from_db()
+        assert origem.saldo_atual == Decimal('0.00')
+
+    def test_entrada_pendente_nao_conta(self, user, origem, destino, categoria_factory):
+        mesada = categoria_factory(user, 'Mesada', tipo_categoria='entrada')
+        Transacao.objects.create(usuario=user, conta=origem, categoria=mesada, tipo='entrada',
+                                 valor=Decimal('100.00'), descricao='Mesada', data=date(2025, 3, 1), pago=False)
+        origem.refresh_from_db()
+        assert origem.saldo_atual == Decimal('150.00')
+
+        with pytest.raises(TransferenciaInvalidaError, match='Saldo insuficiente'):
+            transferir_saldo(user, origem, destino, 60)
+
+        transferir_saldo(user, origem, destino, 50)
+
+    def test_saida_pendente_continua_descontada(self, user, origem, destino, categoria_factory):
+        lanche = categoria_factory(user, 'Lanche')
+        Transacao.objects.create(usuario=user, conta=origem, categoria=lanche, tipo='saida',
+                                 valor=Decimal('20.00'), descricao='Lanche', data=date(2025, 3, 2), pago=False)
+
+        with pytest.raises(TransferenciaInvalidaError, match='Saldo insuficiente'):
+            transferir_saldo(user, origem, destino, 50)
+
+        transferir_saldo(user, origem, destino, 30)
+        origem.refresh_from_db()
+        assert origem.saldo_atual == Decimal('0.00')
+
+    def test_saldo_lido_do_banco(self, user, origem, destino):
+        # Instância desatualizada: o saldo conferido é o da linha travada.
+        Conta.objects.filter(pk=origem.pk).update(saldo_atual=Decimal('5.00'))
+        with pytest.raises(TransferenciaInvalidaError):
+            transferir_saldo(user, origem, destino, 10)
+
+    def test_deposito_em_meta(self, user, origem):
+        conta_meta = Conta.objects.create(usuario=user, nome='Poupança: Bike')
+        meta = MetaFinanceira.objects.create(usuario=user, nome='Bike', valor_alvo=Decimal('900.00'),
+                                             conta_vinculada=conta_meta)
+        with pytest.raises(DepositoMetaError, match='Saldo insuficiente'):
+            depositar_em_meta(user, meta, 80)
+        depositar_em_meta(user, meta, 30)
+        conta_meta.refresh_from_db()
+        assert conta_meta.saldo_atual == Decimal('30.00')
+
+    def test_api_responde_400(self, user, origem, destino):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        response = client.post('/api/contas/transferir/', {
+            'conta_origem_id': origem.id, 'conta_destino_id': destino.id, 'valor': '75.00'
+        }, format='json')
+        assert response.status_code == 400
+        assert 'Saldo insuficiente' in response.data['detail']
+
+
+def test_transferencias_concorrentes_conservam_o_dinheiro(banco_em_arquivo):
+    user = User.objects.create_user(username='concorrencia_user')
+    contas = [
+        Conta.objects.create(usuario=user, nome=f'Conta {i}', saldo_atual=Decimal('100.00'))
+        for i in range(3)
+    ]
+    erros, feitas, recusadas = [], [], []
+
+    def trabalhar(semente):
+        rng = random.Random(semente)
+        try:
+            # Instâncias próprias de cada thread, lidas antes das transferências das outras.
+            minhas = list(Conta.objects.filter(usuario=user).order_by('id'))
+            for _ in range(15):
+                origem, destino = rng.sample(minhas, 2)
+                try:
+                    transferir_saldo(user, origem, destino, rng.choice((15, 40, 70)))
+                    feitas.append(1)
+                except TransferenciaInvalidaError:
+                    recusadas.append(1)
+        except Exception as e:
+            erros.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=trabalhar, args=(semente,)) for semente in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    assert len(feitas) + len(recusadas) == 12 * 15 and feitas and recusadas
+    saldos = dict(Conta.objects.filter(usuario=user).values_list('id', 'saldo_atual'))
+    assert sum(saldos.values()) == Decimal('300.00')
+    assert min(saldos.values()) >= 0
+    # O saldo de cada conta bate com os lançamentos gravados.
+    for conta_id, saldo in saldos.items():
+        lancamentos = Transacao.objects.filter(conta_id=conta_id)
+        entradas = sum(t.valor for t in lancamentos if t.tipo == 'entrada')
+        saidas = sum(t.valor for t in lancamentos if t.tipo == 'saida')
+        assert saldo == Decimal('100.00') + entradas - saidas
+    assert Transacao.objects.count() == 2 * len(feitas)
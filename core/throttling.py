@@ -0,0 +1,109 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from rest_framework.throttling import BaseThrottle
+
+from .metricas import incrementar
+from .models import BaldeThrottle
+from .tracing import anotar
+
+logger = logging.getLogger(__name__)
+
+PERIODOS = {'s': 1, 'sec': 1, 'min': 60, 'm': 60, 'hour': 3600, 'h': 3600, 'day': 86400, 'd': 86400}
+
+
+def interpretar_orcamento(orcamento):
+    """'60/min' -> (capacidade 60, recarga de 1 token por segundo)."""
+    quantidade, periodo = orcamento.split('/')
+    capacidade = int(quantidade)
+    return capacidade, capacidade / PERIODOS[periodo]
+
+
+def consumir_tokens(chave, custo, capacidade, recarga_por_segundo):
+    """
+    Tenta retirar ``custo`` tokens do balde ``chave``.
+
+    A recarga e a retirada acontecem em um único UPDATE condicional, então
+    processos concorrentes nunca gastam o mesmo token. Retorna
+    ``(permitido, segundos_ate_ter_tokens)``.
+    """
+    custo = min(custo, capacidade)
+    agora = time.time()
+    disponivel = Least(
+        Value(float(capacidade)),
+        F('tokens') + (Value(agora) - F('atualizado_em')) * Value(recarga_por_segundo),
+    )
+
+    atualizados = (
+        BaldeThrottle.objects.filter(chave=chave)
+        .alias(disponivel=disponivel)
+        .filter(disponivel__gte=custo)
+        .update(tokens=disponivel - custo, atualizado_em=agora)
+    )
+    if atualizados:
+        return True, 0
+
+    balde, criado = BaldeThrottle.objects.get_or_create(
+        chave=chave,
+        defaults={'tokens': capacidade - custo, 'atualizado_em': agora},
+    )
+    if criado:
+        return True, 0
+
+    tokens = min(capacidade, balde.tokens + (agora - balde.atualizado_em) * recarga_por_segundo)
+    if tokens >= custo:
+        # Outro processo criou o balde entre o UPDATE e o get_or_create.
+        return consumir_tokens(chave, custo, capacidade, recarga_por_segundo)
+    return False, (custo - tokens) / recarga_por_segundo
+
+
+def custo_da_view(view):
+    """``custos_throttle[action]`` da view, ou ``custo_throttle`` (padrão 1)."""
+    custos = getattr(view, 'custos_throttle', {})
+    return custos.get(getattr(view, 'action', None), getattr(view, 'custo_throttle', 1))
+
+
+class BaldeTokensThrottle(BaseThrottle):
+    """
+    Throttling por balde de tokens, com custo por endpoint.
+
+    O escopo vem de ``throttle_scope`` da view (padrão ``usuario``, ou
+    ``anonimo`` sem login) e o orçamento de ``THROTTLE_ORCAMENTOS``. Cada
+    requisição gasta o custo da view; endpoints pesados custam mais.
+    """
+
+    def __init__(self):
+        self.espera = None
+
+    def allow_request(self, request, view):
+        autenticado = bool(request.user and request.user.is_authenticated)
+        escopo = getattr(view, 'throttle_scope', None) or ('usuario' if autenticado else 'anonimo')
+        orcamento = settings.THROTTLE_ORCAMENTOS.get(escopo)
+        if not orcamento:
+            return True
+
+        capacidade, recarga = interpretar_orcamento(orcamento)
+        custo = custo_da_view(view)
+        identidade = request.user.pk if autenticado else self.get_ident(request)
+
+        permitido, self.espera = consumir_tokens(f'{escopo}:{identidade}', custo, capacidade, recarga)
+        if not permitido:
+            incrementar('throttle_bloqueios', escopo=escopo)
+            incrementar('throttle_custo_recusado', custo, escopo=escopo)
+            anotar(throttle_escopo=escopo, throttle_espera=round(self.espera, 2))
+            logger.warning(
+                "Throttle %s: %s bloqueado em %s (custo %s, espera %.1fs)",
+                escopo, identidade, request.path, custo, self.espera
+            )
+        return permitido
+
+    def wait(self):
+        return self.espera
+
+
+def limpar_baldes(idade_segundos=86400):
+    """Remove baldes sem uso há ``idade_segundos`` (um balde ausente equivale a cheio)."""
+    return BaldeThrottle.objects.filter(atualizado_em__lt=time.time() - idade_segundos).delete()[0]
@@ -0,0 +1,186 @@
+import atexit
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+_span_atual = ContextVar('span_atual', default=None)
+
+
+class Span:
+    __slots__ = (
+        'trace_id', 'span_id', 'pai_id', 'nome', 'amostrado',
+        'inicio', 'inicio_iso', 'duracao_ms', 'atributos',
+    )
+
+    def __init__(self, nome, trace_id, pai_id, amostrado, atributos):
+        self.nome = nome
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.pai_id = pai_id
+        self.amostrado = amostrado
+        self.atributos = atributos
+        self.inicio = time.perf_counter()
+        self.inicio_iso = timezone.now().isoformat()
+        self.duracao_ms = None
+
+    def definir(self, **atributos):
+        self.atributos.update(atributos)
+
+    def como_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'pai_id': self.pai_id,
+            'nome': self.nome,
+            'inicio': self.inicio_iso,
+            'duracao_ms': self.duracao_ms,
+            'atributos': self.atributos,
+        }
+
+
+class _SpanNulo:
+    amostrado = False
+
+    def definir(self, **atributos):
+        pass
+
+
+SPAN_NULO = _SpanNulo()
+
+
+class ExportadorJSONL:
+    """Acumula spans em memória e grava em lotes num arquivo JSON Lines."""
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._ultima_gravacao = time.monotonic()
+
+    def registrar(self, span):
+        with self._lock:
+            self._buffer.append(span.como_dict())
+            gravar = len(self._buffer) >= settings.TRACING_BATCH_SIZE or (
+                span.pai_id is None
+                and time.monotonic() - self._ultima_gravacao >= settings.TRACING_FLUSH_INTERVAL
+            )
+        if gravar:
+            self.descarregar()
+
+    def descarregar(self):
+        with self._lock:
+            lote, self._buffer = self._buffer, []
+            self._ultima_gravacao = time.monotonic()
+        if not lote:
+            return
+        linhas = ''.join(json.dumps(item, ensure_ascii=False, default=str) + '\n' for item in lote)
+        with open(settings.TRACING_FILE, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linhas)
+
+
+exportador = ExportadorJSONL()
+atexit.register(exportador.descarregar)
+
+
+def _rastrear_sql(execute, sql, params, many, context):
+    pai = _span_atual.get()
+    if pai is None or not pai.amostrado:
+        return execute(sql, params, many, context)
+
+    filho = Span('sql', pai.trace_id, pai.span_id, True, {
+        'banco': context['connection'].alias,
+        'sql': sql[:500],
+        'many': many,
+    })
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        filho.duracao_ms = round((time.perf_counter() - filho.inicio) * 1000, 3)
+        linhas = getattr(context.get('cursor'), 'rowcount', -1)
+        if linhas is not None and linhas >= 0:
+            filho.atributos['linhas'] = linhas
+        pai.atributos['sql_consultas'] = pai.atributos.get('sql_consultas', 0) + 1
+        pai.atributos['sql_ms'] = round(pai.atributos.get('sql_ms', 0) + filho.duracao_ms, 3)
+        exportador.registrar(filho)
+
+
+@contextmanager
+def span(nome, **atributos):
+    """
+    Abre um span filho do span corrente (ou a raiz de um novo trace).
+
+    A decisão de amostragem é tomada na raiz e herdada pelos filhos; enquanto
+    o span raiz estiver aberto, cada consulta SQL vira um span ``sql``.
+    """
+    if not settings.TRACING_ENABLED:
+        yield SPAN_NULO
+        return
+
+    pai = _span_atual.get()
+    if pai is None:
+        amostrado = random.random() < settings.TRACING_SAMPLE_RATE
+        atual = Span(nome, uuid.uuid4().hex, None, amostrado, atributos)
+    else:
+        atual = Span(nome, pai.trace_id, pai.span_id, pai.amostrado, atributos)
+
+    token = _span_atual.set(atual)
+    try:
+        with ExitStack() as stack:
+            if pai is None and amostrado:
+                for conexao in connections.all():
+                    stack.enter_context(conexao.execute_wrapper(_rastrear_sql))
+            try:
+                yield atual
+            except Exception as e:
+                atual.atributos['erro'] = f"{type(e).__name__}: {e}"
+                raise
+    finally:
+        _span_atual.reset(token)
+        if atual.amostrado:
+            atual.duracao_ms = round((time.perf_counter() - atual.inicio) * 1000, 3)
+            exportador.registrar(atual)
+
+
+def anotar(**atributos):
+    """Adiciona atributos ao span corrente, se houver um sendo amostrado."""
+    atual = _span_atual.get()
+    if atual is not None and atual.amostrado:
+        atual.definir(**atributos)
+
+
+def _usuario_id(argumentos):
+    usuario = argumentos.get('usuario')
+    if usuario is not None:
+        return getattr(usuario, 'pk', None)
+    for valor in argumentos.values():
+        if hasattr(valor, 'usuario_id'):
+            return valor.usuario_id
+    return None
+
+
+def rastreado(nome=None):
+    """Decorador que envolve uma função de serviço num span com o id do usuário."""
+    def decorador(func):
+        nome_span = nome or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        assinatura = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.TRACING_ENABLED:
+                return func(*args, **kwargs)
+
+            argumentos = assinatura.bind_partial(*args, **kwargs).arguments
+            with span(nome_span, usuario_id=_usuario_id(argumentos)):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorador
@@ -0,0 +1,47 @@
+import uuid
+
+from django.db import IntegrityError, transaction
+
+from .models import VersaoDados
+
+# Escopos invalidados por escrita em cada modelo.
+ESCOPOS_POR_MODELO = {
+    'transacao': ('transacoes', 'contas'),
+    'categoria': ('transacoes',),
+    'conta': ('contas',),
+    'metafinanceira': ('metas',),
+    'incentivo': ('incentivos',),
+    'planoparcelamento': ('transacoes',),
+}
+
+
+def invalidar(usuario_id, *escopos):
+    """Gera um novo token para cada escopo do usuário."""
+    if usuario_id is None:
+        return
+
+    for escopo in escopos:
+        token = uuid.uuid4().hex
+        atualizados = VersaoDados.objects.filter(usuario_id=usuario_id, escopo=escopo).update(token=token)
+        if atualizados:
+            continue
+        try:
+            with transaction.atomic():
+                VersaoDados.objects.create(usuario_id=usuario_id, escopo=escopo, token=token)
+        except IntegrityError:
+            VersaoDados.objects.filter(usuario_id=usuario_id, escopo=escopo).update(token=token)
+
+
+def versoes(usuario_id, *escopos):
+    """Retorna os tokens atuais dos escopos, na ordem pedida, em uma consulta."""
+    tokens = dict(
+        VersaoDados.objects.filter(usuario_id=usuario_id, escopo__in=escopos)
+        .values_list('escopo', 'token')
+    )
+    return tuple(tokens.get(escopo, '0') for escopo in escopos)
+
+
+def chave_cache(prefixo, usuario_id, escopos, *partes):
+    """Monta uma chave de cache que muda sempre que um dos escopos é escrito."""
+    tokens = versoes(usuario_id, *escopos)
+    return ':'.join([prefixo, str(usuario_id), *map(str, partes), *tokens])
@@ -1,22 +1,31 @@
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.utils import timezone
 from django.db.models import Sum
 from django.utils.dateparse import parse_date
 from django.contrib.auth.models import User
-from django.http import FileResponse
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.conf import settings
 from .permissions import IsOwner
-from .models import Transacao, Categoria, Conta, MetaFinanceira, Lembrete, Notificacao, Incentivo
+from .arquivo import modelo_do_periodo, somar_pagas
+from .models import Transacao, TransacaoArquivada, TransacaoHistorico, Categoria, Conta, MetaFinanceira, Lembrete, Notificacao, Incentivo, PlanoParcelamento, TransacaoRecorrente, Orcamento
 from datetime import date, timedelta
-from django.db.models import Q
+from io import BytesIO
+from django.db.models import Q, Prefetch
 from .serializers_actions import LembreteSerializer, NotificacaoSerializer
 from .serializers import (
     TransacaoSerializer,
+    TransacaoHistoricoSerializer,
     CategoriaSerializer,
     ContaSerializer,
     MetaFinanceiraSerializer,
+    PlanoParcelamentoSerializer,
+    TransacaoRecorrenteSerializer,
+    OrcamentoSerializer,
+    ImportacaoTransacoesSerializer,
     UserRegisterSerializer
 )
 from .services import (
@@ -28,6 +37,12 @@ from .services import (
     ConfirmacaoRecebimentoError,
     gerar_relatorio_financeiro_pdf,
     obter_dados_dashboard,
+    escopos_dashboard,
+    SECOES_DASHBOARD,
+    saldo_em_data,
+    obter_historico_saldos,
+    projetar_fluxo_caixa,
+    GRANULARIDADES,
 )
 from .services import (
     criar_incentivo_conclusao,
@@ -35,6 +50,18 @@ from .services import (
     criar_incentivo_enem,
 )
 from rest_framework.views import APIView
+from .routers import ler_da_replica
+from .profiling import listar_capturas, caminho_captura, CapturaNaoEncontradaError
+from .idempotencia import idempotente
+from .metricas import listar as listar_metricas
+from .coalescencia import chave_coalescencia, executar_uma_vez
+from .sincronizacao import CursorExpiradoError, alteracoes_desde
+from .exportacao import FORMATOS, ExportacaoInvalidaError, consulta_exportacao, gerar_exportacao
+from .orcamentos import orcamentos_com_gasto, reavaliar_orcamento
+from .parcelamento import ParcelamentoInvalidoError, criar_plano_parcelado, atualizar_plano, cancelar_plano
+from .categorizacao import sugerir_categorias
+from .importacao import ImportacaoInvalidaError, importar_transacoes
+from .listagens import CamposEsparsosMixin, ListagemRapidaMixin
 
 class UserRegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -48,6 +75,7 @@ class UserRegisterView(generics.CreateAPIView):
 class IncentivoConclusaoCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotente
     def post(self, request):
         ano = request.data.get('ano')
         conta_id = request.data.get('conta_id')
@@ -73,6 +101,7 @@ class IncentivoConclusaoCreateView(APIView):
 class IncentivoConclusaoLiberarView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotente
     def post(self, request):
         incentivo_id = request.data.get('incentivo_id')
         try:
@@ -90,6 +119,7 @@ class IncentivoConclusaoLiberarView(APIView):
 class IncentivoEnemCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotente
     def post(self, request):
         conta_id = request.data.get('conta_id')
         ano = request.data.get('ano')
@@ -106,12 +136,40 @@ class IncentivoEnemCreateView(APIView):
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class TransacaoViewSet(viewsets.ModelViewSet):
+class TransacaoViewSet(ListagemRapidaMixin, viewsets.ModelViewSet):
     serializer_class = TransacaoSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    chave_compacta = 'transacoes'
+    referencias_compactas = {'categoria': 'categorias', 'conta': 'contas'}
 
     def get_queryset(self):
-        return Transacao.objects.filter(usuario=self.request.user).order_by('-data')
+        return self._modelo().objects.filter(usuario=self.request.user).order_by('-data')
+
+    def get_serializer_class(self):
+        if self._modelo() is TransacaoHistorico:
+            return TransacaoHistoricoSerializer
+        return TransacaoSerializer
+
+    def _modelo(self):
+        """
+        Leituras (``list`` e ``retrieve``) incluem os anos arquivados quando o
+        usuário os tem; as escritas só alcançam a tabela quente.
+        """
+        if not hasattr(self, '_modelo_lido'):
+            if self.action in ('list', 'retrieve'):
+                self._modelo_lido = modelo_do_periodo(self.request.user.pk)
+            else:
+                self._modelo_lido = Transacao
+        return self._modelo_lido
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+            if pk.isdigit() and TransacaoArquivada.objects.filter(usuario=self.request.user, pk=pk).exists():
+                raise PermissionDenied("Transações arquivadas não podem ser alteradas.")
+            raise
 
     def get_serializer_context(self):
         return {"request": self.request}
@@ -122,6 +180,90 @@ class TransacaoViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(usuario=self.request.user)
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        if dados.get('parcelas', 1) <= 1:
+            self.perform_create(serializer)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        # Com parcelas, `valor` é o total da compra e cada parcela vira uma transação.
+        try:
+            plano = criar_plano_parcelado(
+                request.user,
+                conta=dados['conta'],
+                categoria=dados['categoria'],
+                tipo=dados['tipo'],
+                descricao=dados['descricao'],
+                valor_total=dados['valor'],
+                numero_parcelas=dados['parcelas'],
+                primeiro_vencimento=dados.get('vencimento') or dados['data'],
+                permitir_duplicada=dados.get('permitir_duplicada', False),
+            )
+        except ParcelamentoInvalidoError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            PlanoParcelamentoSerializer(
+                planos_com_parcelas(request.user).get(pk=plano.pk), context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['get'])
+    def sugerir_categoria(self, request):
+        """
+        Categorias que o usuário costuma usar para as palavras de
+        ``?descricao=``, da mais provável para a menos; ``?tipo=`` restringe
+        a categorias de entrada ou de saída.
+        """
+        descricao = request.query_params.get('descricao', '')
+        if not descricao.strip():
+            return Response({"detail": "Informe o parâmetro 'descricao'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        categorias = Categoria.objects.filter(usuario=request.user)
+        tipo = request.query_params.get('tipo')
+        if tipo:
+            categorias = categorias.filter(tipo_categoria=tipo)
+        categorias = {c.id: c for c in categorias}
+        ranking = sugerir_categorias(request.user.id, descricao, categorias=categorias)
+        return Response({
+            "sugestoes": [
+                {
+                    "categoria": categoria_id,
+                    "categoria_nome": categorias[categoria_id].nome,
+                    "tipo_categoria": categorias[categoria_id].tipo_categoria,
+                    "confianca": confianca,
+                }
+                for categoria_id, confianca in ranking
+                if categoria_id in categorias
+            ]
+        })
+
+    @action(detail=False, methods=['post'])
+    @idempotente
+    def importar(self, request):
+        serializer = ImportacaoTransacoesSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        try:
+            transacoes, automaticas, ignoradas = importar_transacoes(
+                request.user,
+                serializer.validated_data['conta'],
+                serializer.validated_data['transacoes'],
+                duplicadas=serializer.validated_data['duplicadas'],
+            )
+        except ImportacaoInvalidaError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "criadas": len(transacoes),
+                "categorizadas_automaticamente": automaticas,
+                "duplicadas_ignoradas": [i + 1 for i in ignoradas],
+                "ids": [t.id for t in transacoes],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=False, methods=['get'])
     def resumo_financeiro(self, request):
         from_date = request.query_params.get("from_date")
@@ -136,52 +278,40 @@ class TransacaoViewSet(viewsets.ModelViewSet):
         if to_date:
             filters["data__lte"] = parse_date(to_date)
 
-        total_entradas = (
-            Transacao.objects.filter(**filters, tipo="entrada", pago=True)
-            .aggregate(Sum("valor"))["valor__sum"] or 0
-        )
-
-        total_saidas = (
-            Transacao.objects.filter(**filters, tipo="saida", pago=True)
-            .aggregate(Sum("valor"))["valor__sum"] or 0
-        )
-
-        gastos_categoria_qs = Transacao.objects.filter(
-            **filters, 
-            tipo="saida", 
-            pago=True
-        ).values('categoria__nome').annotate(
-            total=Sum('valor')
-        ).order_by('-total')
+        with ler_da_replica(user):
+            total_entradas = somar_pagas(user, filters, "entrada")
+            total_saidas = somar_pagas(user, filters, "saida")
+            gastos_categoria_qs = somar_pagas(user, filters, "saida", agrupar_por='categoria__nome')
         
-        pede_meia_qs = Transacao.objects.filter(
-            usuario=user,
-            tipo='entrada',
-            descricao__icontains="Pé-de-Meia"
-        )
+            pede_meia_qs = modelo_do_periodo(user.pk).objects.filter(
+                usuario=user,
+                tipo='entrada',
+                descricao__icontains="Pé-de-Meia"
+            )
         
-        total_pede_meia_recebido = pede_meia_qs.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
+            total_pede_meia_recebido = pede_meia_qs.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
         
-        parcelas_pendentes_info = pede_meia_qs.filter(pago=False).values(
-            'data', 'valor', 'descricao'
-        ).order_by('data')
+            parcelas_pendentes_info = pede_meia_qs.filter(pago=False).values(
+                'data', 'valor', 'descricao'
+            ).order_by('data')
 
-        saldos_contas = Conta.objects.filter(usuario=user).values(
-            'id', 'nome', 'saldo_atual'
-        ).order_by('nome')
+            saldos_contas = Conta.objects.filter(usuario=user).values(
+                'id', 'nome', 'saldo_atual'
+            ).order_by('nome')
         
         
-        return Response({
-            "saldo_liquido": total_entradas - total_saidas,
-            "total_entradas": total_entradas,
-            "total_saidas": total_saidas,
-            "gastos_por_categoria": list(gastos_categoria_qs),
-            "pede_meia_recebido": total_pede_meia_recebido,
-            "parcelas_pendentes": list(parcelas_pendentes_info),
-            "saldos_por_conta": list(saldos_contas),
-        })
+            return Response({
+                "saldo_liquido": total_entradas - total_saidas,
+                "total_entradas": total_entradas,
+                "total_saidas": total_saidas,
+                "gastos_por_categoria": list(gastos_categoria_qs),
+                "pede_meia_recebido": total_pede_meia_recebido,
+                "parcelas_pendentes": list(parcelas_pendentes_info),
+                "saldos_por_conta": list(saldos_contas),
+            })
 
     @action(detail=False, methods=['post'])
+    @idempotente
     def confirmar_recebimento(self, request):
         try:
             mes = int(request.data.get('mes', timezone.localdate().month))
@@ -208,7 +338,105 @@ class TransacaoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+def planos_com_parcelas(usuario):
+    parcelas = Transacao.objects.select_related('conta', 'categoria').order_by('numero_parcela')
+    return (
+        PlanoParcelamento.objects.filter(usuario=usuario)
+        .prefetch_related(Prefetch('parcelas_geradas', queryset=parcelas))
+    )
+
+
+class PlanoParcelamentoViewSet(CamposEsparsosMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Planos de parcelamento. PATCH altera descrição, categoria ou conta das
+    parcelas pendentes; ``cancelar`` remove as parcelas ainda não pagas.
+    """
+    serializer_class = PlanoParcelamentoSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+    def get_queryset(self):
+        return planos_com_parcelas(self.request.user)
+
+    def get_serializer_context(self):
+        return {"request": self.request}
+
+    def partial_update(self, request, *args, **kwargs):
+        plano = self.get_object()
+        serializer = self.get_serializer(plano, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            atualizar_plano(plano, **serializer.validated_data)
+        except ParcelamentoInvalidoError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(self.get_queryset().get(pk=plano.pk)).data)
+
+    @action(detail=True, methods=['post'])
+    def cancelar(self, request, pk=None):
+        plano = self.get_object()
+        try:
+            removidas = cancelar_plano(plano)
+        except ParcelamentoInvalidoError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"detail": "Plano cancelado.", "parcelas_removidas": removidas},
+            status=status.HTTP_200_OK
+        )
+
+class TransacaoRecorrenteViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
+    """
+    Modelos de lançamentos fixos. As transações são criadas pelo comando
+    ``gerar_recorrencias``; para parar, marque ``ativa`` como falso ou exclua.
+    """
+    serializer_class = TransacaoRecorrenteSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+    def get_queryset(self):
+        return (
+            TransacaoRecorrente.objects.filter(usuario=self.request.user)
+            .select_related('conta', 'categoria')
+            .order_by('proxima_execucao')
+        )
+
+    def get_serializer_context(self):
+        return {"request": self.request}
+
+class OrcamentoViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
+    """
+    Orçamentos mensais por categoria. A listagem traz o gasto do mês de cada
+    orçamento em uma única consulta; ``?mes=AAAA-MM-DD`` filtra um mês.
+    """
+    serializer_class = OrcamentoSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+    def get_queryset(self):
+        return orcamentos_com_gasto(self.request.user, self._mes())
+
+    def get_serializer_context(self):
+        return {"request": self.request}
+
+    def _mes(self):
+        mes = self.request.query_params.get('mes')
+        if not mes:
+            return None
+        try:
+            data = parse_date(mes)
+        except ValueError:
+            # Formato certo, data impossível (2025-13-01).
+            data = None
+        if data is None:
+            raise ParseError("Parâmetro 'mes' inválido; use AAAA-MM-DD.")
+        return data
+
+    def perform_create(self, serializer):
+        reavaliar_orcamento(serializer.save())
+
+    def perform_update(self, serializer):
+        orcamento = serializer.save()
+        # O gasto anotado pelo get_object pode ser de outra categoria/mês.
+        vars(orcamento).pop('gasto', None)
+        reavaliar_orcamento(orcamento)
+
+class CategoriaViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     serializer_class = CategoriaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
@@ -224,9 +452,10 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(usuario=self.request.user)
 
-class ContaViewSet(viewsets.ModelViewSet):
+class ContaViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     serializer_class = ContaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    custos_throttle = {'historico_saldo': 3, 'projecao': 3}
 
     def get_queryset(self):
         return Conta.objects.filter(usuario=self.request.user)
@@ -241,6 +470,7 @@ class ContaViewSet(viewsets.ModelViewSet):
         serializer.save(usuario=self.request.user)
 
     @action(detail=False, methods=['post'])
+    @idempotente
     def transferir(self, request):
         try:
             conta_origem_id = request.data['conta_origem_id']
@@ -279,7 +509,101 @@ class ContaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class MetaFinanceiraViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def saldo_em(self, request, pk=None):
+        conta = self.get_object()
+        data_param = request.query_params.get('data')
+        try:
+            data = parse_date(data_param) if data_param else timezone.localdate()
+        except ValueError:
+            data = None
+        if data is None:
+            return Response(
+                {"detail": "Parâmetro 'data' deve estar no formato YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(saldo_em_data(conta, data))
+
+    @action(detail=False, methods=['get'])
+    def historico_saldo(self, request):
+        try:
+            to_date = parse_date(request.query_params.get('to_date', '')) or timezone.localdate()
+            from_date = parse_date(request.query_params.get('from_date', '')) or to_date - timedelta(days=90)
+            max_pontos = request.query_params.get('max_pontos')
+            max_pontos = int(max_pontos) if max_pontos else None
+            conta_id = request.query_params.get('conta')
+            conta_id = int(conta_id) if conta_id else None
+        except (ValueError, OverflowError):
+            return Response(
+                {"detail": "Parâmetros de data, 'conta' ou 'max_pontos' inválidos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        granularidade = request.query_params.get('granularidade', 'diaria')
+        if granularidade not in GRANULARIDADES:
+            return Response(
+                {"detail": f"'granularidade' deve ser uma de: {', '.join(GRANULARIDADES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if from_date > to_date or (max_pontos is not None and max_pontos < 2):
+            return Response(
+                {"detail": "Intervalo de datas inválido ou 'max_pontos' menor que 2."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (to_date - from_date).days > settings.HISTORICO_SALDO_MAX_DIAS:
+            return Response(
+                {"detail": f"O intervalo deve ter no máximo {settings.HISTORICO_SALDO_MAX_DIAS} dias."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if conta_id is not None and not self.get_queryset().filter(id=conta_id).exists():
+            return Response({"detail": "Conta não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            historico = obter_historico_saldos(
+                request.user, from_date, to_date, granularidade,
+                conta_id=conta_id,
+                max_pontos=max_pontos,
+            )
+        except (OverflowError, ValueError):
+            # Fim de semana ou de mês depois de date.max (o relativedelta
+            # levanta ValueError, o timedelta OverflowError).
+            return Response(
+                {"detail": "Datas fora do intervalo suportado."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(historico)
+
+    @action(detail=False, methods=['get'])
+    def projecao(self, request):
+        try:
+            meses = int(request.query_params.get('meses', 3))
+            conta_id = request.query_params.get('conta')
+            conta_id = int(conta_id) if conta_id else None
+        except ValueError:
+            return Response(
+                {"detail": "Parâmetros 'meses' ou 'conta' inválidos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 1 <= meses <= settings.PROJECAO_MAX_MESES:
+            return Response(
+                {"detail": f"'meses' deve estar entre 1 e {settings.PROJECAO_MAX_MESES}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if conta_id is not None and not self.get_queryset().filter(id=conta_id).exists():
+            return Response({"detail": "Conta não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+
+        incluir_pede_meia = request.query_params.get('pede_meia', '1') not in ('0', 'false')
+        return Response(projetar_fluxo_caixa(
+            request.user, meses,
+            conta_id=conta_id,
+            incluir_pede_meia=incluir_pede_meia,
+        ))
+
+class MetaFinanceiraViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     serializer_class = MetaFinanceiraSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
@@ -323,6 +647,7 @@ class MetaFinanceiraViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=True, methods=['post'])
+    @idempotente
     def depositar(self, request, pk=None):
         try:
             valor = float(request.data.get('valor', 0))
@@ -357,7 +682,7 @@ class MetaFinanceiraViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-class LembreteViewSet(viewsets.ModelViewSet):
+class LembreteViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     serializer_class = LembreteSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -408,7 +733,7 @@ class LembreteViewSet(viewsets.ModelViewSet):
             'notificacoes': nots_serializer.data
         })
 
-class NotificacaoViewSet(viewsets.ModelViewSet):
+class NotificacaoViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     serializer_class = NotificacaoSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -423,6 +748,8 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
 
 class RelatorioFinanceiroPDFView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'relatorios'
+    custo_throttle = 20
     
     def get(self, request):
         from_date = request.query_params.get('from_date')
@@ -431,15 +758,23 @@ class RelatorioFinanceiroPDFView(APIView):
         from_date_obj = parse_date(from_date) if from_date else None
         to_date_obj = parse_date(to_date) if to_date else None
         
+        chave = chave_coalescencia(
+            'relatorio_pdf', request.user, ('transacoes', 'contas', 'metas', 'incentivos'),
+            from_date_obj, to_date_obj
+        )
         try:
-            pdf_buffer = gerar_relatorio_financeiro_pdf(
-                request.user,
-                from_date=from_date_obj,
-                to_date=to_date_obj
+            pdf_bytes = executar_uma_vez(
+                chave,
+                lambda: gerar_relatorio_financeiro_pdf(
+                    request.user,
+                    from_date=from_date_obj,
+                    to_date=to_date_obj
+                ).getvalue(),
+                endpoint='relatorio_pdf'
             )
             
             response = FileResponse(
-                pdf_buffer,
+                BytesIO(pdf_bytes),
                 content_type='application/pdf',
                 as_attachment=True,
                 filename=f'relatorio_financeiro_{timezone.localdate()}.pdf'
@@ -452,8 +787,59 @@ class RelatorioFinanceiroPDFView(APIView):
             )
 
 
+class ExportacaoView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'relatorios'
+    custo_throttle = 10
+
+    def get(self, request, recurso):
+        formato = request.query_params.get('formato', 'csv')
+        comprimir = request.query_params.get('gzip') in ('1', 'true')
+        try:
+            from_date = parse_date(request.query_params.get('from_date', ''))
+            to_date = parse_date(request.query_params.get('to_date', ''))
+            conta_id = request.query_params.get('conta')
+            conta_id = int(conta_id) if conta_id else None
+        except ValueError:
+            return Response(
+                {'detail': "Parâmetros de data ou 'conta' inválidos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if formato not in FORMATOS:
+            return Response(
+                {'detail': f"Formato deve ser um de: {', '.join(FORMATOS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            queryset, campos = consulta_exportacao(
+                request.user, recurso,
+                from_date=from_date,
+                to_date=to_date,
+                conta_id=conta_id
+            )
+        except ExportacaoInvalidaError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        nome_arquivo = f'{recurso}_{timezone.localdate()}.{formato}'
+        content_type = FORMATOS[formato]
+        if comprimir:
+            nome_arquivo += '.gz'
+            content_type = 'application/gzip'
+
+        response = StreamingHttpResponse(
+            gerar_exportacao(queryset, campos, formato, comprimir),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return response
+
+
 class DashboardDataView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'relatorios'
+    custo_throttle = 5
     
     def get(self, request):
         from_date = request.query_params.get('from_date')
@@ -461,16 +847,92 @@ class DashboardDataView(APIView):
         
         from_date_obj = parse_date(from_date) if from_date else None
         to_date_obj = parse_date(to_date) if to_date else None
-        
+
+        secoes = request.query_params.get('sections')
+        secoes = tuple(sorted({s.strip() for s in secoes.split(',') if s.strip()})) if secoes else tuple(SECOES_DASHBOARD)
+        if not secoes or set(secoes).difference(SECOES_DASHBOARD):
+            return Response(
+                {"detail": f"'sections' deve conter apenas: {', '.join(SECOES_DASHBOARD)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        chave = chave_coalescencia(
+            'dashboard', request.user, escopos_dashboard(secoes),
+            from_date_obj, to_date_obj, *secoes
+        )
         try:
-            dashboard_data = obter_dados_dashboard(
-                request.user,
-                from_date=from_date_obj,
-                to_date=to_date_obj
+            dashboard_data = executar_uma_vez(
+                chave,
+                lambda: obter_dados_dashboard(
+                    request.user,
+                    from_date=from_date_obj,
+                    to_date=to_date_obj,
+                    secoes=secoes,
+                ),
+                endpoint='dashboard'
             )
             return Response(dashboard_data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response(
                 {'detail': f'Erro ao carregar dados do dashboard: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+
+class SincronizacaoView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limite = request.query_params.get('limite')
+            limite = int(limite) if limite else None
+        except ValueError:
+            return Response(
+                {'detail': "Parâmetros 'since' e 'limite' devem ser inteiros."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if since < 0 or (limite is not None and limite < 1):
+            return Response(
+                {'detail': "'since' não pode ser negativo e 'limite' deve ser positivo."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            pagina = alteracoes_desde(request.user, since, limite, contexto={'request': request})
+        except CursorExpiradoError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_410_GONE)
+        return Response(pagina, status=status.HTTP_200_OK)
+
+
+class PerfilCapturaListView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(listar_capturas(), status=status.HTTP_200_OK)
+
+
+class MetricasView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(listar_metricas(), status=status.HTTP_200_OK)
+
+
+class PerfilCapturaDownloadView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, captura_id):
+        formato = request.query_params.get('formato', 'prof')
+        try:
+            caminho = caminho_captura(captura_id, formato)
+        except CapturaNaoEncontradaError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        content_type = 'application/json' if formato == 'json' else 'application/octet-stream'
+        return FileResponse(
+            open(caminho, 'rb'),
+            content_type=content_type,
+            as_attachment=True,
+            filename=caminho.name
+        )